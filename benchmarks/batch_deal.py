@@ -0,0 +1,38 @@
+"""Time per deal of BatchDeal compared to DurakGame
+
+Deals the same seeds with both and reports microseconds per deal.
+
+Usage: python -m benchmarks.batch_deal [--games N] [--players P ...]
+"""
+import argparse
+from time import perf_counter
+
+from website.durak_game.batch import BatchDeal, deal_game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100000,
+                        help="size of the batch")
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+
+    seeds = list(range(args.games))
+    # DurakGame is slow, a sample is enough for its time per deal
+    sample = seeds[:min(args.games, 10000)]
+    print("players  batch (us)  game (us)  speedup")
+    for player_count in args.players:
+        start = perf_counter()
+        BatchDeal(seeds, player_count)
+        batch_time = (perf_counter() - start) / len(seeds) * 1e6
+
+        start = perf_counter()
+        for seed in sample:
+            deal_game(seed, player_count)
+        game_time = (perf_counter() - start) / len(sample) * 1e6
+        print(f"{player_count:<7}{batch_time:>12.2f}{game_time:>11.2f}"
+              f"{game_time / batch_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
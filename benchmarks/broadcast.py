@@ -0,0 +1,108 @@
+"""Bytes encoded and CPU time per finishround event
+
+Sends the finishround event of a game with every player getting its own
+cards to the players and spectators of its room in two ways:
+
+- per recipient: the event with the cards of the recipient is encoded for
+  every recipient, as emitting it per sid does
+- encode once: the event is encoded once for the room, the cards once
+  per player (see RoomPackets)
+
+Reports the bytes of JSON encoded and the microseconds of CPU per event
+for every amount of players and spectators. The bytes sent are the same.
+
+Usage: python -m benchmarks.broadcast [--rounds N] [--players P ...]
+                                      [--spectators S ...]
+"""
+import argparse
+from json import dumps
+from time import process_time
+
+from website.durak_game.broadcast import RoomPackets
+from website.durak_game.durak import DurakGame
+
+
+def get_finish_round(players: int) -> tuple:
+    """Get the event of the first round of a game, ended by a take
+
+    Returns: tuple[dict, dict]
+        The event, and the cards of every player by sid
+    """
+    game = DurakGame(1234, "benchmark", seed=players)
+    game.journal = None
+    for seat in range(players):
+        game.add_player(f"player{seat}")
+    game.start_game()
+    defender = game.current_player
+    attacker = game.prev_player(defender)
+    game.throw_cards(attacker, attacker.cards[:1])
+    game.take_cards(defender)
+    event = {
+        "event": "finishround",
+        "seq": 12,
+        "newplayer": game.current_player.username,
+        "deckcount": game.deck.get_card_count(),
+        "cardcounts": {player.username: player.get_card_count()
+                       for player in game.players}
+    }
+    private = {f"sid{seat}": {"cards": [str(card) for card in player.cards]}
+               for seat, player in enumerate(game.players)}
+    return event, private
+
+
+def send_per_recipient(event: dict, private: dict, sids: list) -> int:
+    """Returns: int
+        The amount of bytes encoded
+    """
+    encoded = 0
+    for sid in sids:
+        data = dict(event, **private[sid]) if sid in private else event
+        encoded += len("2" + dumps(["status", data], separators=(",", ":")))
+    return encoded
+
+
+def send_once(event: dict, private: dict, sids: list) -> int:
+    packets = RoomPackets([("status", event, private)])
+    for sid in sids:
+        packets.get_packet(sid)
+    return packets.encoded_bytes
+
+
+def measure(send, event: dict, private: dict, sids: list,
+            rounds: int) -> tuple:
+    """Returns: tuple[int, float]
+        Bytes encoded and microseconds of CPU per event
+    """
+    encoded = send(event, private, sids)
+    start = process_time()
+    for _ in range(rounds):
+        send(event, private, sids)
+    return encoded, (process_time() - start) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000,
+                        help="events sent per measurement")
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--spectators", type=int, nargs="+",
+                        default=[0, 8, 64])
+    args = parser.parse_args()
+
+    print(f"{'':>14}{'bytes encoded':>24}{'CPU (us)':>24}")
+    print(f"{'players':>7}{'specs':>7}"
+          + f"{'per recipient':>14}{'once':>10}" * 2)
+    for players in args.players:
+        event, private = get_finish_round(players)
+        for spectators in args.spectators:
+            sids = list(private) + [f"spectator{index}"
+                                    for index in range(spectators)]
+            per_recipient = measure(send_per_recipient, event, private, sids,
+                                    args.rounds)
+            once = measure(send_once, event, private, sids, args.rounds)
+            print(f"{players:>7}{spectators:>7}{per_recipient[0]:>14}"
+                  f"{once[0]:>10}{per_recipient[1]:>14.1f}{once[1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Throughput of socket events of the game manager
+
+Threads send events that perform a random legal action, either holding
+the lock of the game through GameManager.lock_game and then waiting while
+holding it, as a handler sending the resulting socket events, or through
+the mailbox of the game (GameManager.submit), whose worker waits once per
+batch of jobs after releasing the lock. Threads whose events are refused
+by a full mailbox retry after a moment. Reports events per second for
+every amount of threads, with all threads sending to a single game and
+with every thread sending to its own game, and the 99th percentile of the
+latency of events in the mailbox of the single game.
+
+Usage: python -m benchmarks.concurrency [--events N] [--emit-time S]
+                                        [--threads T ...]
+"""
+import argparse
+from random import Random
+from threading import Thread
+from time import perf_counter, sleep
+
+from website.durak_game import actions
+from website.durak_game.game_manager import GameManager
+
+
+def create_games(manager: GameManager, count: int) -> list[int]:
+    game_ids = []
+    for index in range(count):
+        game = manager.create_game(f"game{index}", seed=index)
+        game.journal = None
+        for seat in range(4):
+            game.add_player(f"player{seat}")
+        game.start_game()
+        game_ids.append(game.id)
+    return game_ids
+
+
+def send_events(manager: GameManager, game_id: int, count: int,
+                emit_time: float, rng: Random):
+    for _ in range(count):
+        with manager.lock_game(game_id) as game:
+            if game.is_in_progress:
+                player = rng.choice(game.players)
+                legal_actions = game.legal_actions(player)
+                if legal_actions:
+                    actions.apply_action(game, player,
+                                         rng.choice(legal_actions))
+            sleep(emit_time)
+
+
+def act(game, rng: Random):
+    if game.is_in_progress:
+        player = rng.choice(game.players)
+        legal_actions = game.legal_actions(player)
+        if legal_actions:
+            actions.apply_action(game, player, rng.choice(legal_actions))
+
+
+def submit_events(manager: GameManager, game_id: int, count: int,
+                  emit_time: float, rng: Random):
+    for _ in range(count):
+        while not manager.submit(game_id, act, rng):
+            sleep(emit_time)
+
+
+def get_mailbox_manager(emit_time: float) -> GameManager:
+    """Manager whose workers are threads, sending takes emit_time """
+    manager = GameManager()
+    manager.spawn = lambda worker: Thread(target=worker).start()
+    manager.sender = lambda events: sleep(emit_time)
+    return manager
+
+
+def events_per_second(thread_count: int, games: int, events: int,
+                      emit_time: float, use_mailbox: bool = False) -> tuple:
+    """Returns: tuple[float, float]
+        Events per second, and the 99th percentile of the latency in the
+        mailboxes in milliseconds (0 with locks)
+    """
+    if use_mailbox:
+        manager = get_mailbox_manager(emit_time)
+        target = submit_events
+    else:
+        manager = GameManager()
+        target = send_events
+    game_ids = create_games(manager, games)
+    threads = [Thread(target=target,
+                      args=(manager, game_ids[index % games], events,
+                            emit_time, Random(index)))
+               for index in range(thread_count)]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    actors = [manager.get_actor(game_id) for game_id in game_ids]
+    while any(actor.is_running for actor in actors):
+        sleep(emit_time)
+    latency = max(actor.get_latency_percentiles((99,)) or [0]
+                  for actor in actors)[0]
+    return thread_count * events / (perf_counter() - start), latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200,
+                        help="events sent by every thread")
+    parser.add_argument("--emit-time", type=float, default=0.001,
+                        help="seconds sending the socket events takes")
+    parser.add_argument("--threads", type=int, nargs="+",
+                        default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    print(f"{'':<7}{'one game (ev/s)':>20}{'own games (ev/s)':>20}"
+          f"{'one game':>10}")
+    print(f"{'threads':<7}" + f"{'lock':>10}{'mailbox':>10}" * 2
+          + f"{'p99 (ms)':>10}")
+    for thread_count in args.threads:
+        results = [events_per_second(thread_count, games, args.events,
+                                     args.emit_time, use_mailbox)
+                   for games in (1, thread_count)
+                   for use_mailbox in (False, True)]
+        print(f"{thread_count:<7}"
+              + "".join(f"{rate:>10.0f}" for rate, _ in results)
+              + f"{results[1][1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Cost of the game journal
+
+Plays random games with and without a journal to report the overhead of
+recording every action, times a single record and replays of the finished journals from
+their snapshots and from scratch.
+
+Usage: python -m benchmarks.journal [--games N] [--players P] [--seed S]
+"""
+import argparse
+from random import Random
+from time import perf_counter
+
+from website.durak_game import actions
+from website.durak_game.durak import DurakGame, replay
+from website.durak_game.journal import Journal
+from website.durak_game.simulator import RandomPolicy, choose_action
+
+
+def play_games(count: int, players: int, seed: int,
+               journaled: bool) -> tuple:
+    """Play random games
+
+    Returns: tuple[float, list[Journal], int]
+        The time in seconds, the journals and the amount of actions
+    """
+    journals = []
+    action_count = 0
+    start = perf_counter()
+    for index in range(count):
+        rng = Random(seed + index)
+        game = DurakGame(index, "benchmark", seed=seed + index)
+        if not journaled:
+            game.journal = None
+        for seat in range(players):
+            game.add_player(f"bot{seat}")
+        game.start_game()
+        policies = dict.fromkeys(game.players, RandomPolicy())
+        while game.is_in_progress:
+            _, player, action = choose_action(game, policies, rng)
+            actions.apply_action(game, player, action)
+            action_count += 1
+        journals.append(game.journal)
+    return perf_counter() - start, journals, action_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Warm up, then alternate to even out noise
+    play_games(20, args.players, args.seed, True)
+    plain, _, action_count = play_games(args.games, args.players,
+                                        args.seed, False)
+    journaled, journals, _ = play_games(args.games, args.players,
+                                        args.seed, True)
+    print(f"actions:            {action_count:10d}")
+    print(f"without journal:    {plain / action_count * 1e6:10.2f} us/action")
+    print(f"with journal:       "
+          f"{journaled / action_count * 1e6:10.2f} us/action "
+          f"({(journaled / plain - 1) * 100:+.1f}%)")
+
+    game = DurakGame(0, "benchmark", seed=args.seed)
+    game.journal.snapshot_interval = 10 ** 9
+    start = perf_counter()
+    for _ in range(100000):
+        game.record(0, "bot0", 0)
+    record = (perf_counter() - start) / 100000 * 1e6
+    start = perf_counter()
+    for _ in range(1000):
+        game.clone()
+    snapshot = (perf_counter() - start) / 1000 * 1e6 / Journal.SNAPSHOT_INTERVAL
+    print(f"record:             {record:10.2f} us/entry "
+          f"(+{snapshot:.2f} us/entry for snapshots)")
+
+    entry_count = sum(len(journal) for journal in journals)
+    start = perf_counter()
+    for journal in journals:
+        replay(journal, len(journal) - 1)
+    seconds = perf_counter() - start
+    print(f"replay (snapshots): {seconds / len(journals) * 1e6:10.1f} us/game")
+
+    start = perf_counter()
+    for journal in journals:
+        full = Journal(journal.game_id, journal.name, journal.seed,
+                       snapshot_interval=entry_count + 1)
+        full.entries = journal.entries
+        replay(full, len(full) - 1)
+    seconds = perf_counter() - start
+    print(f"replay (scratch):   {seconds / len(journals) * 1e6:10.1f} us/game "
+          f"({entry_count / len(journals):.1f} entries per game)")
+
+
+if __name__ == "__main__":
+    main()
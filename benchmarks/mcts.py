@@ -0,0 +1,62 @@
+"""Speed of the building blocks of the MCTS bot
+
+Reports the time of a clone and of a determinization of a game in
+progress, and playouts per second, which bound the strength of the bot.
+
+Usage: python -m benchmarks.mcts [--players P] [--playouts N] [--seed S]
+"""
+import argparse
+from random import Random
+from time import perf_counter
+
+from website.durak_game.durak import DurakGame
+from website.durak_game.mcts import MCTSPolicy, determinize
+
+
+def time_per_call(function, count: int) -> float:
+    """Get the average time of a function call in microseconds """
+    start = perf_counter()
+    for _ in range(count):
+        function()
+    return (perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--playouts", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    game = DurakGame(0, "benchmark", seed=args.seed)
+    game.journal = None
+    for seat in range(args.players):
+        game.add_player(f"bot{seat}")
+    game.start_game()
+    observer = game.players[0]
+    rng = Random(args.seed)
+    policy = MCTSPolicy()
+
+    print(f"clone:            "
+          f"{time_per_call(game.clone, 2000):8.1f} us")
+    print(f"clone (no rng):   "
+          f"{time_per_call(lambda: game.clone(copy_rng=False), 2000):8.1f} us")
+    print(f"determinize:      "
+          f"{time_per_call(lambda: determinize(game, observer, rng), 2000):8.1f} us")
+
+    action_count = 0
+    start = perf_counter()
+    for _ in range(args.playouts):
+        action_count += policy.playout(determinize(game, observer, rng), rng)
+    seconds = perf_counter() - start
+    print(f"playouts/second:  {args.playouts / seconds:8.1f} "
+          f"({action_count / args.playouts:.1f} actions per playout)")
+
+    policy.time_limit = 1.0
+    policy.iterations = 10 ** 9
+    policy.search(game, observer, rng)
+    print(f"iterations in 1s: {policy.last_iterations:8d}")
+
+
+if __name__ == "__main__":
+    main()
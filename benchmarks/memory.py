@@ -0,0 +1,72 @@
+"""Memory used by games resident in the game manager
+
+Reports the bytes allocated per idle lobby, per in-progress 4-player game
+and per in-progress 8-player game.
+
+Usage: python -m benchmarks.memory [--games N]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from website.durak_game.durak import DurakGame
+
+
+def idle_lobby(game_id: int) -> DurakGame:
+    """A game with 2 players waiting in the lobby """
+    game = DurakGame(game_id, "lobby")
+    game.add_player("player0")
+    game.add_player("player1")
+    return game
+
+
+def game_in_progress(player_count: int):
+    """Get a function creating started games with the given amount of players """
+    def create(game_id: int) -> DurakGame:
+        game = DurakGame(game_id, "game")
+        for i in range(player_count):
+            game.add_player(f"player{i}")
+        game.start_game()
+        return game
+    return create
+
+
+def bytes_per_game(create_game, count: int) -> float:
+    """Get the average amount of bytes allocated for one game
+
+    Args:
+        create_game: function(int) -> DurakGame
+            Function creating a game with the given id
+        count: int
+            Amount of games to keep alive at the same time
+    """
+    games = [None] * count
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for i in range(count):
+        games[i] = create_game(i)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000,
+                        help="amount of games kept alive per measurement")
+    args = parser.parse_args()
+
+    scenarios = [
+        ("idle lobby", idle_lobby),
+        ("4-player game", game_in_progress(4)),
+        ("8-player game", game_in_progress(8)),
+    ]
+    for name, create_game in scenarios:
+        size = bytes_per_game(create_game, args.games)
+        print(f"{name:<16}{size:>10.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Throughput of the engine in headless self-play
+
+Plays complete games between bots and reports games/second, actions/second
+and latency percentiles of every engine action.
+
+Usage: python -m benchmarks.selfplay [--games N] [--seed S]
+                                     [--policies greedy random ...]
+                                     [--trace FILE]
+"""
+import argparse
+import json
+
+from website.durak_game.simulator import POLICIES, Simulator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game")
+    parser.add_argument("--policies", nargs="+", default=["greedy"] * 4,
+                        choices=sorted(POLICIES),
+                        help="policy of every seat")
+    parser.add_argument("--trace",
+                        help="write the socket events of every game as "
+                             "JSON lines to this file")
+    args = parser.parse_args()
+
+    simulator = Simulator([POLICIES[name]() for name in args.policies],
+                          record_traces=args.trace is not None)
+    report = simulator.run(args.games, args.seed)
+    print(report.format())
+
+    if args.trace:
+        with open(args.trace, "w") as trace_file:
+            for result, trace in zip(report.results, report.traces):
+                trace_file.write(json.dumps({"seed": result.seed,
+                                             "events": trace}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
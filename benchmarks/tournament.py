@@ -0,0 +1,44 @@
+"""Seeded tournament between bot policies on all cores
+
+Appends one record per game to the result file and resumes from it when
+the tournament is run again.
+
+Usage: python -m benchmarks.tournament RESULTS [--games N] [--seed S]
+                                       [--policies greedy random ...]
+                                       [--processes P] [--shard-size K]
+"""
+import argparse
+from time import perf_counter
+
+from website.durak_game.simulator import POLICIES
+from website.durak_game.tournament import Tournament
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("results", help="result file, resumed if it exists")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game")
+    parser.add_argument("--policies", nargs="+",
+                        default=["greedy", "random", "greedy", "random"],
+                        choices=sorted(POLICIES),
+                        help="lineup of policies, rotated every game")
+    parser.add_argument("--max-actions", type=int, default=10000)
+    parser.add_argument("--processes", type=int,
+                        help="worker processes, defaults to the core count")
+    parser.add_argument("--shard-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    tournament = Tournament(args.policies, max_actions=args.max_actions,
+                            processes=args.processes,
+                            shard_size=args.shard_size)
+    start = perf_counter()
+    stats = tournament.run(args.games, args.results, args.seed)
+    seconds = perf_counter() - start
+    print(stats.format())
+    print(f"{seconds:.1f} seconds")
+
+
+if __name__ == "__main__":
+    main()
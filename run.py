@@ -1,3 +1,8 @@
+# Patch before anything imports threading, so the locks of the game manager
+# are green like the socket handlers
+import eventlet
+eventlet.monkey_patch()
+
 from website import create_app, socketio
 
 app = create_app()
@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from website.durak_game.batch import BatchDeal, deal_game, is_legal_break_cards
+from website.durak_game.card import Card
+
+SEEDS = [0, 1, 42, 2**32 - 1, 2**32, 2**40 + 7, 2**64 - 1]
+
+
+def get_index(suit, symbol):
+    return Card(suit, symbol).index
+
+
+@pytest.mark.parametrize("player_count", [2, 3, 4, 6, 8])
+def test_batch_deal_matches_game(player_count):
+    """ Every deal of a batch is the deal of DurakGame with the same seed """
+    seeds = SEEDS + list(range(100, 150))
+    batch = BatchDeal(seeds, player_count)
+
+    assert batch.get_game_count() == len(seeds)
+    for g, seed in enumerate(seeds):
+        game = deal_game(seed, player_count)
+        assert [int(hand) for hand in batch.hands[g]] == [player.mask for player in game.players]
+        assert int(batch.trump_cards[g]) == game.trump_card.index
+        assert int(batch.trumps[g]) == Card.SUITS.index(game.trump)
+        assert [int(index) for index in batch.decks[g]] == [card.index for card in game.deck.cards]
+        assert game.players[int(batch.current_seats[g])] is game.current_player
+
+def test_batch_deal_cards_per_player():
+    """ Smaller hands leave more cards in the deck """
+    batch = BatchDeal([7, 8], 4, cards_per_player=3)
+    game = deal_game(8, 4, cards_per_player=3)
+
+    assert batch.decks.shape == (2, game.deck.get_card_count())
+    assert [int(hand) for hand in batch.hands[1]] == [player.mask for player in game.players]
+
+def test_batch_deal_empty():
+    """ A batch without seeds deals nothing """
+    batch = BatchDeal([], 4)
+
+    assert batch.get_game_count() == 0
+    assert batch.hands.shape == (0, 4)
+
+def test_is_legal_break_cards():
+    """ Legality of breaking all cards, per game """
+    bottom_cards = [[get_index(Card.HEARTS, Card.SEVEN), get_index(Card.SPADES, Card.NINE)],
+                    [get_index(Card.HEARTS, Card.SEVEN), get_index(Card.SPADES, Card.NINE)],
+                    [get_index(Card.HEARTS, Card.SEVEN), -1],
+                    [get_index(Card.HEARTS, Card.QUEEN), -1],
+                    [get_index(Card.CLUBS, Card.QUEEN), -1],
+                    [get_index(Card.HEARTS, Card.SEVEN), get_index(Card.SPADES, Card.NINE)]]
+    top_cards = [[get_index(Card.HEARTS, Card.EIGHT), get_index(Card.SPADES, Card.ACE)],
+                 [get_index(Card.HEARTS, Card.SIX), get_index(Card.SPADES, Card.ACE)],
+                 [get_index(Card.CLUBS, Card.TWO), -1],
+                 [get_index(Card.CLUBS, Card.TWO), -1],
+                 [get_index(Card.CLUBS, Card.TWO), -1],
+                 [get_index(Card.HEARTS, Card.EIGHT), -1]]
+    # Clubs are trump
+    trumps = np.full(6, Card.SUITS.index(Card.CLUBS))
+
+    assert list(is_legal_break_cards(bottom_cards, top_cards, trumps)) == [
+        True, False, True, True, False, False]
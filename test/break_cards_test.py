@@ -64,7 +64,7 @@ def test_break_card(game):
     p2 = game.current_player
 
     bottom_card = Card(Card.HEARTS, Card.SEVEN)
-    top_card = Card(Card.HEARTS, Card.SEVEN)
+    top_card = Card(Card.HEARTS, Card.EIGHT)
     # Make sure the player can break the card
     p1.cards = [bottom_card]
     p2.cards = [top_card]
@@ -76,6 +76,26 @@ def test_break_card(game):
     assert p2.get_card_count() == 0
     assert top_card not in p2.cards
 
+def test_break_card_illegal_lower(game):
+    """ A card cannot be broken by a lower card """
+    game.start_game()
+    game.trump = Card.CLUBS
+
+    p1 = game.prev_player(game.current_player)
+    p2 = game.current_player
+
+    bottom_card = Card(Card.HEARTS, Card.SEVEN)
+    top_card = Card(Card.HEARTS, Card.SIX)
+    p1.cards = [bottom_card]
+    p2.cards = [top_card]
+
+    game.throw_cards(p1, [bottom_card])
+
+    assert not game.is_legal_break_card(p2, bottom_card, top_card)
+    assert not game.break_card(p2, bottom_card, top_card)
+    assert game.table_cards[bottom_card] is None
+    assert top_card in p2.cards
+
 
 # BREAKING CARDS
 
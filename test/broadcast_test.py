@@ -0,0 +1,45 @@
+import json
+
+from website.durak_game.broadcast import RoomPackets, splice
+
+
+def decode(packet: str) -> list:
+    assert packet[0] == "2"
+    return json.loads(packet[1:])
+
+
+def test_splice():
+    assert splice('{"a":1}', '{"b":[2]}') == '{"a":1,"b":[2]}'
+    assert splice('{}', '{"b":2}') == '{"b":2}'
+    assert splice('{"a":1}', '{}') == '{"a":1}'
+
+def test_shared_packet_encoded_once():
+    """ Recipients without private fields get the same packet """
+    packets = RoomPackets([("move", {"event": "takecards", "seq": 3}, None)])
+
+    packet = packets.get_packet("sid1")
+    assert packets.get_packet("sid2") is packet
+    assert decode(packet) == ["move", {"event": "takecards", "seq": 3}]
+
+def test_private_fields():
+    """ Private fields only go to their recipient """
+    event = {"event": "finishround", "deckcount": 20}
+    packets = RoomPackets([("status", event, {"sid1": {"cards": ["7H"]}})])
+    shared_bytes = packets.encoded_bytes
+
+    assert decode(packets.get_packet("sid1")) == [
+        "status", dict(event, cards=["7H"])]
+    assert decode(packets.get_packet("sid2")) == ["status", event]
+    assert packets.encoded_bytes == shared_bytes + len('{"cards":["7H"]}')
+
+def test_batch_packet():
+    """ Several events for a room go in one batch packet, in order """
+    packets = RoomPackets([
+        ("move", {"event": "takecards"}, None),
+        ("status", {"event": "finishround"}, {"sid1": {"cards": []}})])
+
+    assert decode(packets.get_packet("sid1")) == ["batch", [
+        {"name": "move", "data": {"event": "takecards"}},
+        {"name": "status", "data": {"event": "finishround", "cards": []}}]]
+    assert decode(packets.get_packet("sid2"))[1][1] == {
+        "name": "status", "data": {"event": "finishround"}}
@@ -0,0 +1,51 @@
+import pickle
+
+import pytest
+
+from website.durak_game.card import Card
+
+
+def test_card_interned():
+    """ Creating the same card twice gives the same instance """
+    assert Card(Card.HEARTS, Card.SEVEN) is Card(Card.HEARTS, Card.SEVEN)
+
+def test_card_from_str_interned():
+    """ Cards from strings are the interned cards """
+    card = Card(Card.HEARTS, Card.SEVEN)
+    assert Card.from_str("7H") is card
+    assert Card.from_str("card7H") is card
+    assert Card.from_str("Card7h") is card
+
+def test_card_from_str_invalid():
+    """ Invalid strings are rejected """
+    with pytest.raises(ValueError):
+        Card.from_str("card15H")
+    with pytest.raises(ValueError):
+        Card.from_str("7X")
+
+def test_card_invalid():
+    """ Invalid suits or symbols are rejected """
+    with pytest.raises(ValueError):
+        Card("X", Card.SEVEN)
+    with pytest.raises(ValueError):
+        Card(Card.HEARTS, 1)
+
+def test_card_indices():
+    """ Every card has a unique index in range(Card.CARD_COUNT) """
+    assert Card.CARD_COUNT == 52
+    assert len(Card.CARDS) == Card.CARD_COUNT
+    for index, card in enumerate(Card.CARDS):
+        assert card.index == index
+        assert Card.from_index(index) is card
+        assert hash(card) == index
+
+def test_card_equality():
+    """ Cards of different suits with the same symbol are not equal """
+    assert Card(Card.HEARTS, Card.SEVEN) != Card(Card.CLUBS, Card.SEVEN)
+    assert Card(Card.HEARTS, Card.SEVEN) != "7H"
+    assert Card(Card.HEARTS, Card.SEVEN) < Card(Card.CLUBS, Card.EIGHT)
+
+def test_card_pickle():
+    """ Unpickled cards are the interned cards """
+    card = Card(Card.SPADES, Card.ACE)
+    assert pickle.loads(pickle.dumps(card)) is card
@@ -0,0 +1,133 @@
+from website.durak_game import cardset
+from website.durak_game.card import Card
+from website.durak_game.player import Player
+from website.durak_game.table import Table
+
+
+# CARDSETS
+
+
+def test_to_mask_to_cards():
+    """ Converting cards to a bitset and back """
+    cards = [Card(Card.SPADES, Card.ACE), Card(Card.HEARTS, Card.TWO)]
+    mask = cardset.to_mask(cards)
+
+    assert cardset.count(mask) == 2
+    assert cardset.to_cards(mask) == sorted(cards, key=lambda card: card.index)
+
+def test_symbols():
+    """ Symbol sets of bitsets """
+    mask = cardset.to_mask([Card(Card.HEARTS, Card.SEVEN),
+                            Card(Card.CLUBS, Card.SEVEN)])
+
+    assert cardset.is_single_symbol(mask)
+    assert cardset.with_symbols(cardset.get_symbols(mask)) == cardset.SYMBOL_MASKS[Card.SEVEN]
+
+    mask |= Card(Card.CLUBS, Card.EIGHT).bit
+    assert not cardset.is_single_symbol(mask)
+    assert not cardset.is_single_symbol(0)
+
+def test_lowest_card():
+    """ Lowest card of a suit """
+    mask = cardset.to_mask([Card(Card.CLUBS, Card.KING), Card(Card.CLUBS, Card.NINE),
+                            Card(Card.HEARTS, Card.TWO)])
+
+    assert cardset.lowest_card(mask & cardset.SUIT_MASKS[Card.CLUBS]) == Card(Card.CLUBS, Card.NINE)
+    assert cardset.lowest_card(mask & cardset.SUIT_MASKS[Card.SPADES]) is None
+
+def test_can_beat():
+    """ Higher cards of the same suit and trumps beat a card """
+    seven = Card(Card.HEARTS, Card.SEVEN)
+
+    assert cardset.can_beat(seven, Card(Card.HEARTS, Card.EIGHT), Card.CLUBS)
+    assert cardset.can_beat(seven, Card(Card.CLUBS, Card.TWO), Card.CLUBS)
+    assert not cardset.can_beat(seven, Card(Card.HEARTS, Card.SIX), Card.CLUBS)
+    assert not cardset.can_beat(seven, seven, Card.CLUBS)
+    assert not cardset.can_beat(seven, Card(Card.SPADES, Card.ACE), Card.CLUBS)
+    assert not cardset.can_beat(seven, Card(Card.HEARTS, Card.SIX), Card.HEARTS)
+
+def test_can_beat_every_pair():
+    """ The beat table agrees with the rules for every pair of cards """
+    for trump in Card.SUITS:
+        for bottom_card in Card.CARDS:
+            for top_card in Card.CARDS:
+                if top_card.suit == trump and bottom_card.suit != trump:
+                    expected = True
+                else:
+                    expected = (bottom_card.suit == top_card.suit
+                                and bottom_card.symbol < top_card.symbol)
+                assert cardset.can_beat(bottom_card, top_card, trump) == expected
+
+
+# PLAYER HANDS
+
+
+def test_player_cards():
+    """ The cards of a player are kept in the bitset """
+    p = Player("p1")
+    p.cards = [Card(Card.HEARTS, Card.SEVEN)]
+    p.add_cards([Card(Card.CLUBS, Card.EIGHT)])
+
+    assert p.get_card_count() == 2
+    assert p.has_cards([Card(Card.HEARTS, Card.SEVEN), Card(Card.CLUBS, Card.EIGHT)])
+
+    p.remove_cards([Card(Card.HEARTS, Card.SEVEN)])
+
+    assert p.cards == [Card(Card.CLUBS, Card.EIGHT)]
+    assert not p.has_card(Card(Card.HEARTS, Card.SEVEN))
+
+
+# TABLE
+
+
+def test_table_masks():
+    """ The bitsets of the table follow changes to the table """
+    table = Table({Card(Card.HEARTS, Card.SEVEN): None})
+    table.update({Card(Card.HEARTS, Card.EIGHT): Card(Card.HEARTS, Card.NINE)})
+
+    assert table.bottom_mask == cardset.to_mask([Card(Card.HEARTS, Card.SEVEN),
+                                                 Card(Card.HEARTS, Card.EIGHT)])
+    assert table.top_mask == Card(Card.HEARTS, Card.NINE).bit
+
+    table[Card(Card.HEARTS, Card.EIGHT)] = None
+    table[Card(Card.HEARTS, Card.SEVEN)] = Card(Card.HEARTS, Card.NINE)
+    del table[Card(Card.HEARTS, Card.EIGHT)]
+
+    assert table.bottom_mask == Card(Card.HEARTS, Card.SEVEN).bit
+    assert table.top_mask == Card(Card.HEARTS, Card.NINE).bit
+
+    table.clear()
+
+    assert table.get_mask() == 0
+
+def test_table_counts():
+    """ The counts of the table follow changes to the table """
+    table = Table({Card(Card.HEARTS, Card.SEVEN): None,
+                   Card(Card.HEARTS, Card.EIGHT): Card(Card.HEARTS, Card.NINE)})
+
+    assert table.get_card_count() == 3
+    assert table.get_open_count() == 1
+
+    table[Card(Card.HEARTS, Card.SEVEN)] = Card(Card.HEARTS, Card.TEN)
+
+    assert table.get_card_count() == 4
+    assert table.get_open_count() == 0
+
+    table.pop(Card(Card.HEARTS, Card.EIGHT))
+
+    assert table.get_card_count() == 2
+    assert table.get_open_count() == 0
+
+def test_table_reverse_index():
+    """ Bottom cards are found by their top card """
+    table = Table({Card(Card.HEARTS, Card.SEVEN): Card(Card.HEARTS, Card.NINE),
+                   Card(Card.HEARTS, Card.EIGHT): None})
+
+    assert table.get_bottom_card(Card(Card.HEARTS, Card.NINE)) == Card(Card.HEARTS, Card.SEVEN)
+
+    table[Card(Card.HEARTS, Card.SEVEN)] = None
+    table[Card(Card.HEARTS, Card.EIGHT)] = Card(Card.HEARTS, Card.NINE)
+
+    assert table.get_bottom_card(Card(Card.HEARTS, Card.NINE)) == Card(Card.HEARTS, Card.EIGHT)
+    assert not table.has_top_card(Card(Card.HEARTS, Card.SEVEN))
+    assert table.get_open_count() == 1
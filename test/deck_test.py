@@ -0,0 +1,43 @@
+from website.durak_game.card import Card
+from website.durak_game.deck import Deck
+
+
+def test_deck_lowest_card():
+    """ Only cards from the lowest card are in the deck """
+    deck = Deck(Card.SIX)
+
+    assert deck.get_card_count() == 36
+    assert all(card.symbol >= Card.SIX for card in deck.cards)
+
+def test_deck_template_cached():
+    """ Decks with the same lowest card share their template """
+    assert Deck.get_template(Card.FOUR) is Deck.get_template(Card.FOUR)
+    assert len(Deck.get_template(Card.TWO)) == 52
+
+def test_deck_shuffle_keeps_cards():
+    """ Shuffling does not change the cards in the deck """
+    deck = Deck(Card.TWO)
+    deck.shuffle()
+
+    assert sorted(deck.cards, key=lambda card: card.index) == list(Card.CARDS)
+
+def test_deck_deal():
+    """ Dealing takes cards from the top of the deck """
+    deck = Deck()
+    deck.cards = [Card(Card.HEARTS, Card.SEVEN), Card(Card.HEARTS, Card.EIGHT),
+                  Card(Card.HEARTS, Card.NINE)]
+
+    assert deck.deal(2) == [Card(Card.HEARTS, Card.NINE), Card(Card.HEARTS, Card.EIGHT)]
+    assert deck.deal(2) == [Card(Card.HEARTS, Card.SEVEN)]
+    assert deck.deal(2) == []
+    assert deck.is_empty()
+
+def test_deck_ends():
+    """ Cards are added at the bottom and inserted at the top """
+    deck = Deck()
+    deck.cards = [Card(Card.HEARTS, Card.SEVEN)]
+    deck.add_card(Card(Card.CLUBS, Card.ACE))
+    deck.insert_cards([Card(Card.SPADES, Card.TEN)])
+
+    assert list(deck.cards) == [Card(Card.CLUBS, Card.ACE), Card(Card.HEARTS, Card.SEVEN),
+                                Card(Card.SPADES, Card.TEN)]
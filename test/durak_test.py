@@ -261,3 +261,40 @@ def test_remove_player_from_game_current_player(game):
 
     # If p1 is removed, p2 can throw cards to p3
     assert game.current_player == p3
+
+
+# RANDOMNESS
+
+
+def test_same_seed_same_deal():
+    """ Games with the same seed are dealt the same cards """
+    games = []
+    for _ in range(2):
+        game = DurakGame(3865, "testgame", seed=42)
+        for username in ("p1", "p2", "p3"):
+            game.add_player(username)
+        game.start_game()
+        games.append(game)
+
+    g1, g2 = games
+    assert g1.seed == g2.seed == 42
+    assert list(g1.deck.cards) == list(g2.deck.cards)
+    assert g1.current_player == g2.current_player
+    for p1, p2 in zip(g1.players, g2.players):
+        assert p1.cards == p2.cards
+
+def test_random_seed():
+    """ Games without a seed get a random seed """
+    assert DurakGame(1, "g1").seed != DurakGame(2, "g2").seed
+
+def test_clone_before_first_draw():
+    """ A clone of a game that has not drawn yet deals the same cards """
+    game = DurakGame(3865, "testgame", seed=42)
+    for username in ("p1", "p2", "p3"):
+        game.add_player(username)
+    clone = game.clone()
+    game.start_game()
+    clone.start_game()
+
+    assert list(clone.deck.cards) == list(game.deck.cards)
+    assert clone.rng.getstate() == game.rng.getstate()
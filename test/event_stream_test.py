@@ -0,0 +1,124 @@
+from website.durak_game.event_stream import EventStream, get_snapshot
+from website.durak_game.player import Player
+
+from .fixtures import game
+
+
+# SEQUENCE NUMBERS
+
+
+def test_seq_increases():
+    stream = EventStream()
+    events = [{"event": "chat"} for _ in range(3)]
+    assert [stream.add("status", event) for event in events] == [1, 2, 3]
+    assert [event["seq"] for event in events] == [1, 2, 3]
+
+def test_ack_lagging_clients():
+    """ Clients too far behind or ahead of the stream need a snapshot """
+    stream = EventStream()
+    for _ in range(EventStream.MAX_LAG + 1):
+        stream.add("move", {})
+
+    assert not stream.ack("p1", EventStream.MAX_LAG + 1)
+    assert not stream.ack("p1", 1)
+    assert stream.ack("p1", 0)
+    assert stream.ack("p1", EventStream.MAX_LAG + 2)
+    assert stream.acks == {"p1": EventStream.MAX_LAG + 2}
+    stream.forget("p1")
+    assert stream.acks == {}
+
+
+# HISTORY
+
+
+def test_missed_changes_replayed():
+    """ Clients that reconnect get the changes after their number, with
+    their own private fields
+    """
+    stream = EventStream()
+    stream.add("move", {"event": "takecards"})
+    stream.add("status", {"event": "finishround"},
+               {"p1": {"cards": ["7H"]}, "p2": {"cards": []}})
+
+    assert stream.get_missed(2, "p1") == []
+    assert stream.get_missed(0, "p1") == [
+        ("move", {"event": "takecards", "seq": 1}),
+        ("status", {"event": "finishround", "seq": 2, "cards": ["7H"]})]
+    assert stream.get_missed(1, "spectator") == [
+        ("status", {"event": "finishround", "seq": 2})]
+
+def test_rolled_over_changes_not_replayed():
+    """ Changes no longer kept, or numbers ahead of the stream, need a
+    snapshot
+    """
+    stream = EventStream(history_size=2)
+    for _ in range(5):
+        stream.add("move", {})
+
+    assert len(stream.history) == 2
+    assert [event["seq"] for _, event in stream.get_missed(3, "p1")] == [4, 5]
+    assert stream.get_missed(2, "p1") is None
+    assert stream.get_missed(6, "p1") is None
+
+def test_no_history():
+    stream = EventStream(history_size=0)
+    stream.add("move", {})
+
+    assert stream.get_missed(1, "p1") == []
+    assert stream.get_missed(0, "p1") is None
+
+
+# HANDS
+
+
+def test_new_cards_of_round(game):
+    """ The end of a round only tells players the cards they got """
+    game.start_game()
+    stream = EventStream()
+    defender = game.current_player
+    attacker = game.prev_player(defender)
+    for player in game.players:
+        stream.set_hand(player)
+    card = attacker.cards[0]
+    game.throw_cards(attacker, [card])
+    stream.remove_cards(attacker, [card])
+    game.take_cards(defender)
+
+    assert stream.get_new_cards(defender) == [card]
+    new_cards = stream.get_new_cards(attacker)
+    assert len(new_cards) == 1
+    assert new_cards[0] in attacker.cards
+    assert stream.get_new_cards(attacker) == []
+
+def test_unknown_hands_sent_whole(game):
+    game.start_game()
+    stream = EventStream()
+    player = game.players[0]
+    stream.set_hand(player)
+    stream.clear_hands()
+
+    assert stream.get_new_cards(player) == player.cards
+
+
+# SNAPSHOTS
+
+
+def test_snapshot(game):
+    game.start_game()
+    defender = game.current_player
+    attacker = game.prev_player(defender)
+    card = attacker.cards[0]
+    game.throw_cards(attacker, [card])
+    snapshot = get_snapshot(game, attacker, 5)
+
+    assert snapshot["seq"] == 5
+    assert snapshot["currentplayer"] == defender.username
+    assert snapshot["table"] == [[str(card), None]]
+    assert snapshot["cards"] == [str(card) for card in attacker.cards]
+    assert snapshot["cardcounts"][attacker.username] == 5
+    assert snapshot["deckcount"] == game.deck.get_card_count()
+    assert snapshot["allowedbreak"] == []
+
+def test_spectator_snapshot_has_no_hand(game):
+    game.start_game()
+    assert "cards" not in get_snapshot(game, Player("spectator"), 0)
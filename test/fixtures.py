@@ -4,9 +4,20 @@ from website.durak_game.card import Card
 from website.durak_game.player import Player
 from website.durak_game.durak import DurakGame
 
+class Clock:
+    """ Clock advanced by hand """
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
 @pytest.fixture()
 def game():
     game = DurakGame(3865, "testgame")
+    game.check_consistency = True
     p1 = Player("p1")
     p2 = Player("p2")
     p3 = Player("p3")
@@ -0,0 +1,190 @@
+import sys
+from threading import Thread
+
+from website.durak_game.durak import DurakGame
+from website.durak_game.game_actor import GameActor
+from website.durak_game.timer_wheel import TimerWheel
+
+from .fixtures import Clock
+
+
+def get_actor(**kwargs) -> tuple:
+    """Actor whose workers only run when the returned list is run """
+    clock = Clock()
+    workers = []
+    actor = GameActor(DurakGame(1234, "game"), TimerWheel(0.1, clock),
+                      spawn=workers.append, **kwargs)
+    return actor, workers, clock
+
+def record(game, log, item):
+    log.append(item)
+
+
+# MAILBOX
+
+
+def test_jobs_run_in_order():
+    """ Jobs of many threads run one at a time, in the order of each
+    thread
+    """
+    actor = GameActor(DurakGame(1234, "game"), TimerWheel(0.1, Clock()))
+    log = []
+    holders = []
+
+    def job(game, thread, index):
+        holders.append(thread)
+        assert len(holders) == 1
+        log.append((thread, index))
+        holders.pop()
+
+    # Fewer jobs than MAX_DEPTH, none are refused
+    def submit(thread):
+        for index in range(30):
+            assert actor.submit(job, thread, index)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [Thread(target=submit, args=(thread,))
+                   for thread in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert len(log) == 8 * 30
+    for thread in range(8):
+        assert ([index for other, index in log if other == thread]
+                == list(range(30)))
+    assert actor.processed == 8 * 30
+    assert not actor.is_running
+
+def test_one_worker_per_mailbox():
+    """ Jobs submitted while a worker runs are left to that worker """
+    actor, workers, _ = get_actor()
+    log = []
+    actor.submit(record, log, "a")
+    actor.submit(record, log, "b")
+
+    assert len(workers) == 1
+    assert log == []
+    workers[0]()
+    assert log == ["a", "b"]
+    assert actor.get_depth() == 0
+
+    actor.submit(record, log, "c")
+    assert len(workers) == 2
+
+def test_events_sent_per_batch():
+    """ Events of a batch of jobs are sent together, after the jobs """
+    sent = []
+    actor, workers, _ = get_actor(sender=sent.append)
+
+    def job(game, index):
+        actor.send("move", {"index": index}, game.id)
+        assert sent == []
+
+    for index in range(GameActor.MAX_BATCH + 1):
+        actor.submit(job, index)
+    workers[0]()
+
+    assert [len(events) for events in sent] == [GameActor.MAX_BATCH, 1]
+    assert sent[1] == [("move", {"index": GameActor.MAX_BATCH}, 1234, None)]
+
+def test_failing_job_does_not_stop_worker(capsys):
+    actor, workers, _ = get_actor()
+    log = []
+
+    def fail(game):
+        raise ValueError("broken event")
+
+    actor.submit(fail)
+    actor.submit(record, log, "a")
+    workers[0]()
+
+    assert log == ["a"]
+    assert "broken event" in capsys.readouterr().err
+
+
+# BACKPRESSURE AND METRICS
+
+
+def test_full_mailbox_rejects_jobs():
+    """ Jobs beyond MAX_DEPTH are refused until the worker catches up """
+    actor, workers, _ = get_actor()
+    log = []
+    for index in range(GameActor.MAX_DEPTH):
+        assert actor.submit(record, log, index)
+
+    assert not actor.submit(record, log, "late")
+    assert actor.rejected == 1
+    assert actor.max_depth == GameActor.MAX_DEPTH
+    workers[0]()
+    assert log == list(range(GameActor.MAX_DEPTH))
+    assert actor.submit(record, log, "later")
+
+def test_closed_mailbox_rejects_jobs():
+    actor, workers, _ = get_actor()
+    log = []
+    actor.submit(record, log, "a")
+    actor.close()
+
+    assert not actor.submit(record, log, "b")
+    workers[0]()
+    assert log == ["a"]
+
+def test_latency_percentiles():
+    actor, workers, _ = get_actor()
+    assert actor.get_latency_percentiles() == []
+    for index in range(10):
+        actor.submit(record, [], index)
+    workers[0]()
+
+    percentiles = actor.get_latency_percentiles((50, 100))
+    assert len(percentiles) == 2
+    assert 0 <= percentiles[0] <= percentiles[1]
+
+
+# TIMERS
+
+
+def test_timers_run_through_mailbox():
+    """ Timers of a game wait for the jobs queued before them """
+    actor, workers, clock = get_actor()
+    log = []
+    actor.submit(record, log, "event")
+    actor.schedule(1.0, log.append, "timer")
+    clock.now += 1.0
+    actor.wheel.advance()
+
+    assert log == []
+    workers[0]()
+    assert log == ["event", "timer"]
+
+def test_timer_cancelled_while_queued():
+    """ A timer cancelled while waiting in the mailbox does not fire """
+    actor, workers, clock = get_actor()
+    fired = []
+    timer = actor.schedule(1.0, fired.append, "a")
+    clock.now += 1.0
+    actor.wheel.advance()
+
+    assert not actor.cancel(timer)
+    workers[0]()
+    assert fired == []
+
+def test_full_mailbox_keeps_timers():
+    """ Deadlines are not refused by a full mailbox """
+    actor, workers, clock = get_actor()
+    fired = []
+    for _ in range(GameActor.MAX_DEPTH):
+        actor.submit(record, [], None)
+    actor.schedule(1.0, fired.append, "a")
+    clock.now += 1.0
+    actor.wheel.advance()
+
+    workers[0]()
+    assert fired == ["a"]
+    assert actor.rejected == 0
@@ -0,0 +1,45 @@
+from random import Random
+
+import pytest
+
+from website.durak_game.game_ids import IdAllocator
+
+
+def test_ids_unique():
+    """ Every id of the range is handed out once before running out """
+    allocator = IdAllocator(1000, 10000, Random(0))
+    ids = [allocator.allocate() for _ in range(9000)]
+
+    assert sorted(ids) == list(range(1000, 10000))
+    assert ids != sorted(ids)
+    assert allocator.allocate() is None
+    assert allocator.get_occupancy() == 1.0
+
+def test_released_ids_reused_last():
+    """ Released ids come back after every fresh id, oldest first """
+    allocator = IdAllocator(0, 10, Random(1))
+    ids = [allocator.allocate() for _ in range(8)]
+    assert allocator.release(ids[3])
+    assert allocator.release(ids[1])
+    assert not allocator.release(ids[1])
+
+    fresh = {allocator.allocate(), allocator.allocate()}
+    assert fresh.isdisjoint(ids)
+    assert allocator.allocate() == ids[3]
+    assert allocator.allocate() == ids[1]
+    assert allocator.allocate() is None
+    assert len(allocator) == 10
+
+def test_large_range():
+    """ Large ranges are not stored """
+    allocator = IdAllocator(10 ** 6, 10 ** 7)
+    ids = {allocator.allocate() for _ in range(1000)}
+
+    assert len(ids) == 1000
+    assert all(id in allocator for id in ids)
+    assert 999 not in allocator
+    assert not allocator.free
+
+def test_empty_range():
+    with pytest.raises(ValueError):
+        IdAllocator(5, 5)
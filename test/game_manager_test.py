@@ -0,0 +1,279 @@
+import sys
+from random import Random
+from threading import Thread
+from time import perf_counter, sleep
+
+import pytest
+
+from website.durak_game import actions
+from website.durak_game.game_ids import IdAllocator
+from website.durak_game.game_manager import GameManager, get_game_size
+
+from .fixtures import Clock
+
+
+def get_manager() -> tuple:
+    clock = Clock()
+    return GameManager(clock=clock), clock
+
+
+# GARBAGE COLLECTION
+
+
+def test_idle_games_reclaimed():
+    """ Games are removed once their players have been idle long enough """
+    manager, clock = get_manager()
+    idle = manager.create_game("idle")
+    active = manager.create_game("active")
+
+    clock.now += GameManager.IDLE_TIME / 2
+    manager.get_game(active.id)
+    clock.now += GameManager.IDLE_TIME / 2
+    stats = manager.collect_garbage()
+
+    assert stats.games_reclaimed == 1
+    assert stats.bytes_freed > 0
+    assert stats.games_left == 1
+    assert manager.find_game(idle.id) is None
+    assert manager.find_game(active.id) is active
+
+    clock.now += GameManager.IDLE_TIME / 2
+    assert manager.collect_garbage().games_reclaimed == 1
+    assert manager.get_game_count() == 0
+    assert manager.games_reclaimed == 2
+    assert len(manager.sweeps) == 2
+
+def test_sweep_skips_removed_games():
+    """ Games removed before their expiry are not collected again """
+    manager, clock = get_manager()
+    game = manager.create_game("removed")
+    manager.remove_game(game.id)
+
+    clock.now += GameManager.IDLE_TIME
+    assert manager.collect_garbage().games_reclaimed == 0
+    assert not any(shard.expiry_heap for shard in manager.shards)
+
+def test_sweep_pops_expired_games_only():
+    """ A sweep leaves the games that have not expired in the heap """
+    manager, clock = get_manager()
+    for index in range(10):
+        manager.create_game(f"game{index}")
+        clock.now += 1
+
+    clock.now += GameManager.IDLE_TIME - 6
+    assert manager.collect_garbage().games_reclaimed == 5
+    assert sum(len(shard.expiry_heap) for shard in manager.shards) == 5
+
+def test_garbage_collector_on_timers():
+    """ The garbage collector sweeps at every interval """
+    manager, clock = get_manager()
+    manager.start_garbage_collector()
+    manager.create_game("idle")
+
+    for _ in range(3):
+        clock.now += GameManager.GARBAGE_COLLECTOR_INTERVAL
+        manager.timers.advance()
+    assert len(manager.sweeps) == 3
+    assert manager.get_game_count() == 1
+
+    clock.now += GameManager.IDLE_TIME
+    manager.timers.advance()
+    assert manager.get_game_count() == 0
+
+def test_game_size():
+    """ Started games hold more memory than lobbies """
+    manager, _ = get_manager()
+    game = manager.create_game("game")
+    for username in ("p1", "p2", "p3"):
+        game.add_player(username)
+    lobby_size = get_game_size(game)
+    game.start_game()
+
+    assert get_game_size(game) > lobby_size > 0
+
+
+# IDS
+
+
+def test_ids_not_reused_while_live():
+    """ Games never take the id of a live game """
+    manager, _ = get_manager()
+    games = [manager.create_game(f"game{index}") for index in range(200)]
+    ids = [game.id for game in games]
+
+    assert len(set(ids)) == len(ids)
+    assert all(GameManager.MIN_ID <= id < GameManager.MAX_ID for id in ids)
+    assert manager.get_id_occupancy() == pytest.approx(
+        200 / (GameManager.MAX_ID - GameManager.MIN_ID))
+
+    manager.remove_game(ids[0])
+    assert ids[0] not in manager.ids.used
+    assert manager.create_game("new").id not in ids[1:]
+
+def test_ids_run_out():
+    """ No game is created when every id is in use """
+    manager, _ = get_manager()
+    manager.ids = IdAllocator(1000, 1002)
+    manager.create_game("a")
+    manager.create_game("b")
+
+    assert manager.create_game("c") is None
+    assert manager.get_game_count() == 2
+
+def test_bot_game_ids():
+    """ Bot games do not use up the ids of games of players """
+    manager, _ = get_manager()
+    game = manager.create_game("bots", is_bot_game=True)
+
+    assert game.id >= GameManager.MIN_BOT_ID
+    assert manager.get_id_occupancy() == 0
+    manager.remove_game(game.id)
+    assert len(manager.bot_ids) == 0
+
+def test_collected_ids_released():
+    """ The garbage collector releases the ids of the games it removes """
+    manager, clock = get_manager()
+    game = manager.create_game("idle")
+    clock.now += GameManager.IDLE_TIME
+    manager.collect_garbage()
+
+    assert game.id not in manager.ids.used
+
+
+# CONCURRENCY
+
+
+def run_threads(target, count: int):
+    """Run a function in threads, raising the first exception """
+    errors = []
+
+    def run(index):
+        try:
+            target(index)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+def test_concurrent_actions():
+    """ Concurrent events of many games keep every game consistent """
+    manager, _ = get_manager()
+    game_ids = []
+    for index in range(32):
+        game = manager.create_game(f"game{index}", seed=index)
+        for seat in range(3):
+            game.add_player(f"p{seat}")
+        game.start_game()
+        game_ids.append(game.id)
+    journal_lengths = {id: len(manager.find_game(id).journal)
+                       for id in game_ids}
+    successes = {id: 0 for id in game_ids}
+    holders = {id: 0 for id in game_ids}
+
+    def play(index):
+        rng = Random(index)
+        for _ in range(300):
+            game_id = rng.choice(game_ids)
+            with manager.lock_game(game_id) as game:
+                holders[game_id] += 1
+                assert holders[game_id] == 1
+                if game.is_in_progress:
+                    player = rng.choice(game.players)
+                    legal_actions = game.legal_actions(player)
+                    if legal_actions and actions.apply_action(
+                            game, player, rng.choice(legal_actions)):
+                        successes[game_id] += 1
+                holders[game_id] -= 1
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        run_threads(play, 8)
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert sum(successes.values()) > 0
+    for game_id in game_ids:
+        game = manager.find_game(game_id)
+        assert game.is_consistent()
+        assert game.state_hash == game.compute_hash()
+        assert (len(game.journal)
+                == journal_lengths[game_id] + successes[game_id])
+
+def test_games_do_not_contend():
+    """ Events of different games do not wait for each other, events of
+    one game are serialized
+    """
+    manager, _ = get_manager()
+    game_ids = [manager.create_game(f"game{index}").id for index in range(8)]
+
+    def run_events(get_game_id) -> float:
+        def send(index):
+            for _ in range(10):
+                with manager.lock_game(get_game_id(index)):
+                    # Sending the events of the action
+                    sleep(0.002)
+        start = perf_counter()
+        run_threads(send, 8)
+        return perf_counter() - start
+
+    one_game = run_events(lambda index: game_ids[0])
+    many_games = run_events(lambda index: game_ids[index])
+    assert one_game >= 8 * 10 * 0.002
+    assert many_games < one_game / 3
+
+def test_removed_game_not_locked():
+    """ Events for a removed game fail """
+    manager, _ = get_manager()
+    game = manager.create_game("removed")
+    manager.remove_game(game.id)
+
+    with pytest.raises(KeyError):
+        with manager.lock_game(game.id):
+            pass
+
+def test_events_through_mailbox():
+    """ Submitted events run in order and send their socket events after
+    the batch
+    """
+    manager, clock = get_manager()
+    sent = []
+    manager.sender = sent.append
+    game = manager.create_game("game")
+    clock.now += 10
+
+    def event(game, name):
+        manager.send(game, "status", {"event": name}, game.id)
+
+    assert manager.submit(game.id, event, "a")
+    assert manager.submit(game.id, event, "b")
+    assert game.last_activity == clock.now
+    assert sent == [[("status", {"event": "a"}, game.id, None)],
+                    [("status", {"event": "b"}, game.id, None)]]
+    assert manager.get_pending_jobs() == 0
+
+def test_history_size():
+    """ Games keep the configured amount of changes """
+    manager = GameManager(history_size=3)
+    stream = manager.get_stream(manager.create_game("game"))
+    for _ in range(5):
+        stream.add("move", {})
+
+    assert stream.history.maxlen == 3
+    assert len(stream.history) == 3
+
+def test_removed_game_refuses_events():
+    manager, _ = get_manager()
+    game = manager.create_game("removed")
+    actor = manager.get_actor(game.id)
+    manager.remove_game(game.id)
+
+    with pytest.raises(KeyError):
+        manager.submit(game.id, print)
+    assert not actor.submit(print)
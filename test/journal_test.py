@@ -0,0 +1,139 @@
+from random import Random
+
+from website.durak_game import actions, journal
+from website.durak_game.durak import DurakGame, replay
+from website.durak_game.journal import Journal
+from website.durak_game.simulator import RandomPolicy, choose_action
+
+from .fixtures import game
+
+
+def play_game(seed: int, player_count: int = 3,
+              snapshot_interval: int = Journal.SNAPSHOT_INTERVAL) -> tuple:
+    """Play a random game, returning it and its state hash per entry count """
+    rng = Random(seed)
+    game = DurakGame(seed, "journal", seed=seed)
+    game.journal = Journal(seed, "journal", seed, snapshot_interval)
+    for seat in range(player_count):
+        game.add_player(f"p{seat}")
+    game.start_game()
+    hashes = {len(game.journal): game.state_hash}
+    policies = {player: RandomPolicy() for player in game.players}
+    while game.is_in_progress:
+        _, player, action = choose_action(game, policies, rng)
+        actions.apply_action(game, player, action)
+        hashes[len(game.journal)] = game.state_hash
+    return game, hashes
+
+
+def assert_same_state(game, other):
+    assert other.state_hash == game.state_hash
+    assert other.is_in_progress == game.is_in_progress
+    assert [p.username for p in other.players] \
+        == [p.username for p in game.players]
+    for player in game.players:
+        assert other.get_player(player.username).mask \
+            == player.mask
+    assert dict(other.table_cards) == dict(game.table_cards)
+    assert list(other.deck.cards) == list(game.deck.cards)
+    if game.current_player is not None:
+        assert other.current_player.username == game.current_player.username
+
+
+# JOURNAL
+
+
+def test_entries_recorded(game):
+    """ Successful actions are recorded, failed actions are not """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p2 = game.current_player
+    count = len(game.journal)
+
+    assert not game.throw_cards(p2, [p2.cards[0]])
+    assert len(game.journal) == count
+
+    card = p1.cards[0]
+    assert game.throw_cards(p1, [card])
+    assert game.journal.entries[-1] == (journal.THROW, p1.username, card.bit)
+
+def test_lobby_recorded(game):
+    """ Joining, starting and leaving are recorded """
+    codes = [entry[0] for entry in game.journal.entries]
+    assert codes == [journal.JOIN] * 4
+    game.start_game()
+    game.remove_player(game.players[0])
+    assert game.journal.entries[-2][0] == journal.START
+    assert game.journal.entries[-1][0] == journal.LEAVE
+
+def test_clone_has_no_journal(game):
+    """ Clones do not record their actions """
+    game.start_game()
+    assert game.clone().journal is None
+
+def test_snapshots_taken():
+    """ A snapshot is taken every interval """
+    game, _ = play_game(0)
+    interval = game.journal.snapshot_interval
+    counts = [count for count, _ in game.journal.snapshots]
+    assert counts == list(range(interval, len(game.journal) + 1, interval))
+    assert game.journal.get_snapshot(interval - 1) == (0, None)
+    assert game.journal.get_snapshot(interval + 1)[0] == interval
+
+def test_snapshots_thinned_out():
+    """ Long journals keep a bounded amount of evenly spaced snapshots """
+    game, hashes = play_game(4, snapshot_interval=2)
+    interval = game.journal.snapshot_interval
+    counts = [count for count, _ in game.journal.snapshots]
+
+    assert interval > 2
+    assert len(counts) <= Journal.MAX_SNAPSHOTS
+    assert counts == list(range(interval, len(game.journal) + 1, interval))
+    for upto in range(1, len(game.journal) + 1, 5):
+        if upto in hashes:
+            assert replay(game.journal, upto).state_hash == hashes[upto]
+
+
+# REPLAY
+
+
+def test_replay_full():
+    """ Replaying the whole journal gives the state of the game """
+    for seed in range(5):
+        game, _ = play_game(seed)
+        assert_same_state(game, replay(game.journal))
+
+def test_replay_upto():
+    """ Replaying part of the journal gives the state at that point """
+    game, hashes = play_game(1, player_count=4)
+    for upto in range(4, len(game.journal) + 1, 7):
+        if upto in hashes:
+            assert replay(game.journal, upto).state_hash == hashes[upto]
+
+def test_replay_from_snapshot():
+    """ Replays start from a snapshot and keep it unchanged """
+    game, hashes = play_game(2)
+    interval = game.journal.snapshot_interval
+    _, snapshot = game.journal.get_snapshot(interval)
+    snapshot_hash = snapshot.state_hash
+
+    replayed = replay(game.journal, interval + 1)
+    assert replayed.state_hash == hashes[interval + 1]
+    assert snapshot.state_hash == snapshot_hash
+    assert len(replayed.journal) == interval + 1
+
+def test_replay_without_snapshots():
+    """ Replays without snapshots start from a new game """
+    game, _ = play_game(3)
+    full = Journal(game.journal.game_id, game.journal.name,
+                   game.journal.seed, snapshot_interval=10 ** 6)
+    full.entries = game.journal.entries
+    assert_same_state(game, replay(full))
+
+def test_replay_cheats(game):
+    """ Cheats are replayed """
+    game.start_game()
+    player = game.players[0]
+    game.steal_trump_card(player, player.cards[0])
+    game.put_into_deck(player, player.cards[:2])
+    assert_same_state(game, replay(game.journal))
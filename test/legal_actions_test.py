@@ -0,0 +1,110 @@
+import copy
+from contextlib import redirect_stdout
+from io import StringIO
+from random import Random
+
+from website.durak_game import actions
+from website.durak_game.card import Card
+from website.durak_game.durak import DurakGame
+
+from .fixtures import game
+
+
+def test_legal_actions_first_throw(game):
+    """ Only the previous player can throw at the start of a round """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p2 = game.current_player
+    p3 = game.next_player(p2)
+
+    assert game.legal_actions(p1)
+    assert all(action[0] == actions.THROW for action in game.legal_actions(p1))
+    assert not game.legal_actions(p2)
+    assert not game.legal_actions(p3)
+
+def test_legal_actions_first_throw_same_symbol(game):
+    """ A first throw can contain any cards of one symbol """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p1.cards = [Card(Card.HEARTS, Card.SEVEN), Card(Card.SPADES, Card.SEVEN),
+                Card(Card.CLUBS, Card.NINE)]
+
+    throws = {action[1] for action in game.legal_actions(p1)}
+
+    assert throws == {(Card(Card.HEARTS, Card.SEVEN),),
+                      (Card(Card.SPADES, Card.SEVEN),),
+                      (Card(Card.HEARTS, Card.SEVEN), Card(Card.SPADES, Card.SEVEN)),
+                      (Card(Card.CLUBS, Card.NINE),)}
+
+def test_legal_actions_breaks(game):
+    """ The current player can break with higher cards of the suit and trumps """
+    game.start_game()
+    game.trump = Card.CLUBS
+    p1 = game.prev_player(game.current_player)
+    p2 = game.current_player
+    p1.cards = [Card(Card.HEARTS, Card.SEVEN)]
+    p2.cards = [Card(Card.HEARTS, Card.SIX), Card(Card.HEARTS, Card.EIGHT),
+                Card(Card.CLUBS, Card.TWO), Card(Card.SPADES, Card.ACE)]
+    game.throw_cards(p1, [Card(Card.HEARTS, Card.SEVEN)])
+
+    breaks = {action[2] for action in game.legal_actions(p2)
+              if action[0] == actions.BREAK}
+
+    assert breaks == {Card(Card.HEARTS, Card.EIGHT), Card(Card.CLUBS, Card.TWO)}
+    assert (actions.TAKE,) in game.legal_actions(p2)
+    assert (actions.BREAK_ALL,) not in game.legal_actions(p2)
+
+def test_legal_actions_pass_on(game):
+    """ The current player can pass on with cards of the symbol on the table """
+    game.start_game()
+    game.trump = Card.CLUBS
+    p1 = game.prev_player(game.current_player)
+    p2 = game.current_player
+    p1.cards = [Card(Card.HEARTS, Card.SEVEN)]
+    p2.cards = [Card(Card.SPADES, Card.SEVEN), Card(Card.CLUBS, Card.SEVEN),
+                Card(Card.HEARTS, Card.NINE)]
+    game.throw_cards(p1, [Card(Card.HEARTS, Card.SEVEN)])
+
+    legal_actions = game.legal_actions(p2)
+
+    assert (actions.PASS, (Card(Card.SPADES, Card.SEVEN),)) in legal_actions
+    assert (actions.PASS, (Card(Card.CLUBS, Card.SEVEN), Card(Card.SPADES, Card.SEVEN))) in legal_actions
+    assert (actions.PASS_TRUMP,) in legal_actions
+    assert not any(action[0] == actions.PASS and Card(Card.HEARTS, Card.NINE) in action[1]
+                   for action in legal_actions)
+
+def test_legal_actions_allow_break(game):
+    """ Neighbors can allow breaking once """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.throw_cards(p1, [p1.cards[0]])
+
+    assert (actions.ALLOW_BREAK,) in game.legal_actions(p1)
+    game.allow_break_cards(p1)
+    assert (actions.ALLOW_BREAK,) not in game.legal_actions(p1)
+
+def test_legal_actions_not_in_progress(game):
+    """ Nobody can act before the game has started """
+    assert all(not game.legal_actions(player) for player in game.lobby)
+
+def test_legal_actions_succeed():
+    """ Every legal action succeeds during random games """
+    for seed in range(3):
+        rng = Random(seed)
+        game = DurakGame(seed, "legal", seed=seed)
+        for seat in range(4):
+            game.add_player(f"p{seat}")
+        game.start_game()
+        for _ in range(100):
+            if not game.is_in_progress:
+                break
+            options = [(player, action) for player in game.players
+                       for action in game.legal_actions(player)]
+            for player, action in options:
+                copied = copy.deepcopy(game)
+                with redirect_stdout(StringIO()) as output:
+                    assert actions.apply_action(
+                        copied, copied.get_player(player.username), action)
+                assert not output.getvalue()
+            player, action = rng.choice(options)
+            actions.apply_action(game, player, action)
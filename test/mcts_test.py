@@ -0,0 +1,131 @@
+import pytest
+from random import Random
+
+from website.durak_game import actions
+from website.durak_game.mcts import MCTSPolicy, determinize
+from website.durak_game.transposition import TranspositionTable
+
+from .fixtures import game
+
+
+def test_clone_independent(game):
+    """ Changes to a clone do not change the game """
+    game.start_game()
+    clone = game.clone()
+    p1 = clone.prev_player(clone.current_player)
+    card = p1.cards[0]
+
+    assert clone.throw_cards(p1, [card])
+    assert clone.is_consistent()
+    assert game.is_consistent()
+    assert not game.table_cards
+    assert game.get_player(p1.username).has_card(card)
+    assert game.current_player is not clone.current_player
+    assert game.current_player == clone.current_player
+
+def test_clone_same_state(game):
+    """ A clone has the same state as the game """
+    game.start_game()
+    clone = game.clone()
+
+    assert [player.mask for player in clone.players] == [player.mask for player in game.players]
+    assert list(clone.deck.cards) == list(game.deck.cards)
+    assert clone.trump_card == game.trump_card
+    assert clone.rng.getstate() == game.rng.getstate()
+    for player in game.players:
+        assert clone.legal_actions(clone.get_player(player.username)) == game.legal_actions(player)
+
+def test_determinize(game):
+    """ Hidden cards are dealt again, visible cards stay """
+    game.start_game()
+    observer = game.players[0]
+    clone = determinize(game, observer, Random(1))
+
+    assert clone.get_player(observer.username).mask == observer.mask
+    assert clone.deck.cards[0] == game.deck.cards[0]
+    assert clone.deck.get_card_count() == game.deck.get_card_count()
+    for player in game.players:
+        assert clone.get_player(player.username).get_card_count() == player.get_card_count()
+    all_cards = sorted(card.index for player in game.players for card in player.cards)
+    all_cards += sorted(card.index for card in game.deck.cards)
+    clone_cards = sorted(card.index for player in clone.players for card in player.cards)
+    clone_cards += sorted(card.index for card in clone.deck.cards)
+    assert sorted(all_cards) == sorted(clone_cards)
+    assert [p.mask for p in clone.players] != [p.mask for p in game.players]
+
+def test_mcts_chooses_legal_action(game):
+    """ The bot performs a legal action or waits """
+    game.start_game()
+    player = game.prev_player(game.current_player)
+    legal_actions = game.legal_actions(player)
+    policy = MCTSPolicy(iterations=20)
+
+    action = policy.choose_action(game, player, legal_actions, Random(0))
+
+    assert action is None or action in legal_actions
+    assert policy.last_iterations == 20
+    assert game.is_consistent()
+
+def test_mcts_first_throw(game):
+    """ Only the previous player can act at the start of a round """
+    game.start_game()
+    player = game.prev_player(game.current_player)
+    policy = MCTSPolicy(iterations=20)
+
+    action = policy.choose_action(game, player, game.legal_actions(player), Random(0))
+
+    assert action[0] == actions.THROW
+
+def test_mcts_time_limit(game):
+    """ The search stops when its time is up """
+    game.start_game()
+    player = game.prev_player(game.current_player)
+    policy = MCTSPolicy(iterations=10 ** 6, time_limit=0.05)
+
+    policy.search(game, player, Random(0))
+
+    assert 0 < policy.last_iterations < 10 ** 6
+
+def test_mcts_deterministic(game):
+    """ The same random generator gives the same decision """
+    game.start_game()
+    player = game.prev_player(game.current_player)
+    policy = MCTSPolicy(iterations=20)
+    legal_actions = game.legal_actions(player)
+
+    assert (policy.choose_action(game, player, legal_actions, Random(3))
+            == policy.choose_action(game, player, legal_actions, Random(3)))
+
+def test_mcts_transpositions(game):
+    """ Playout results are stored by state hash and reused """
+    game.start_game()
+    player = game.prev_player(game.current_player)
+    legal_actions = game.legal_actions(player)
+    table = TranspositionTable(1024)
+    policy = MCTSPolicy(iterations=20, transpositions=table)
+
+    action = policy.choose_action(game, player, legal_actions, Random(0))
+    policy.choose_action(game, player, legal_actions, Random(0))
+
+    assert action is None or action in legal_actions
+    assert table.stores > 0
+    assert table.hits > 0
+
+def test_mcts_transpositions_mean(game):
+    """ The mean of several playouts of a state is reused """
+    game.start_game()
+    table = TranspositionTable(1024)
+    policy = MCTSPolicy(transpositions=table, transposition_visits=3)
+    rng = Random(0)
+
+    results = [policy.evaluate(game.clone(), rng) for _ in range(3)]
+    copy = game.clone()
+    mean = policy.evaluate(copy, rng)
+
+    # The state was not played out again
+    assert copy.state_hash == game.state_hash
+    for username, reward in mean.items():
+        assert reward == pytest.approx(
+            sum(result[username] for result in results) / 3)
+    visits, _ = table.get(game.state_hash)
+    assert visits == 3
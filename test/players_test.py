@@ -0,0 +1,104 @@
+import pytest
+
+from website.durak_game.card import Card
+from website.durak_game.player import Player
+from website.durak_game.durak import DurakGame
+
+from .fixtures import game
+
+
+def test_get_player(game):
+    """ Players are found by username """
+    game.add_player("p5")
+
+    assert game.get_player("p5") is game.lobby[-1]
+    assert game.get_player("unknown") is None
+
+def test_add_player_twice(game):
+    """ A player is only added once """
+    initial_lobby_count = game.get_lobby_count()
+    game.add_player("p5")
+    game.add_player("p5")
+
+    assert game.get_lobby_count() == initial_lobby_count + 1
+
+def test_roles(game):
+    """ Roles follow the state of the game """
+    game.add_player("p5")
+    assert game.get_role("p5") == DurakGame.LOBBY
+
+    game.start_game()
+    assert game.get_role("p5") == DurakGame.PLAYING
+
+    game.add_player("p6")
+    assert game.get_role("p6") == DurakGame.SPECTATING
+
+    game.remove_player(game.get_player("p6"))
+    assert game.get_role("p6") is None
+    assert game.get_player("p6") is None
+
+def test_roles_finished_players(game):
+    """ Finished players spectate until the game is finished """
+    game.start_game()
+    p1 = game.current_player
+    p2 = game.prev_player(p1)
+    p3 = game.next_player(p1)
+    p4 = game.next_player(p3)
+
+    game.deck.cards = []
+    p2.cards = []
+    game.finish_round(has_broken=True)
+
+    assert game.get_role(p2.username) == DurakGame.SPECTATING
+    assert game.get_role(p1.username) == DurakGame.PLAYING
+
+    p1.cards = []
+    p3.cards = []
+    p4.cards = [Card(Card.HEARTS, Card.SEVEN)]
+    game.finish_round(has_broken=True)
+
+    for player in (p1, p2, p3, p4):
+        assert game.get_role(player.username) == DurakGame.LOBBY
+
+def test_inconsistent_index(game):
+    """ The consistency check detects players missing from the index """
+    assert game.is_consistent()
+
+    game.lobby.append(Player("p5"))
+
+    assert not game.is_consistent()
+
+def test_current_player_leaves(game):
+    """ The round passes to a seated player when the current player leaves """
+    game.start_game()
+    leaving = game.current_player
+    game.remove_player(leaving)
+
+    assert game.current_player in game.players
+    assert leaving not in game.players
+    assert game.state_hash == game.compute_hash()
+
+def test_last_opponent_leaves():
+    """ The game is finished when a single player is left """
+    game = DurakGame(3865, "testgame")
+    game.check_consistency = True
+    game.add_player("p1")
+    game.add_player("p2")
+    game.start_game()
+    remaining = game.next_player(game.current_player)
+    game.remove_player(game.current_player)
+
+    assert not game.is_in_progress
+    assert game.durak is remaining
+    assert game.get_role(remaining.username) == DurakGame.LOBBY
+    assert game.state_hash == game.compute_hash()
+
+def test_start_too_many_players():
+    """ Games with more players than seats are not started """
+    game = DurakGame(3865, "testgame")
+    for index in range(DurakGame.MAX_PLAYERS + 1):
+        game.add_player(f"p{index}")
+
+    with pytest.raises(ValueError):
+        game.start_game()
+    assert not game.is_in_progress
@@ -0,0 +1,212 @@
+from random import Random
+from time import time
+
+from website.durak_game import actions
+from website.durak_game.cheat import Cheat
+from website.durak_game.durak import DurakGame, replay
+from website.durak_game.simulator import RandomPolicy, choose_action
+
+from .fixtures import game
+
+
+def get_state(game) -> tuple:
+    """Get everything a revert restores """
+    return (game.state_hash,
+            {player.username: player.mask for player in game.players},
+            dict(game.table_cards),
+            list(game.deck.cards),
+            game.trump_card,
+            game.current_player.username,
+            game.throwing_started,
+            game.next_allows_break,
+            game.prev_allows_break,
+            dict(game.cheating))
+
+
+# REVERTING CHEATS
+
+
+def test_revert_put_into_deck(game):
+    """ Reverting restores the state before the cheat """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p2 = game.current_player
+    state = get_state(game)
+
+    game.put_into_deck(p1, p1.cards[:2])
+    game.throw_cards(p1, [p1.cards[0]])
+    game.allow_break_cards(p1)
+    assert game.rollback
+
+    assert game.revert_cheat(p1)
+    assert get_state(game) == state
+    assert not game.rollback
+    assert p1 not in game.cheating
+    assert not game.revert_cheat(p1)
+
+def test_revert_steal_trump_card(game):
+    """ Stealing the trump card is reverted """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    state = get_state(game)
+
+    old_trump_card = game.trump_card
+    game.steal_trump_card(p1, p1.cards[0])
+    assert p1.has_card(old_trump_card)
+    assert game.revert_cheat(p1)
+    assert get_state(game) == state
+
+def test_revert_later_cheats(game):
+    """ Cheats after the reverted cheat are reverted too """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p3 = game.next_player(game.current_player)
+    state = get_state(game)
+
+    game.put_into_deck(p1, [p1.cards[0]])
+    middle = get_state(game)
+    game.put_into_deck(p3, [p3.cards[0]])
+
+    assert game.revert_cheat(p1)
+    assert get_state(game) == state
+    assert not game.revert_cheat(p3)
+
+    game.put_into_deck(p1, [p1.cards[0]])
+    game.put_into_deck(p3, [p3.cards[0]])
+    assert game.revert_cheat(p3)
+    assert get_state(game)[:-1] == middle[:-1]
+
+def test_revert_random_actions():
+    """ Any actions after a cheat are undone """
+    for seed in range(20):
+        rng = Random(seed)
+        game = DurakGame(seed, "rollback", seed=seed)
+        game.check_consistency = True
+        for seat in range(4):
+            game.add_player(f"p{seat}")
+        game.start_game()
+        policies = {player: RandomPolicy() for player in game.players}
+        for _ in range(rng.randrange(10)):
+            _, player, action = choose_action(game, policies, rng)
+            actions.apply_action(game, player, action)
+        if not game.is_in_progress:
+            continue
+        cheater = rng.choice(game.players)
+        if not cheater.cards:
+            continue
+        state = get_state(game)
+        game.put_into_deck(cheater, [rng.choice(cheater.cards)])
+        for _ in range(rng.randrange(10)):
+            _, player, action = choose_action(game, policies, rng)
+            if action[0] in (actions.TAKE, actions.BREAK_ALL):
+                break
+            actions.apply_action(game, player, action)
+        assert game.revert_cheat(cheater)
+        assert get_state(game) == state
+
+def test_revert_replayed(game):
+    """ Reverts are journaled """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.put_into_deck(p1, p1.cards[:2])
+    game.throw_cards(p1, [p1.cards[0]])
+    game.revert_cheat(p1)
+
+    assert get_state(replay(game.journal))[:-1] == get_state(game)[:-1]
+
+
+# EXPIRING DIFFS
+
+
+def test_no_diffs_without_cheats(game):
+    """ Nothing is logged while no cheat can be reverted """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.throw_cards(p1, [p1.cards[0]])
+    assert len(game.rollback) == 0
+
+def test_cheat_expires(game):
+    """ Cheats cannot be reverted after their window """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.put_into_deck(p1, [p1.cards[0]])
+    assert not game.revert_cheat(p1, now=time() + Cheat.DURATION + 1)
+
+def test_diffs_dropped(game):
+    """ Diffs of expired cheats are dropped when logging """
+    now = [time()]
+    game.rollback.clock = lambda: now[0]
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p3 = game.next_player(game.current_player)
+    game.put_into_deck(p1, [p1.cards[0]])
+    game.throw_cards(p1, [p1.cards[0]])
+    logged = len(game.rollback)
+
+    now[0] += Cheat.DURATION / 2
+    game.put_into_deck(p3, [p3.cards[0]])
+    game.cheating[p3].finish_time = now[0] + Cheat.DURATION
+    assert len(game.rollback) > logged
+
+    now[0] += Cheat.DURATION / 2 + 1
+    game.allow_break_cards(p1)
+    assert len(game.rollback) < logged
+    assert not game.revert_cheat(p1)
+    assert game.revert_cheat(p3)
+    assert len(game.rollback) == 0
+
+def test_round_clears_diffs(game):
+    """ Finishing a round resets all cheats """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.put_into_deck(p1, [p1.cards[0]])
+    game.throw_cards(p1, [p1.cards[0]])
+    game.take_cards(game.current_player)
+
+    assert len(game.rollback) == 0
+    assert not game.revert_cheat(p1)
+
+def test_log_allocated_for_cheats(game):
+    """ Games only hold the deques of the log while cheats can be reverted """
+    game.start_game()
+    assert game.rollback.diffs == game.rollback.cheats == ()
+
+    p1 = game.prev_player(game.current_player)
+    game.put_into_deck(p1, [p1.cards[0]])
+    assert game.rollback.cheats
+
+    game.throw_cards(p1, [p1.cards[0]])
+    game.take_cards(game.current_player)
+    assert game.rollback.diffs == game.rollback.cheats == ()
+
+
+# ILLEGAL CHEATS
+
+
+def test_steal_trump_card_empty_deck(game):
+    """ The trump card cannot be stolen after it was dealt """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.deck.cards.clear()
+    state = get_state(game)
+    entry_count = len(game.journal)
+
+    assert not game.steal_trump_card(p1, p1.cards[0])
+    assert get_state(game) == state
+    assert len(game.journal) == entry_count
+
+def test_cheat_with_foreign_cards(game):
+    """ Players can only cheat with their own cards """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p3 = game.next_player(game.current_player)
+    state = get_state(game)
+    entry_count = len(game.journal)
+
+    assert not game.steal_trump_card(p1, p3.cards[0])
+    assert not game.put_into_deck(p1, [p1.cards[0], p3.cards[0]])
+    assert not game.put_into_deck(p1, [p1.cards[0], p1.cards[0]])
+    assert not game.put_into_deck(p1, [])
+    assert get_state(game) == state
+    assert len(game.journal) == entry_count
+    assert not game.rollback.cheats
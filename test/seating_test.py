@@ -0,0 +1,55 @@
+from website.durak_game.player import Player
+from website.durak_game.seating import SeatRing
+
+from .fixtures import game
+
+
+def test_seat_ring_neighbors():
+    """ Neighbors wrap around the ring """
+    p1, p2, p3 = Player("p1"), Player("p2"), Player("p3")
+    seats = SeatRing([p1, p2, p3])
+
+    assert seats.next(p1) == p2
+    assert seats.next(p3) == p1
+    assert seats.prev(p1) == p3
+    assert seats.get_seat(p3) == 2
+
+def test_seat_ring_remove():
+    """ Removing a player links its neighbors """
+    p1, p2, p3 = Player("p1"), Player("p2"), Player("p3")
+    seats = SeatRing([p1, p2, p3])
+
+    seats.remove(p2)
+
+    assert p2 not in seats
+    assert seats.next(p1) == p3
+    assert seats.prev(p3) == p1
+    assert seats.next(p2) is None
+    # Seat indices are kept
+    assert seats.get_seat(p3) == 2
+
+def test_seat_ring_remove_last():
+    """ Removing the last players empties the ring """
+    p1, p2 = Player("p1"), Player("p2")
+    seats = SeatRing([p1, p2])
+
+    seats.remove(p1)
+    assert seats.next(p2) == p2
+
+    seats.remove(p2)
+    assert len(seats) == 0
+
+def test_game_seats_follow_players(game):
+    """ The seating of the game follows the list of players """
+    game.start_game()
+    p1 = game.current_player
+    p2 = game.next_player(p1)
+    p3 = game.next_player(p2)
+
+    game.remove_player(p2)
+
+    assert game.next_player(p1) == p3
+    assert game.prev_player(p3) == p1
+    for player in game.players:
+        idx = game.players.index(player)
+        assert game.next_player(player) == game.players[(idx + 1) % len(game.players)]
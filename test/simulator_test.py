@@ -0,0 +1,26 @@
+from website.durak_game import actions
+from website.durak_game.simulator import GreedyPolicy, RandomPolicy, Simulator
+from website.durak_game.durak import DurakGame
+
+from .fixtures import game
+
+
+def test_simulation_finishes():
+    """ Bots play complete games """
+    simulator = Simulator([GreedyPolicy(), RandomPolicy(), GreedyPolicy()])
+    report = simulator.run(10)
+
+    assert report.get_game_count() == 10
+    assert all(result.finished for result in report.results)
+    assert report.action_count == sum(result.action_count
+                                      for result in report.results)
+    assert report.get_percentiles(actions.THROW)
+
+def test_simulation_deterministic():
+    """ Games with the same seed are played identically """
+    simulator = Simulator([RandomPolicy()] * 4, record_traces=True)
+    first = simulator.run(3, seed=7)
+    second = simulator.run(3, seed=7)
+
+    assert first.results == second.results
+    assert first.traces == second.traces
@@ -0,0 +1,203 @@
+from random import Random
+
+from website.durak_game import actions
+from website.durak_game.game_manager import GameManager
+from website.durak_game.timer_wheel import TimerWheel
+
+from .fixtures import Clock, game
+
+
+# TIMER WHEEL
+
+
+def test_timer_fires():
+    """ Timers fire at their deadline, not before """
+    clock = Clock()
+    wheel = TimerWheel(0.1, clock)
+    fired = []
+    wheel.schedule(1.0, fired.append, "a")
+
+    assert wheel.advance(clock.now + 0.95) == 0
+    assert wheel.advance(clock.now + 1.0) == 1
+    assert fired == ["a"]
+    assert len(wheel) == 0
+
+def test_timer_cancel():
+    """ Cancelled timers do not fire """
+    clock = Clock()
+    wheel = TimerWheel(0.1, clock)
+    fired = []
+    timer = wheel.schedule(1.0, fired.append, "a")
+
+    assert wheel.cancel(timer)
+    assert not wheel.cancel(timer)
+    assert not timer.is_pending()
+    wheel.advance(clock.now + 2)
+    assert fired == []
+
+def test_timers_in_order():
+    """ Timers on every level fire in order of their deadline """
+    clock = Clock()
+    wheel = TimerWheel(1.0, clock)
+    rng = Random(0)
+    delays = [rng.randrange(1, 200000) for _ in range(2000)]
+    delays += [1, 255, 256, 257, 65535, 65536, 65537, 2 ** 32 + 5]
+    fired = []
+    for delay in delays:
+        wheel.schedule(delay, lambda delay=delay: fired.append(
+            (delay, wheel.current_tick)))
+    cancelled = [wheel.schedule(delay, fired.append, None)
+                 for delay in delays[:100]]
+    for timer in cancelled:
+        wheel.cancel(timer)
+
+    now = clock.now
+    for step in (300, 70000, 300000, 2 ** 32 + 10):
+        wheel.advance(now + step)
+    assert sorted(delay for delay, _ in fired) == sorted(delays)
+    assert [delay for delay, _ in fired] == sorted(delays)
+    start = round(wheel.get_position(now))
+    for delay, tick in fired:
+        # Fired in the tick of the deadline
+        assert tick - 1 == start + delay
+
+def test_callbacks_schedule():
+    """ Callbacks can schedule new timers """
+    clock = Clock()
+    wheel = TimerWheel(0.1, clock)
+    fired = []
+
+    def repeat(count):
+        fired.append(count)
+        if count:
+            wheel.schedule_at(clock.now, repeat, count - 1)
+
+    wheel.schedule(0.5, repeat, 3)
+    clock.now += 0.5
+    wheel.advance()
+    assert fired == [3, 2, 1, 0]
+
+
+# DEADLINES OF GAMES
+
+
+def get_timed_game(game, turn_time: float = 10):
+    clock = Clock()
+    game.timers = TimerWheel(0.1, clock)
+    game.turn_time = turn_time
+    return game, clock
+
+def wait(game, clock, seconds: float):
+    clock.now += seconds
+    game.timers.advance()
+
+def test_cheat_window_expires(game):
+    """ The diffs of a cheat are dropped when its window has passed """
+    game, clock = get_timed_game(game)
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.put_into_deck(p1, [p1.cards[0]])
+    finish_time = game.cheating[p1].finish_time
+    assert len(game.rollback)
+
+    wait(game, clock, finish_time - clock.now - 0.1)
+    assert len(game.rollback)
+    wait(game, clock, 0.1)
+    assert len(game.rollback) == 0
+    assert game.cheat_timer is None
+    assert len(game.timers) == 0
+
+def test_defender_timeout(game):
+    """ A defender not breaking in time takes the cards """
+    game, clock = get_timed_game(game)
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p2 = game.current_player
+    listened = []
+    game.turn_listener = lambda *args: listened.append(args[1:])
+
+    game.throw_cards(p1, [p1.cards[0]])
+    assert game.turn_timer.is_pending()
+    wait(game, clock, 9.9)
+    assert game.throwing_started
+    wait(game, clock, 0.1)
+
+    assert listened == [(p2, (actions.TAKE,))]
+    assert not game.throwing_started
+    assert p2.get_card_count() == 7
+
+def test_attackers_timeout(game):
+    """ Idle attackers allow breaking, then the defender breaks """
+    game, clock = get_timed_game(game)
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p2 = game.current_player
+    p3 = game.next_player(p2)
+    listened = []
+    game.turn_listener = lambda *args: listened.append(args[1:])
+
+    bottom_card = p1.cards[0]
+    game.throw_cards(p1, [bottom_card])
+    for top_card in p2.cards:
+        if game.break_card(p2, bottom_card, top_card):
+            break
+    else:
+        return
+    wait(game, clock, 10)
+    assert listened == [(p1, (actions.ALLOW_BREAK,)),
+                        (p3, (actions.ALLOW_BREAK,))]
+    wait(game, clock, 10)
+    assert listened[2:] == [(p2, (actions.BREAK_ALL,))]
+    assert not game.throwing_started
+
+def test_actions_restart_deadline(game):
+    """ Every action starts a new deadline """
+    game, clock = get_timed_game(game)
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.throw_cards(p1, [p1.cards[0]])
+    first = game.turn_timer
+    game.allow_break_cards(p1)
+
+    assert not first.is_pending()
+    assert game.turn_timer.is_pending()
+    assert len(game.timers) == 1
+
+def test_revert_cancels_cheat_timer(game):
+    """ Reverting the only cheat cancels its expiry """
+    game, clock = get_timed_game(game, turn_time=None)
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.put_into_deck(p1, [p1.cards[0]])
+    assert game.cheat_timer.is_pending()
+
+    assert game.revert_cheat(p1)
+    assert game.cheat_timer is None
+    assert len(game.timers) == 0
+
+def test_no_deadline_without_turn_time(game):
+    game.timers = TimerWheel(0.1)
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    game.throw_cards(p1, [p1.cards[0]])
+    assert game.turn_timer is None
+    assert len(game.timers) == 0
+
+def test_manager_games_use_timers():
+    """ Games of the manager share its wheel and turn time """
+    manager = GameManager(turn_time=30)
+    game = manager.create_game("timed")
+    listened = []
+    manager.turn_listener = lambda *args: listened.append(args)
+    for username in ("a", "b"):
+        game.add_player(username)
+    game.start_game()
+    attacker = game.prev_player(game.current_player)
+    game.throw_cards(attacker, [attacker.cards[0]])
+
+    assert game.timers.wheel is manager.timers
+    assert len(manager.timers) == 1
+    manager.timers.advance(manager.timers.clock() + 31)
+    assert listened[0][0] is game
+    manager.remove_game(game.id)
+    assert len(manager.timers) == 0
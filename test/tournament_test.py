@@ -0,0 +1,44 @@
+from website.durak_game.tournament import Tournament, get_lineup
+
+
+def test_lineup_rotates():
+    """ Every policy plays every seat """
+    names = ["greedy", "random", "random"]
+
+    assert get_lineup(names, 0) == names
+    assert get_lineup(names, 1) == ["random", "random", "greedy"]
+    assert get_lineup(names, 3) == names
+
+def test_tournament(tmp_path):
+    """ A tournament plays every game once """
+    tournament = Tournament(["greedy", "random"], processes=1, shard_size=4)
+    stats = tournament.run(10, str(tmp_path / "results.csv"))
+
+    assert stats.game_count == 10
+    assert sum(stats.games.values()) == 2 * (10 - stats.unfinished_count)
+
+def test_tournament_resume(tmp_path):
+    """ An interrupted tournament continues where it stopped """
+    path = str(tmp_path / "results.csv")
+    full = Tournament(["greedy", "random"], processes=1).run(12, str(tmp_path / "full.csv"))
+
+    tournament = Tournament(["greedy", "random"], processes=1, shard_size=5)
+    tournament.run(7, path)
+    # Simulate a write that was interrupted halfway a line
+    with open(path, "a") as result_file:
+        result_file.write("7,1,")
+    stats = tournament.run(12, path)
+
+    assert stats.game_count == 12
+    assert stats.wins == full.wins
+    assert stats.seat_losses == full.seat_losses
+    with open(path) as result_file:
+        assert len(result_file.readlines()) == 13
+
+def test_tournament_pool(tmp_path):
+    """ Games played by worker processes give the same results """
+    single = Tournament(["greedy", "random"], processes=1).run(8, str(tmp_path / "a.csv"))
+    pool = Tournament(["greedy", "random"], processes=2, shard_size=3).run(8, str(tmp_path / "b.csv"))
+
+    assert pool.wins == single.wins
+    assert pool.action_count == single.action_count
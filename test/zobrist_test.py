@@ -0,0 +1,130 @@
+from random import Random
+
+import pytest
+
+from website.durak_game import actions
+from website.durak_game.card import Card
+from website.durak_game.durak import DurakGame
+from website.durak_game.simulator import RandomPolicy, choose_action
+from website.durak_game.transposition import TranspositionTable
+
+from .fixtures import game
+
+
+# ZOBRIST HASHING
+
+
+def test_hash_not_in_progress(game):
+    """ Games that are not in progress have hash 0 """
+    assert game.state_hash == 0
+
+def test_hash_updated_incrementally():
+    """ The incremental hash equals the hash computed from scratch """
+    for seed in range(5):
+        rng = Random(seed)
+        game = DurakGame(seed, "zobrist", seed=seed)
+        for seat in range(3):
+            game.add_player(f"p{seat}")
+        game.start_game()
+        policies = {player: RandomPolicy() for player in game.players}
+        while game.is_in_progress:
+            assert game.state_hash == game.compute_hash()
+            _, player, action = choose_action(game, policies, rng)
+            actions.apply_action(game, player, action)
+        assert game.state_hash == 0
+
+def test_hash_same_state(game):
+    """ Reaching the same state in another order gives the same hash """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p3 = game.next_player(game.current_player)
+    game.throw_cards(p1, [p1.cards[0]])
+    clone = game.clone()
+
+    game.allow_break_cards(p1)
+    game.allow_break_cards(p3)
+    clone.allow_break_cards(clone.get_player(p3.username))
+    clone.allow_break_cards(clone.get_player(p1.username))
+
+    assert game.state_hash == clone.state_hash
+
+def test_hash_changes(game):
+    """ Different states have different hashes """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    start_hash = game.state_hash
+    game.throw_cards(p1, [p1.cards[0]])
+
+    assert game.state_hash != start_hash
+    assert game.state_hash == game.compute_hash()
+
+def test_hash_rehash(game):
+    """ Direct changes need a rehash """
+    game.start_game()
+    p1 = game.prev_player(game.current_player)
+    p1.cards = [Card(Card.HEARTS, Card.ACE)]
+
+    assert game.state_hash != game.compute_hash()
+    game.rehash()
+    assert game.state_hash == game.compute_hash()
+
+
+# TRANSPOSITION TABLE
+
+
+def test_table_store_get():
+    """ Stored values are found by their key """
+    table = TranspositionTable(8)
+    table.store(12345, "a")
+
+    assert table.get(12345) == "a"
+    assert 12345 in table
+    assert table.get(54321) is None
+    assert table.hits == 1
+    assert table.misses == 1
+
+def test_table_overwrite():
+    """ Storing a key again replaces its value """
+    table = TranspositionTable(8)
+    table.store(7, "a")
+    table.store(7, "b")
+
+    assert table.get(7) == "b"
+    assert len(table) == 1
+    assert table.stores == 1
+
+def test_table_bounded():
+    """ The table never holds more entries than its capacity """
+    table = TranspositionTable(16)
+    for key in range(1000):
+        table.store(key, key)
+
+    assert len(table) == 16
+    assert table.stores == 1000
+    assert table.replacements == 1000 - 16
+
+def test_table_replacement_prefers_weight():
+    """ A heavy entry survives a flood of light entries in its bucket """
+    table = TranspositionTable(2)
+    table.store(1, "heavy", weight=100)
+    for key in range(2, 50):
+        table.store(key, key, weight=1)
+
+    assert table.get(1) == "heavy"
+    assert table.get(49) == 49
+    assert table.get(48) is None
+
+def test_table_heavier_entry_takes_preferred():
+    """ A heavier entry keeps the old preferred entry as second entry """
+    table = TranspositionTable(2)
+    table.store(1, "a", weight=1)
+    table.store(2, "b", weight=5)
+    table.store(3, "c", weight=10)
+
+    assert table.get(3) == "c"
+    assert table.get(2) == "b"
+    assert table.get(1) is None
+
+def test_table_capacity():
+    with pytest.raises(ValueError):
+        TranspositionTable(1)
@@ -36,4 +36,7 @@ def create_app(config_class=Config):
     app.register_blueprint(main)
     app.register_blueprint(errors)
 
+    gameManager.history_size = app.config["EVENT_HISTORY"]
+    gameManager.start(socketio)
+
     return app
@@ -14,4 +14,6 @@ class Config:
     MAIL_USERNAME = os.environ.get('EMAIL_USER')
     MAIL_PASSWORD = os.environ.get('EMAIL_PASS')
     CHAT_OPTIONS = ["Haha", "Nice", "Good luck", "Good game", 
-                    "&#128518;", "&#128521;", "&#128544;", "&#128550;", "&#128557;"]
\ No newline at end of file
+                    "&#128518;", "&#128521;", "&#128544;", "&#128550;", "&#128557;"]
+    # Changes of every game kept for players that reconnect
+    EVENT_HISTORY = int(os.environ.get('EVENT_HISTORY', 32))
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""Compact representation of the actions a player can perform
+
+An action is a tuple starting with its kind, followed by its cards:
+    (THROW, cards)              cards: tuple[Card]
+    (BREAK, bottom_card, top_card)
+    (PASS, cards)               cards: tuple[Card]
+    (PASS_TRUMP,)
+    (TAKE,)
+    (ALLOW_BREAK,)
+    (BREAK_ALL,)
+
+The kinds are the names of the matching socket events.
+"""
+from __future__ import annotations
+
+THROW = "throwcards"
+BREAK = "breakcard"
+PASS = "passcards"
+PASS_TRUMP = "passtrump"
+TAKE = "takecards"
+ALLOW_BREAK = "allowbreak"
+BREAK_ALL = "breakcards"
+
+KINDS = (THROW, BREAK, PASS, PASS_TRUMP, TAKE, ALLOW_BREAK, BREAK_ALL)
+
+
+def apply_action(game: DurakGame, player: Player, action: tuple) -> bool:
+    """Perform an action in the game
+
+    Args:
+        game: DurakGame
+            The game to perform the action in
+        player: Player
+            The player performing the action
+        action: tuple
+            The action to perform
+
+    Returns: bool
+        True if the action has happened succesfully
+    """
+    kind = action[0]
+    if kind == THROW:
+        return game.throw_cards(player, list(action[1]))
+    if kind == BREAK:
+        return game.break_card(player, action[1], action[2])
+    if kind == PASS:
+        return game.pass_on(player, list(action[1]))
+    if kind == PASS_TRUMP:
+        return game.pass_on_using_trump(player)
+    if kind == TAKE:
+        return game.take_cards(player)
+    if kind == ALLOW_BREAK:
+        return game.allow_break_cards(player)
+    if kind == BREAK_ALL:
+        return game.break_cards(player)
+    raise ValueError(f"Unknown action: {kind}")
+
+
+def to_event(action: tuple) -> tuple[str, dict]:
+    """Get the socket event a client sends to perform the action
+
+    Example: (THROW, (Card(Card.HEARTS, Card.SEVEN),))
+             -> ("throwcards", {"cards": ["7H"]})
+
+    Returns: tuple[str, dict]
+        The name of the event and its data
+    """
+    kind = action[0]
+    if kind in (THROW, PASS):
+        return kind, {"cards": [str(card) for card in action[1]]}
+    if kind == BREAK:
+        return kind, {"bottomcard": str(action[1]),
+                      "topcard": str(action[2])}
+    return kind, {}
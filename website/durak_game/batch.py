@@ -0,0 +1,386 @@
+"""Batches of thousands of deals as NumPy arrays
+
+Deals the start of many games at once for deal fairness and balance
+studies. Every deal is identical to the deal of DurakGame.start_game with
+the same seed and players: the Mersenne Twister of the random module is
+reproduced with array operations over the whole batch, including its
+seeding and the rejection sampling of random.shuffle.
+
+Cards are represented by their index (Card.index), hands by their bitset
+(see cardset) and suits by their index in Card.SUITS.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from . import cardset
+from .card import Card
+from .deck import Deck
+from .durak import DurakGame
+
+_SUIT_SIZE = len(Card.SYMBOLS)
+
+# Games are shuffled in chunks, so the generator states fit in the cache
+CHUNK_SIZE = 16384
+
+# Mersenne Twister (MT19937) parameters, as used by the random module
+# Words are uint32, so arithmetic wraps like in the C implementation
+_N = 624
+_M = 397
+_MATRIX_A = np.uint32(0x9908b0df)
+_UPPER = np.uint32(0x80000000)
+_LOWER = np.uint32(0x7fffffff)
+
+# Amount of outputs computed at once
+_BLOCK = 16
+
+# Lowest set bit of every symbol bitset of one suit, _SUIT_SIZE if empty
+_LOWEST_SYMBOL = np.full(1 << _SUIT_SIZE, _SUIT_SIZE, dtype=np.int8)
+for _symbols in range(1, 1 << _SUIT_SIZE):
+    _LOWEST_SYMBOL[_symbols] = (_symbols & -_symbols).bit_length() - 1
+del _symbols
+
+# cardset.BEAT_MASKS as a bool array: _BEATS[trump, bottom card, top card]
+_BEATS = np.array([[[mask >> top & 1 for top in range(Card.CARD_COUNT)]
+                    for mask in cardset.BEAT_MASKS[trump]]
+                   for trump in Card.SUITS], dtype=bool)
+
+
+def _init_genrand(seed: int) -> np.ndarray:
+    """State after init_genrand of MT19937 with the given seed """
+    state = [seed]
+    for i in range(1, _N):
+        prev = state[i - 1]
+        state.append((1812433253 * (prev ^ (prev >> 30)) + i) & 0xffffffff)
+    return np.array(state, dtype=np.uint32)
+
+
+_GENRAND_19650218 = _init_genrand(19650218)
+
+
+def _seed_states(keys: np.ndarray) -> np.ndarray:
+    """Seed a batch of generators like random.Random(seed)
+
+    Vectorized init_by_array of MT19937.
+
+    Args:
+        keys: np.ndarray
+            Shape (key length, batch size), the 32-bit words of every seed,
+            least significant word first
+
+    Returns: np.ndarray
+        Shape (_N, batch size), the state of every generator
+    """
+    key_length, size = keys.shape
+    # Rows are filled from _GENRAND_19650218 when they are first mixed,
+    # instead of copying the whole initial state into every column
+    state = np.empty((_N, size), dtype=np.uint32)
+    state[0] = _GENRAND_19650218[0]
+    # Key words plus their position, as added by every step
+    additions = keys + np.arange(key_length, dtype=np.uint32)[:, None]
+    shift = np.uint32(30)
+    mixed = np.empty(size, dtype=np.uint32)
+    i, j = 1, 0
+    for step in range(max(_N, key_length)):
+        prev = state[i - 1]
+        word = state[i]
+        np.right_shift(prev, shift, out=mixed)
+        mixed ^= prev
+        mixed *= np.uint32(1664525)
+        if step < _N - 1:
+            np.bitwise_xor(mixed, _GENRAND_19650218[i], out=word)
+        else:
+            word ^= mixed
+        word += additions[j]
+        i += 1
+        j += 1
+        if i >= _N:
+            state[0] = state[_N - 1]
+            i = 1
+        if j >= key_length:
+            j = 0
+    for _ in range(_N - 1):
+        prev = state[i - 1]
+        word = state[i]
+        np.right_shift(prev, shift, out=mixed)
+        mixed ^= prev
+        mixed *= np.uint32(1566083941)
+        word ^= mixed
+        word -= np.uint32(i)
+        i += 1
+        if i >= _N:
+            state[0] = state[_N - 1]
+            i = 1
+    state[0] = _UPPER
+    return state
+
+
+def _mix(upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+    y = upper & _UPPER
+    y |= lower & _LOWER
+    odd = y & np.uint32(1)
+    odd *= _MATRIX_A
+    y >>= np.uint32(1)
+    y ^= odd
+    return y
+
+
+def _twist_head(state: np.ndarray, start: int = 0,
+                stop: int = _N - _M) -> np.ndarray:
+    """Get words start to stop of the next state of a batch
+
+    Only words before _N - _M, which depend on the current state only.
+    """
+    words = _mix(state[start:stop], state[start + 1:stop + 1])
+    words ^= state[_M + start:_M + stop]
+    return words
+
+
+def _twist(state: np.ndarray) -> np.ndarray:
+    """Get the next state of a batch of generators """
+    new = np.empty_like(state)
+    split = _N - _M
+    new[:split] = _twist_head(state)
+    # Later words depend on words that were already updated
+    new[split:2 * split] = new[:split] ^ _mix(state[split:2 * split],
+                                              state[split + 1:2 * split + 1])
+    new[2 * split:_N - 1] = new[split:_M - 1] ^ _mix(state[2 * split:_N - 1],
+                                                     state[2 * split + 1:])
+    new[_N - 1] = new[_M - 1] ^ _mix(state[_N - 1], new[0])
+    return new
+
+
+def _temper(words: np.ndarray) -> np.ndarray:
+    """Get the outputs of words of a batch of states """
+    y = words >> np.uint32(11)
+    y ^= words
+    shifted = y << np.uint32(7)
+    shifted &= np.uint32(0x9d2c5680)
+    y ^= shifted
+    np.left_shift(y, np.uint32(15), out=shifted)
+    shifted &= np.uint32(0xefc60000)
+    y ^= shifted
+    np.right_shift(y, np.uint32(18), out=shifted)
+    y ^= shifted
+    return y
+
+
+class _RandomStreams:
+    """32-bit outputs of a batch of generators seeded like random.Random
+
+    A shuffle only needs a few dozen outputs, so the next state is computed
+    in blocks of _BLOCK words until a complete twist is needed.
+
+    Outputs are looked up by flat index into the outputs array of shape
+    (outputs, batch size): output p of generator c is at p * size + c.
+    One-dimensional lookups are much faster than (row, column) lookups.
+    """
+
+    def __init__(self, seeds: np.ndarray):
+        size = len(seeds)
+        self.state = np.empty((_N, size), dtype=np.uint32)
+        # Seeds are grouped by the amount of 32-bit words they consist of
+        low = (seeds & np.uint64(0xffffffff)).astype(np.uint32)
+        high = (seeds >> np.uint64(32)).astype(np.uint32)
+        is_long = high != 0
+        if not is_long.any():
+            self.state = _seed_states(low[None, :])
+        else:
+            for key_length, selection in ((1, ~is_long), (2, is_long)):
+                keys = np.stack([low[selection],
+                                 high[selection]])[:key_length]
+                self.state[:, selection] = _seed_states(keys)
+        self.size = size
+        # Shape (outputs, batch size), the first available rows are computed
+        self.outputs = np.empty((_N - _M, size), dtype=np.uint32)
+        self.available = 0
+        # Flat index of the next output of every generator
+        self.indices = np.arange(size)
+        self.columns = np.arange(size)
+
+    def _extend(self):
+        """Compute the next outputs of every generator """
+        available = self.available
+        if available < _N - _M:
+            stop = min(available + _BLOCK, _N - _M)
+            self.outputs[available:stop] = _temper(
+                _twist_head(self.state, available, stop))
+            self.available = stop
+            return
+        if available == _N - _M:
+            self.state = _twist(self.state)
+            words = self.state[_N - _M:]
+        else:
+            self.state = _twist(self.state)
+            words = self.state
+        self.outputs = np.concatenate([self.outputs, _temper(words)])
+        self.available = len(self.outputs)
+
+    def _get_outputs(self, indices: np.ndarray) -> np.ndarray:
+        """Get the outputs at flat indices, computing them if needed """
+        while len(indices) and indices.max() >= self.available * self.size:
+            self._extend()
+        return self.outputs.reshape(-1)[indices]
+
+    def randbelow(self, n: int) -> np.ndarray:
+        """random.Random._randbelow(n) of every generator """
+        shift = np.uint32(32 - n.bit_length())
+        indices = self.indices
+        # Every generator draws once, only the rejected ones draw again
+        result = self._get_outputs(indices) >> shift
+        indices += self.size
+        rejected = np.flatnonzero(result >= n)
+        while len(rejected):
+            rejected_indices = indices[rejected]
+            result[rejected] = self._get_outputs(rejected_indices) >> shift
+            indices[rejected] = rejected_indices + self.size
+            rejected = rejected[result[rejected] >= n]
+        return result
+
+
+def _shuffle(template: np.ndarray, seeds: np.ndarray) -> np.ndarray:
+    """random.Random(seed).shuffle(template) for every seed
+
+    Returns: np.ndarray
+        Shape (seeds, template size), the shuffled template per seed
+    """
+    # Shape (template size, seeds): rows are contiguous
+    size = len(seeds)
+    order = np.repeat(template.astype(np.int8)[:, None], size, axis=1)
+    # Swapped cards are looked up by flat index, like random outputs
+    flat_order = order.reshape(-1)
+    streams = _RandomStreams(seeds)
+    columns = streams.columns
+    for i in range(len(template) - 1, 0, -1):
+        j = streams.randbelow(i + 1).astype(np.int64)
+        j *= size
+        j += columns
+        swapped = flat_order[j]
+        flat_order[j] = order[i]
+        order[i] = swapped
+    return order.T.astype(np.int64)
+
+
+def get_lowest_cards(player_counts: np.ndarray) -> np.ndarray:
+    """Vectorized DurakGame.get_lowest_card for many player counts """
+    player_counts = np.asarray(player_counts)
+    return np.where(player_counts < 6, Card.EIGHT - player_counts, Card.TWO)
+
+
+class BatchDeal:
+    """Class representing the start of many games with the same players
+
+    Attributes:
+        seeds: np.ndarray
+            Shape (games,), the seed of every game
+        player_count: int
+        cards_per_player: int
+        lowest_card: int
+        hands: np.ndarray
+            Shape (games, player_count), bitset of the hand of every seat
+        trump_cards: np.ndarray
+            Shape (games,), index of the trump card
+        trumps: np.ndarray
+            Shape (games,), index of the trump suit in Card.SUITS
+        current_seats: np.ndarray
+            Shape (games,), seat of the current (receiving) player
+        decks: np.ndarray
+            Shape (games, cards left), index of every card in the deck,
+            bottom card (the trump card) first
+    """
+
+    def __init__(self, seeds: list[int], player_count: int,
+                 cards_per_player: int = 6):
+        """Deal the start of every game
+
+        Equivalent to DurakGame(id, name, seed).start_game(cards_per_player)
+        after adding player_count players, for every seed.
+
+        Args:
+            seeds: list[int]
+                The seed of every game, in range(DurakGame.MAX_SEED)
+            player_count: int
+                The amount of players in every game
+            cards_per_player: int, optional
+                Initial amount of cards per player, defaults to 6
+        """
+        self.seeds = np.asarray(seeds, dtype=np.uint64)
+        self.player_count = player_count
+        self.cards_per_player = cards_per_player
+        self.lowest_card = int(get_lowest_cards(player_count))
+
+        size = len(self.seeds)
+        template = np.array([card.index for card in
+                             Deck.get_template(self.lowest_card)],
+                            dtype=np.int64)
+        deck_size = len(template)
+        order = np.concatenate([_shuffle(template, self.seeds[start:start
+                                                              + CHUNK_SIZE])
+                                for start in range(0, size, CHUNK_SIZE)]
+                               or [np.empty((0, deck_size), np.int64)])
+
+        # Cards are dealt from the top of the deck, the end of the order
+        dealt = player_count * cards_per_player
+        bits = np.uint64(1) << order.astype(np.uint64)
+        hands = bits[:, deck_size - dealt:][:, ::-1]
+        self.hands = np.bitwise_or.reduce(
+            hands.reshape(size, player_count, cards_per_player), axis=2)
+        self.trump_cards = order[:, deck_size - dealt - 1]
+        self.trumps = self.trump_cards // _SUIT_SIZE
+        self.decks = np.concatenate([self.trump_cards[:, None],
+                                     order[:, :deck_size - dealt - 1]],
+                                    axis=1)
+
+        # The player with the lowest trump starts, the next player receives
+        shifts = (self.trumps * _SUIT_SIZE).astype(np.uint64)[:, None]
+        trump_symbols = ((self.hands >> shifts)
+                         & np.uint64((1 << _SUIT_SIZE) - 1)).astype(np.int64)
+        lowest_trumps = _LOWEST_SYMBOL[trump_symbols]
+        starting_seats = np.argmin(lowest_trumps, axis=1)
+        self.current_seats = (starting_seats + 1) % player_count
+
+    def get_game_count(self) -> int:
+        return len(self.seeds)
+
+    def is_legal_break_cards(self, bottom_cards: np.ndarray,
+                             top_cards: np.ndarray) -> np.ndarray:
+        """Vectorized DurakGame.is_legal_break_cards for every game
+
+        Args:
+            bottom_cards: np.ndarray
+                Shape (games, pairs), index of every bottom card,
+                -1 for unused pairs
+            top_cards: np.ndarray
+                Shape (games, pairs), index of every top card,
+                -1 if the bottom card has no top card
+
+        Returns: np.ndarray
+            Shape (games,), bool
+        """
+        return is_legal_break_cards(bottom_cards, top_cards, self.trumps)
+
+
+def is_legal_break_cards(bottom_cards: np.ndarray, top_cards: np.ndarray,
+                         trumps: np.ndarray) -> np.ndarray:
+    """Test whether every bottom card is broken correctly, per game
+
+    See BatchDeal.is_legal_break_cards, trumps has shape (games,).
+    """
+    bottom_cards = np.asarray(bottom_cards)
+    top_cards = np.asarray(top_cards)
+    trumps = np.asarray(trumps)[:, None]
+    # Padding indices of -1 are looked up too, but masked out
+    beats = _BEATS[trumps, bottom_cards, top_cards]
+    is_broken = (top_cards >= 0) & beats
+    return np.all(is_broken | (bottom_cards < 0), axis=1)
+
+
+def deal_game(seed: int, player_count: int,
+              cards_per_player: int = 6) -> DurakGame:
+    """Deal one game with DurakGame, for comparison with a batch """
+    game = DurakGame(seed, "batch", seed=seed)
+    game.journal = None
+    for seat in range(player_count):
+        game.add_player(f"player{seat}")
+    game.start_game(cards_per_player)
+    return game
@@ -0,0 +1,91 @@
+"""Socket packets of a room, encoded once
+
+Changes of a game go to every player and spectator in its room, and the
+end of a round goes to every player with the cards it got. Emitting such
+an event per recipient encodes the whole event per recipient. Instead,
+the data of every event of a batch is encoded to JSON once, the packet of
+the recipients without private fields is built once and sent to all of
+them, and only the private fields of a recipient are encoded for it,
+spliced into the shared JSON.
+
+Packets are Socket.IO EVENT packets of the default namespace,
+2["name",data], sent as engine.io messages. Several events for a room go
+in one packet 2["batch",[{"name":name,"data":data},...]].
+"""
+from __future__ import annotations
+from json import dumps
+
+
+def encode(data) -> str:
+    return dumps(data, separators=(",", ":"))
+
+
+def splice(shared: str, private: str) -> str:
+    """Add the fields of an encoded object to another encoded object
+
+    The objects must not have fields in common.
+    """
+    if shared == "{}":
+        return private
+    if private == "{}":
+        return shared
+    return shared[:-1] + "," + private[1:]
+
+
+class RoomPackets:
+    """Class containing the packets of a batch of events for a room
+
+    Attributes:
+        names: list[str]
+            The encoded names of the events
+        shared: list[str]
+            The encoded data of the events
+        privates: list[dict(object, dict)]
+            Per event, Key: sid of a recipient, Value: fields added to the
+            data of the event for that recipient only
+        encoded_bytes: int
+            The amount of bytes encoded so far
+    """
+
+    __slots__ = ("names", "shared", "privates", "encoded_bytes",
+                 "_shared_packet")
+
+    def __init__(self, events: list):
+        """Encode the shared data of events
+
+        Args:
+            events: list[tuple[str, dict, dict]]
+                (name, data, private fields per sid or None) of every
+                event, in order
+        """
+        self.names = [encode(name) for name, _, _ in events]
+        self.shared = [encode(data) for _, data, _ in events]
+        self.privates = [private or {} for _, _, private in events]
+        self.encoded_bytes = (sum(map(len, self.names))
+                              + sum(map(len, self.shared)))
+        self._shared_packet = None
+
+    def get_packet(self, sid) -> str:
+        """Get the packet of a recipient
+
+        Recipients without private fields share one packet.
+        """
+        if not any(sid in private for private in self.privates):
+            if self._shared_packet is None:
+                self._shared_packet = self._build(self.shared)
+            return self._shared_packet
+
+        data = list(self.shared)
+        for index, private in enumerate(self.privates):
+            if sid in private:
+                fields = encode(private[sid])
+                self.encoded_bytes += len(fields)
+                data[index] = splice(data[index], fields)
+        return self._build(data)
+
+    def _build(self, data: list) -> str:
+        if len(data) == 1:
+            return f'2[{self.names[0]},{data[0]}]'
+        items = ",".join(f'{{"name":{name},"data":{event}}}'
+                         for name, event in zip(self.names, data))
+        return f'2["batch",[{items}]]'
@@ -8,7 +8,16 @@ class Card:
                 The suit of the card
             symbol: int
                 The symbol of the card
+            index: int
+                The unique index of the card in range(Card.CARD_COUNT)
+            bit: int
+                1 << index, the card as a single card bitset
+
+        Cards are interned and must not be modified, there is exactly one
+        instance of every card. Cards are equal if they are the same object.
     """
+    __slots__ = ("suit", "symbol", "index", "bit")
+
     # Constants representing suits
     HEARTS = "H"
     CLUBS = "C"
@@ -35,9 +44,18 @@ class Card:
     SYMBOLS = [TWO, THREE, FOUR, FIVE, SIX, SEVEN, EIGHT,
                NINE, TEN, JACK, QUEEN, KING, ACE]
 
+    # Number of distinct cards, every card has an index in range(CARD_COUNT)
+    CARD_COUNT = len(SUITS) * len(SYMBOLS)
+
+    # Interned cards, filled in after the class body
+    # CARDS[index] is the only instance of the card with that index
+    CARDS = ()
+    _INTERNED = {}
+    _FROM_STR = {}
+
     @classmethod
-    def from_str(cls, card_str: str) -> self:
-        """Initialize a card from a string
+    def from_str(cls, card_str: str) -> Card:
+        """Get a card from a string
 
         Examples: 
             Card.from_str("7H") == Card(Card.HEARTS, Card.SEVEN)
@@ -48,24 +66,79 @@ class Card:
                 String representation of the card
 
         Returns: Card
+            The interned card
+
+        Raises: ValueError
+            If the string does not represent a card
         """
+        card = cls._FROM_STR.get(card_str)
+        if card is not None:
+            return card
         card_str = card_str.upper().replace("CARD", "")
-        suit = card_str[-1]
-        symbol = int(card_str[:-1])
-        return cls(suit, symbol)
+        card = cls._FROM_STR.get(card_str)
+        if card is None:
+            raise ValueError(f"Invalid card: {card_str}")
+        return card
 
-    def __init__(self, suit: str, symbol: int):
-        """Initialize a card
+    @classmethod
+    def from_index(cls, index: int) -> Card:
+        """Get the card with the given index
+
+        Args:
+            index: int
+                Index of the card, in range(Card.CARD_COUNT)
+
+        Returns: Card
+        """
+        return cls.CARDS[index]
+
+    @staticmethod
+    def get_index(suit: str, symbol: int) -> int:
+        """Get the index of the card with given suit and symbol
+
+        Cards of the same suit have consecutive indices,
+        ordered by symbol.
+
+        Example: Card.get_index(Card.CLUBS, Card.TWO) -> 13
+
+        Returns: int
+        """
+        return (Card.SUITS.index(suit) * len(Card.SYMBOLS)
+                + Card.SYMBOLS.index(symbol))
+
+    def __new__(cls, suit: str, symbol: int):
+        """Get the card with given suit and symbol
+
+        Cards are interned: every call with the same suit and symbol
+        returns the same instance.
 
         Args:
             suit: str
                 The suit of the card
             symbol: int
                 The symbol of the card
+
+        Raises: ValueError
+            If suit or symbol is invalid
         """
-        self.suit = suit
-        self.symbol = symbol
-    
+        try:
+            return cls._INTERNED[(suit, symbol)]
+        except KeyError:
+            pass
+        if suit not in cls.SUITS or symbol not in cls.SYMBOLS:
+            raise ValueError(f"Invalid card: {symbol}{suit}")
+        card = object.__new__(cls)
+        card.suit = suit
+        card.symbol = symbol
+        card.index = Card.get_index(suit, symbol)
+        card.bit = 1 << card.index
+        cls._INTERNED[(suit, symbol)] = card
+        return card
+
+    def __reduce__(self):
+        # Unpickling and copying give back the interned card
+        return (Card.from_index, (self.index,))
+
     def __repr__(self) -> str:
         return "Card {0} of {1}".format(
                     self.symbol, self.suit)
@@ -80,12 +153,10 @@ class Card:
     def __eq__(self, other: Card) -> bool:
         """Test for equality
 
-        True if suit and symbol are equal
+        True if suit and symbol are equal,
+        which means both are the same interned card
         """
-        if isinstance(other, Card):
-            return (self.symbol == other.symbol and
-                    self.suit == other.suit)
-        return False
+        return self is other
 
     def __lt__(self, other: Card) -> bool:
         """Test for less than
@@ -116,7 +187,7 @@ class Card:
         return self.symbol >= other.symbol
 
     def __hash__(self):
-        return hash(self.suit) + hash(self.symbol)
+        return self.index
     
     def get_suit(self):
         return self.suit
@@ -129,4 +200,13 @@ class Card:
 
         Example: Card(Card.HEARTS, Card.SEVEN) -> '7H.png'
         """
-        return "{0}{1}.png".format(self.symbol, self.suit)
\ No newline at end of file
+        return "{0}{1}.png".format(self.symbol, self.suit)
+
+
+Card.CARDS = tuple(Card(suit, symbol) for suit in Card.SUITS
+                   for symbol in Card.SYMBOLS)
+for _card in Card.CARDS:
+    # Strings as sent by the client are found without normalizing
+    for _prefix in ("", "card", "Card", "CARD"):
+        Card._FROM_STR[_prefix + str(_card)] = _card
+del _card, _prefix
@@ -0,0 +1,127 @@
+"""Bitset representation of sets of cards
+
+A set of cards is an int in which bit i is set if the card with index i
+is in the set. Cards of the same suit have consecutive indices, so every
+suit occupies its own block of len(Card.SYMBOLS) bits.
+"""
+from __future__ import annotations
+from itertools import combinations
+
+from .card import Card
+
+SUIT_SIZE = len(Card.SYMBOLS)
+
+# Mask of all cards of a suit / symbol
+SUIT_MASKS = {suit: sum(Card(suit, symbol).bit for symbol in Card.SYMBOLS)
+              for suit in Card.SUITS}
+SYMBOL_MASKS = {symbol: sum(Card(suit, symbol).bit for suit in Card.SUITS)
+                for symbol in Card.SYMBOLS}
+
+# Mask of all bits in one suit block
+_SUIT_BLOCK = (1 << SUIT_SIZE) - 1
+
+
+def _get_beat_masks(trump: str) -> tuple[int]:
+    """Get the bitset of the cards beating every card, by card index """
+    masks = []
+    for card in Card.CARDS:
+        higher = SUIT_MASKS[card.suit] & ~((card.bit << 1) - 1)
+        if card.suit != trump:
+            higher |= SUIT_MASKS[trump]
+        masks.append(higher)
+    return tuple(masks)
+
+
+# Beat matrix (trump suit x bottom card x top card), rows packed as bitsets:
+# bit i of BEAT_MASKS[trump][bottom_card.index] is set if the card with
+# index i can break the bottom card
+BEAT_MASKS = {trump: _get_beat_masks(trump) for trump in Card.SUITS}
+
+
+def to_mask(cards: list[Card]) -> int:
+    """Get the bitset of the given cards """
+    mask = 0
+    for card in cards:
+        mask |= card.bit
+    return mask
+
+
+def to_cards(mask: int) -> list[Card]:
+    """Get the cards in the bitset, ordered by index """
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(Card.CARDS[low.bit_length() - 1])
+        mask ^= low
+    return cards
+
+
+def count(mask: int) -> int:
+    """Get the amount of cards in the bitset """
+    return bin(mask).count("1")
+
+
+def get_symbols(mask: int) -> int:
+    """Get the symbols present in the bitset
+
+    Returns: int
+        Bitset of len(Card.SYMBOLS) bits, bit i is set if a card
+        with symbol Card.SYMBOLS[i] is in the given bitset
+    """
+    symbols = 0
+    while mask:
+        symbols |= mask & _SUIT_BLOCK
+        mask >>= SUIT_SIZE
+    return symbols
+
+
+def with_symbols(symbols: int) -> int:
+    """Get the bitset of every card having one of the given symbols
+
+    Args:
+        symbols: int
+            Bitset of symbols as returned by get_symbols
+    """
+    mask = 0
+    for _ in Card.SUITS:
+        mask = (mask << SUIT_SIZE) | symbols
+    return mask
+
+
+def get_subsets(mask: int, max_count: int) -> list[tuple[Card]]:
+    """Get every non-empty subset of the bitset with at most max_count cards
+
+    Returns: list[tuple[Card]]
+        Smaller subsets first, cards ordered by index
+    """
+    cards = to_cards(mask)
+    return [subset for size in range(1, min(len(cards), max_count) + 1)
+            for subset in combinations(cards, size)]
+
+
+def is_single_symbol(mask: int) -> bool:
+    """Test whether the bitset is not empty and all cards have the same symbol """
+    symbols = get_symbols(mask)
+    return symbols != 0 and symbols & (symbols - 1) == 0
+
+
+def can_beat(bottom_card: Card, top_card: Card, trump: str) -> bool:
+    """Test whether the top card can break the bottom card
+
+    A card is broken by a higher card of the same suit or by any trump
+    if it is not a trump itself.
+    """
+    return BEAT_MASKS[trump][bottom_card.index] >> top_card.index & 1 == 1
+
+
+def lowest_card(mask: int) -> Card:
+    """Get the card with the lowest index in the bitset
+
+    For a bitset of a single suit this is the card with the lowest symbol.
+
+    Returns: Card
+        None if the bitset is empty
+    """
+    if not mask:
+        return None
+    return Card.CARDS[(mask & -mask).bit_length() - 1]
@@ -15,6 +15,8 @@ class Cheat():
             as a follow up cheat to this cheat (or follow ups of this cheat...)
     """
 
+    __slots__ = ("player", "finish_time", "cheated_cards")
+
     # Seconds before a cheat cannot be reverted anymore
     DURATION = 5
 
@@ -52,6 +54,8 @@ class StealTrumpCard(Cheat):
             The old (stolen) trump card
     """
 
+    __slots__ = ("old_trump_card",)
+
     def __init__(self, player: Player, old_trump_card: Card):
         Cheat.__init__(self, player)
         self.old_trump_card = old_trump_card
@@ -68,6 +72,8 @@ class PutIntoDeck(Cheat):
             The cards put into the deck
     """
 
+    __slots__ = ("cards_in_deck",)
+
     def __init__(self, player: Player, cards_in_deck: list[Card]):
         Cheat.__init__(self, player)
         self.cards_in_deck = cards_in_deck
@@ -79,6 +85,8 @@ class PutIntoDeck(Cheat):
 class ThrowIllegalCards(Cheat):
     """ Class representing the throwing illegal cards cheat """
 
+    __slots__ = ()
+
     def __init__(self, player: Player, cards: list[Card]):
         Cheat.__init__(self, player)
         self.cheated_cards[player] = cards
@@ -90,6 +98,8 @@ class ThrowIllegalCards(Cheat):
 class PassIllegalCards(Cheat):
     """ Class representing the passing with illegal cards cheat """
 
+    __slots__ = ()
+
     def __init__(self, player: Player, cheated_cards: list[Card]):
         Cheat.__init__(self, player)
         self.cheated_cards[player] = cheated_cards
@@ -106,6 +116,8 @@ class BreakIllegalCards(Cheat):
             The table cards of the game on the moment of breaking cards
     """
 
+    __slots__ = ("table_cards",)
+
     def __init__(self, player: Player, table_cards: dict[Card, Card]):
         Cheat.__init__(self, player)
         self.table_cards = table_cards
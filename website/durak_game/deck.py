@@ -1,4 +1,6 @@
-from random import shuffle
+from __future__ import annotations
+from collections import deque
+from random import Random, shuffle
 
 from .card import Card
 
@@ -6,10 +8,16 @@ class Deck:
     """Class representing a deck of cards
     
     Attributes:
-        cards: List[Card]
-            The cards in the deck
+        cards: deque[Card]
+            The cards in the deck, the top of the deck is on the right.
+            Assigning a list replaces the cards in the deck.
     """
 
+    __slots__ = ("_cards",)
+
+    # Cached, unshuffled cards of a deck per lowest card
+    _TEMPLATES = {}
+
     def __init__(self, lowest_card: int = Card.SIX):
         """Initialize the deck
 
@@ -20,25 +28,74 @@ class Deck:
             lowest_card: int
                 The lowest card in the deck
         """
-        self.cards = []
-        for suit in Card.SUITS:
-            for symbol in Card.SYMBOLS:
-                if symbol >= lowest_card:
-                    self.cards.append(Card(suit, symbol))
-    
+        self.cards = Deck.get_template(lowest_card)
+
+    @staticmethod
+    def get_template(lowest_card: int) -> tuple:
+        """Get the unshuffled cards of a deck with the given lowest card
+
+        Returns: tuple[Card]
+        """
+        template = Deck._TEMPLATES.get(lowest_card)
+        if template is None:
+            template = tuple(card for card in Card.CARDS
+                             if card.symbol >= lowest_card)
+            Deck._TEMPLATES[lowest_card] = template
+        return template
+
+    @property
+    def cards(self) -> deque:
+        return self._cards
+
+    @cards.setter
+    def cards(self, cards: list[Card]):
+        self._cards = deque(cards)
+
     def get_card_count(self) -> int:
-        return len(self.cards)
+        return len(self._cards)
 
-    def shuffle(self):
-        shuffle(self.cards)
+    def shuffle(self, rng: Random = None):
+        """Shuffle the deck
+
+        Args:
+            rng: Random, optional
+                The random generator to shuffle with,
+                defaults to the module level generator
+        """
+        # Shuffling a deque in place indexes into its middle, use a list
+        cards = list(self._cards)
+        if rng is None:
+            shuffle(cards)
+        else:
+            rng.shuffle(cards)
+        self._cards = deque(cards)
+
+    def deal(self, count: int) -> list:
+        """Take cards from the top of the deck
+
+        Args:
+            count: int
+                The amount of cards to take, if the deck has fewer cards
+                all remaining cards are taken
+
+        Returns: list[Card]
+            The cards taken, in the order they were taken
+        """
+        pop = self._cards.pop
+        return [pop() for _ in range(min(count, len(self._cards)))]
         
     def add_card(self, card: Card):
         """Add a card to the bottom of the deck """
-        self.cards.insert(0, card)
+        self._cards.appendleft(card)
 
     def insert_cards(self, cards):
         """Insert cards at the top of the deck """
-        self.cards += cards
+        self._cards.extend(cards)
 
     def is_empty(self) -> bool:
-        return self.get_card_count() == 0
\ No newline at end of file
+        return not self._cards
+
+    def copy(self) -> Deck:
+        deck = Deck.__new__(Deck)
+        deck._cards = self._cards.copy()
+        return deck
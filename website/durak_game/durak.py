@@ -1,21 +1,51 @@
 from __future__ import annotations
+from functools import wraps
+from random import Random, randrange
 from time import time
 
+from . import actions, cardset, journal, rollback, zobrist
 from .card import Card
 from .player import Player
 from .deck import Deck
-from .cheat import Cheat
+from .cheat import Cheat, PutIntoDeck, StealTrumpCard
+from .table import Table
+from .seating import SeatRing
+from .journal import Journal
+from .rollback import RollbackLog
+
+def consistency_checked(method):
+    """Decorator checking the game state after a mutating method
+
+    The check only runs if check_consistency is set on the game.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if self.check_consistency:
+            assert self.is_consistent(), \
+                f"Inconsistent game state after {method.__name__}"
+        return result
+    return wrapper
+
 
 class DurakGame:
     """ Class representing a game of Durak 
     
         Attributes:
             id: int
-                4 digit id of the game
+                Id of the game, 4 digits for games of players (see
+                GameManager)
             name: str
             deck: Deck
             players: List(Player)
                 List of players currently playing
+            seats: SeatRing
+                Seating order of the players currently playing
+            usernames: dict(str: Player)
+                Every player in the game or lobby by username
+            roles: dict(str: str)
+                The role of every player by username:
+                LOBBY, PLAYING or SPECTATING
             lobby: List(Player)
                 List of players currently in the lobby
             trump: str
@@ -24,9 +54,10 @@ class DurakGame:
             cards_per_player: int
             current_player: Player
                 The player currently receiving cards
-            table_cards: dict(Card: Card)
+            table_cards: Table
                 Key: bottom card, Value: top card
                 The cards currently on the table
+                Assigning a dict replaces the cards on the table
             throwing_started: bool
                 Indicates whether the first card(s) of the round have already
                 been thrown
@@ -39,33 +70,201 @@ class DurakGame:
                 break
             timestamp: int
                 Timestamp of start of this game 
-                (used for garbage collection of old games)
+            last_activity: float
+                Time of the last event of the players of this game
+                (used for garbage collection of abandoned games)
             is_in_progress: bool
                 Indicates whether the game is currently in progress
+            durak: Player
+                The loser of the last finished game,
+                None if it ended in a draw or no game has finished yet
+            seed: int
+                Seed of the random generator of the game
+            rng: Random
+                Random generator used for every random choice in the game,
+                seeded when it is first used, so idle lobbies do not
+                hold its state
+            check_consistency: bool
+                Check the consistency of the game state after every change
+                (slow, meant for tests), defaults to CHECK_CONSISTENCY
+            state_hash: int
+                Zobrist hash of the state of the game in progress
+                (see zobrist), 0 if no game is in progress.
+                Updated by every method changing the state, call rehash
+                after changing hands, table or flags directly.
+            journal: Journal
+                Every successful action of the game (see journal),
+                None for clones, which do not record their actions
+            rollback: RollbackLog
+                How to undo the changes since the cheats that can still be
+                reverted (see rollback)
+            timers: TimerWheel
+                Shared wheel for cheat windows and turn deadlines,
+                None for games without timers
+            turn_time: float
+                Seconds a turn may take before the game acts for the idle
+                players (see timeout_turn), None for no deadlines
+            turn_timer: Timer
+                The deadline of the current turn, None if there is none
+            cheat_timer: Timer
+                The end of the window of the oldest cheat that can be
+                reverted, None if there is none
+            turn_listener: Callable[[DurakGame, Player, tuple], None]
+                Called with every action performed on a timeout
     """
 
-    MAX_PLAYERS = 8
+    __slots__ = ("id", "name", "timestamp", "last_activity", "lobby",
+                 "players", "seats", "usernames", "roles", "_table_cards",
+                 "cheating", "throwing_started", "next_allows_break",
+                 "prev_allows_break", "is_in_progress", "durak",
+                 "cards_per_player", "deck", "trump",
+                 "trump_card", "current_player", "seed", "_rng",
+                 "check_consistency", "state_hash", "journal", "rollback",
+                 "timers", "turn_time", "turn_timer", "cheat_timer",
+                 "turn_listener")
+
+    # Every seat needs its own zobrist keys
+    MAX_PLAYERS = zobrist.MAX_SEATS
 
-    def __init__(self, id: int, name: str):
+    # Seeds of new games are picked from range(MAX_SEED)
+    MAX_SEED = 2 ** 64
+
+    # Roles of players
+    LOBBY = "lobby"
+    PLAYING = "playing"
+    SPECTATING = "spectating"
+
+    # Default for check_consistency of new games
+    CHECK_CONSISTENCY = False
+
+    def __init__(self, id: int, name: str, seed: int = None):
         """ Initialize a game
 
         Args: 
             id: int
-                4 digit id of the game
+                Id of the game, 4 digits for games of players (see
+                GameManager)
             name: str
                 The name given to the game
+            seed: int, optional
+                Seed for the random generator of the game, games with the
+                same seed and the same actions are identical.
+                Defaults to a random seed.
         """
         self.id = id
         self.name = name
         self.timestamp = time()
+        self.last_activity = self.timestamp
         self.lobby = [] 
         self.players = []
-        self.table_cards = {} 
+        self.seats = SeatRing()
+        self.usernames = {}
+        self.roles = {}
+        self.table_cards = Table()
         self.cheating = {}
         self.throwing_started = False
         self.next_allows_break = False
         self.prev_allows_break = False
         self.is_in_progress = False
+        self.durak = None
+        self.cards_per_player = None
+        self.deck = None
+        self.trump = None
+        self.trump_card = None
+        self.current_player = None
+        if seed is None:
+            seed = randrange(DurakGame.MAX_SEED)
+        self.seed = seed
+        self._rng = None
+        self.check_consistency = DurakGame.CHECK_CONSISTENCY
+        self.state_hash = 0
+        self.journal = Journal(id, name, seed)
+        self.rollback = RollbackLog()
+        self.timers = None
+        self.turn_time = None
+        self.turn_timer = None
+        self.cheat_timer = None
+        self.turn_listener = None
+
+    @property
+    def rng(self) -> Random:
+        if self._rng is None:
+            self._rng = Random(self.seed)
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng: Random):
+        self._rng = rng
+
+    @property
+    def table_cards(self) -> Table:
+        return self._table_cards
+
+    @table_cards.setter
+    def table_cards(self, table_cards: dict[Card, Card]):
+        self._table_cards = Table(table_cards)
+
+    def clone(self, copy_rng: bool = True) -> DurakGame:
+        """Get an independent copy of the game
+
+        Players, deck, table, seating and flags are copied, cards are shared
+        because they are interned. The journal is not copied. Much faster
+        than copy.deepcopy, meant for searches and simulations.
+
+        Args:
+            copy_rng: bool, optional
+                Copy the random generator, defaults to True.
+                Copying its state takes most of the time of a clone, if False
+                the clone shares the generator of this game, which is only
+                safe if the clone never starts a new game.
+
+        Returns: DurakGame
+        """
+        game = DurakGame.__new__(DurakGame)
+        copies = {username: player.copy()
+                  for username, player in self.usernames.items()}
+        game.id = self.id
+        game.name = self.name
+        game.timestamp = self.timestamp
+        game.last_activity = self.last_activity
+        game.lobby = [copies[player.username] for player in self.lobby]
+        game.players = [copies[player.username] for player in self.players]
+        game.seats = self.seats.copy(copies)
+        game.usernames = copies
+        game.roles = dict(self.roles)
+        game._table_cards = self._table_cards.copy()
+        game.cheating = {copies[player.username]: cheat
+                         for player, cheat in self.cheating.items()}
+        game.throwing_started = self.throwing_started
+        game.next_allows_break = self.next_allows_break
+        game.prev_allows_break = self.prev_allows_break
+        game.is_in_progress = self.is_in_progress
+        game.durak = copies.get(getattr(self.durak, "username", None))
+        game.cards_per_player = self.cards_per_player
+        game.deck = self.deck.copy() if self.deck is not None else None
+        game.trump = self.trump
+        game.trump_card = self.trump_card
+        game.current_player = copies.get(
+            getattr(self.current_player, "username", None))
+        game.seed = self.seed
+        if copy_rng and self._rng is not None:
+            # Skips seeding, the state is replaced anyway
+            game._rng = Random.__new__(Random)
+            game._rng.setstate(self._rng.getstate())
+        else:
+            # An unused generator is seeded by the clone itself
+            game._rng = self._rng
+        game.check_consistency = self.check_consistency
+        game.state_hash = self.state_hash
+        game.journal = None
+        game.rollback = self.rollback.copy()
+        # Clones never schedule timers
+        game.timers = None
+        game.turn_time = self.turn_time
+        game.turn_timer = None
+        game.cheat_timer = None
+        game.turn_listener = None
+        return game
 
     def get_lobby_count(self) -> int:
         return len(self.lobby)
@@ -74,9 +273,15 @@ class DurakGame:
         return len(self.players)
 
     def get_player(self, username: str) -> Player:
-        for player in self.players + self.lobby:
-            if player.username == username:
-                return player
+        return self.usernames.get(username)
+
+    def get_role(self, username: str) -> str:
+        """Get the role of a player in the game
+
+        Returns: str
+            LOBBY, PLAYING or SPECTATING, None if not in the game
+        """
+        return self.roles.get(username)
 
     def get_table_cards_count(self) -> int:
         """ Get the amount of cards currently on the table
@@ -84,26 +289,26 @@ class DurakGame:
 
         Returns: int
         """
-        count = 0
-        for _, top_card in self.table_cards.items():
-            if top_card:
-                count += 2
-            else:
-                count += 1
-        return count
+        return self.table_cards.get_card_count()
 
+    @consistency_checked
     def add_player(self, username: str):
         """Add a player to the lobby of the game by username
         The player is only added if not in the game yet
+        If the game is in progress, the player is spectating
 
         Args:
             username: str
                 The username of the player to add
         """
-        if not(any(p.username == username for p in self.players)):
+        if username not in self.usernames:
             player = Player(username)
             self.lobby.append(player)
+            self.usernames[username] = player
+            self.roles[username] = self.get_lobby_role()
+            self.record(journal.JOIN, username)
 
+    @consistency_checked
     def remove_player(self, player: Player) -> bool:
         """Remove a player from the game
 
@@ -127,13 +332,27 @@ class DurakGame:
             if player == self.current_player:
                 self.finish_round(has_broken=False)
                 is_next_round = True
+        if player in self.players:
+            if player == self.current_player:
+                # The next round started at the leaving player
+                self.current_player = self.next_player(player)
             self.players.remove(player)
+            self.seats.remove(player)
+            if self.is_in_progress and self.is_finished():
+                self.finish_game()
+        self.usernames.pop(player.username, None)
+        self.roles.pop(player.username, None)
+        # Leaving players cannot be restored
+        self.clear_rollback()
+        self.rehash()
+        self.record(journal.LEAVE, player.username)
         return is_next_round
 
 
     # GAME AND ROUNDS
 
 
+    @consistency_checked
     def start_game(self, cards_per_player=6):
         """Start a game of durak
 
@@ -149,19 +368,26 @@ class DurakGame:
         Args: 
             cards_per_player: int, optional
                 Initial amount of cards per player, defaults to 6
+
+        Raises: ValueError
+            If more than MAX_PLAYERS players are in the lobby
         """
+        if len(self.lobby) > DurakGame.MAX_PLAYERS:
+            raise ValueError(f"A game has at most {DurakGame.MAX_PLAYERS} "
+                             f"players, not {len(self.lobby)}")
         self.cards_per_player = cards_per_player
 
         self.players += self.lobby
         self.lobby = []
+        self.seats.reset(self.players)
+        for player in self.players:
+            self.roles[player.username] = DurakGame.PLAYING
 
         self.deck = Deck(self.get_lowest_card())
-        self.deck.shuffle()
+        self.deck.shuffle(self.rng)
 
         for player in self.players:
-            cards = [self.deck.cards.pop() 
-                    for _ in range(cards_per_player)]
-            player.add_cards(cards)
+            player.add_cards(self.deck.deal(cards_per_player))
 
         self.trump_card = self.deck.cards.pop()
         self.trump = self.trump_card.get_suit()
@@ -169,11 +395,12 @@ class DurakGame:
 
         starting_player = self.players[0]
         lowest_trump = Card.ACE + 1
+        trump_mask = cardset.SUIT_MASKS[self.trump]
         for player in self.players:
-            for card in player.cards:
-                if (card.suit == self.trump and
-                    card.symbol < lowest_trump):
-                    starting_player = player
+            card = cardset.lowest_card(player.mask & trump_mask)
+            if card is not None and card.symbol < lowest_trump:
+                starting_player = player
+                lowest_trump = card.symbol
         # Next because this is the receiving player
         self.current_player = self.next_player(starting_player)
 
@@ -181,7 +408,11 @@ class DurakGame:
         self.next_allows_break = False
         self.prev_allows_break = False
         self.is_in_progress = True
+        self.durak = None
+        self.rehash()
+        self.record(journal.START, cards_per_player)
 
+    @consistency_checked
     def finish_round(self, has_broken: bool):
         """Finishes a round of the game
 
@@ -190,10 +421,12 @@ class DurakGame:
         If the deck is empty / has become empty, players that are finished are 
         transfered to the lobby.
         If the game is finished, the in progress indicator is set to False,
-        the cards of all remaining players are removed, and every player is
-        removed from the players and added to the lobby.
+        the remaining player (if any) is the durak, the cards of all
+        remaining players are removed, and every player is removed from the
+        players and added to the lobby.
         Otherwise, the current player is updated: if the current player has 
         broken, he is allowed to throw cards, otherwise he is not.
+        Players that have finished are skipped.
         Allow break and throwing started indicators are reset to False.
         All cheats are reset.
 
@@ -207,23 +440,25 @@ class DurakGame:
 
         if not self.deck.is_empty():
             self.distribute_new_cards()
+
+        if has_broken:
+            next_player = self.next_player(self.current_player)
+        else:
+            next_player = self.next_player(self.next_player(self.current_player))
+
         # No else: need to check again because the deck might have become empty
         if self.deck.is_empty():
+            # Finished players are skipped when picking the next player
+            for _ in range(self.get_player_count()):
+                if next_player.get_card_count() > 0:
+                    break
+                next_player = self.next_player(next_player)
             self.transfer_finished_players()
 
         if self.is_finished():
-            self.is_in_progress = False
-
-            for player in self.players:
-                player.cards = []
-                self.lobby.append(player)
-
-            self.players = []
+            self.finish_game()
         else:
-            if has_broken:
-                self.current_player = self.next_player(self.current_player)
-            else:
-                self.current_player = self.next_player(self.next_player(self.current_player))
+            self.current_player = next_player
 
         self.throwing_started = False
         self.next_allows_break = False
@@ -231,6 +466,29 @@ class DurakGame:
 
         # TODO Breaking cards cheat
         self.cheating.clear()
+        self.clear_rollback()
+        self.rehash()
+
+    def finish_game(self):
+        """Finish the game when at most one player is left
+
+        The in progress indicator is set to False, the remaining player
+        (if any) is the durak, the cards of all remaining players are
+        removed, and every player is removed from the players and added
+        to the lobby.
+        """
+        self.is_in_progress = False
+        # Nobody loses if the last players finish at the same time
+        self.durak = self.players[0] if self.players else None
+
+        for player in self.players:
+            player.cards = []
+            self.lobby.append(player)
+
+        self.players = []
+        self.seats.clear()
+        for player in self.lobby:
+            self.roles[player.username] = DurakGame.LOBBY
 
     def distribute_new_cards(self):
         """New cards are distributed to the players
@@ -242,25 +500,26 @@ class DurakGame:
         player = self.current_player
         done = False
         while not done:
-            while player.get_card_count() < self.cards_per_player and self.deck.cards:
-                player.cards.append(self.deck.cards.pop())
+            missing = self.cards_per_player - player.get_card_count()
+            if missing > 0:
+                player.add_cards(self.deck.deal(missing))
             player = self.next_player(player)
             done = player == self.current_player
     
     def transfer_finished_players(self):
         """Transfer players without cards to the lobby"""
-        new_players = []
-        for player in self.players:
-            if player.get_card_count() == 0:
-                self.lobby.append(player)
-            else:
-                new_players.append(player)
-        self.players = new_players
+        for player in [player for player in self.players
+                       if player.get_card_count() == 0]:
+            self.lobby.append(player)
+            self.players.remove(player)
+            self.seats.remove(player)
+            self.roles[player.username] = DurakGame.SPECTATING
 
 
     # THROWING CARDS
 
 
+    @consistency_checked
     def throw_cards(self, player: Player, cards: List[Card]) -> bool:
         """Player throws cards on table
 
@@ -293,16 +552,30 @@ class DurakGame:
             else:
                 return False
 
+        if not player.has_cards(cards):
+            return False
+
         if not self.is_legal_throw_cards(player, cards, is_first_throw):
             # TODO the player has cheated
             print("Illegal throw by {}".format(player))
             return False # Illegal for now
 
+        mask = cardset.to_mask(cards)
+        if self.rollback.cheats:
+            self.record_flags()
+            self.record_undo(rollback.HAND, player.username, mask, 0)
+            self.record_undo(rollback.TABLE_BOTTOMS, mask)
+
+        if not self.throwing_started:
+            self.state_hash ^= zobrist.THROWING_STARTED_KEY
         self.throwing_started = True
 
+        self.state_hash ^= (self.get_hand_key(player, mask)
+                            ^ zobrist.get_mask_key(zobrist.TABLE, mask))
         player.remove_cards(cards)
         for card in cards:
             self.table_cards[card] = None
+        self.record(journal.THROW, player.username, mask)
         return True
 
     def is_possible_throw_cards(self, cards: List[Card]) -> bool:
@@ -315,9 +588,7 @@ class DurakGame:
 
         Returns: bool
         """
-        cards_to_break = (sum([1 for card in self.table_cards
-                              if not self.table_cards[card]])
-                              + len(cards))
+        cards_to_break = self.table_cards.get_open_count() + len(cards)
         return (cards_to_break
                 <= self.current_player.get_card_count())
 
@@ -345,15 +616,15 @@ class DurakGame:
         if not cards:
             return False
 
+        mask = cardset.to_mask(cards)
         if is_first_throw:
             return (player == self.prev_player(self.current_player)
-                and all(card.symbol == cards[0].symbol for card in cards))
+                and cardset.is_single_symbol(mask))
         else:
-            for card in cards:
-                if not(any((card.symbol == bottom_card.symbol 
-                    or (top_card and card.symbol == top_card.symbol))
-                    for bottom_card, top_card in self.table_cards.items())): 
-                    return False
+            # Every card needs a symbol that is already on the table
+            allowed = cardset.with_symbols(self.table_cards.get_symbols())
+            if mask & ~allowed:
+                return False
 
         return (self.next_player(self.current_player) == player or
                 self.prev_player(self.current_player) == player)
@@ -362,6 +633,7 @@ class DurakGame:
     # BREAKING CARDS
 
 
+    @consistency_checked
     def break_card(self, player: Player, bottom_card: Card, 
                    top_card: Card) -> bool:
         """Break 1 card on the table
@@ -386,12 +658,24 @@ class DurakGame:
         if not self.is_possible_break_card(bottom_card, top_card):
             return False
             
-        if not self.is_legal_break_card(player):
+        if not self.is_legal_break_card(player, bottom_card, top_card):
             print(f"{player} tried to break illegally")
             return False
 
+        if not player.has_card(top_card):
+            return False
+
+        if self.rollback.cheats:
+            self.record_undo(rollback.HAND, player.username, top_card.bit, 0)
+            self.record_undo(rollback.TABLE_TOP, bottom_card.index,
+                             rollback.NO_CARD)
+        self.state_hash ^= (
+            self.get_hand_key(player, top_card.bit)
+            ^ zobrist.PAIR_KEYS[bottom_card.index][top_card.index])
         self.table_cards[bottom_card] = top_card
         player.remove_cards([top_card])
+        self.record(journal.BREAK, player.username, bottom_card.index,
+                    top_card.index)
         return True
 
     def is_possible_break_card(self, bottom_card: Card, top_card: Card) -> bool:
@@ -411,19 +695,31 @@ class DurakGame:
         return (bottom_card in self.table_cards 
            and (self.table_cards.get(bottom_card) is None))
 
-    def is_legal_break_card(self, player: Player) -> bool:
+    def is_legal_break_card(self, player: Player, bottom_card: Card = None,
+                            top_card: Card = None) -> bool:
         """Test whether a break is legal
 
-        True if the breaking player is the current player of the game.
+        False if the breaking player is not the current player of the game.
+        If the cards are given, False if the top card cannot break the
+        bottom card (see cardset.can_beat).
 
         Args:
             player: Player
                 The player trying to break
+            bottom_card: Card, optional
+                Bottom card of the break
+            top_card: Card, optional
+                Top card of the break
         
         Returns: bool
         """
-        return player == self.current_player
+        if player != self.current_player:
+            return False
+        if bottom_card is None or top_card is None:
+            return True
+        return cardset.can_beat(bottom_card, top_card, self.trump)
 
+    @consistency_checked
     def break_cards(self, player: Player) -> bool:
         """Break all cards on the table
 
@@ -445,6 +741,7 @@ class DurakGame:
             print("Illegal breaking")
             return False # Illegal for now
         self.finish_round(has_broken=True)
+        self.record(journal.BREAK_ALL, player.username)
         return True
 
     def is_possible_break_cards(self, player: Player) -> bool: 
@@ -473,19 +770,14 @@ class DurakGame:
 
         Returns: bool
         """
+        if self.table_cards.get_open_count():
+            return False
         for bottom_card, top_card in self.table_cards.items():
-            if not top_card:
+            if not cardset.can_beat(bottom_card, top_card, self.trump):
                 return False
-            elif self.is_trump(top_card):
-                if (self.is_trump(bottom_card)
-                    and bottom_card > top_card):
-                    return False
-            else:
-                if (bottom_card.get_suit() != top_card.get_suit()
-                 or (bottom_card > top_card)):
-                    return False
         return True
 
+    @consistency_checked
     def allow_break_cards(self, player: Player) -> bool:
         """ Indicate an allow break by a player
 
@@ -500,15 +792,24 @@ class DurakGame:
             True if the player has succesfully allowed breaking cards
         """
         allowed_break = False
+        if self.rollback.cheats:
+            self.record_flags()
         if player == self.next_player(self.current_player):
+            if not self.next_allows_break:
+                self.state_hash ^= zobrist.NEXT_ALLOWS_BREAK_KEY
             self.next_allows_break = True
             allowed_break = True
         # No elif: if 2 players then next == prev
         if player == self.prev_player(self.current_player):
+            if not self.prev_allows_break:
+                self.state_hash ^= zobrist.PREV_ALLOWS_BREAK_KEY
             self.prev_allows_break = True
             allowed_break = True
+        if allowed_break:
+            self.record(journal.ALLOW_BREAK, player.username)
         return allowed_break
 
+    @consistency_checked
     def move_top_card(self, player: Player, top_card: Card,
                       new_bottom_card: Card) -> bool:
         """Move a top card to another bottom card
@@ -531,10 +832,19 @@ class DurakGame:
         """
         if not self.is_possible_move_top_card(player, top_card, new_bottom_card):
             return False
-        bottom_card = list(self.table_cards.keys())[
-            list(self.table_cards.values()).index(top_card)]
+        bottom_card = self.table_cards.get_bottom_card(top_card)
+        if self.rollback.cheats:
+            self.record_undo(rollback.TABLE_TOP, bottom_card.index,
+                             top_card.index)
+            self.record_undo(rollback.TABLE_TOP, new_bottom_card.index,
+                             rollback.NO_CARD)
+        self.state_hash ^= (
+            zobrist.PAIR_KEYS[bottom_card.index][top_card.index]
+            ^ zobrist.PAIR_KEYS[new_bottom_card.index][top_card.index])
         self.table_cards[bottom_card] = None
         self.table_cards[new_bottom_card] = top_card
+        self.record(journal.MOVE, player.username, top_card.index,
+                    new_bottom_card.index)
         return True
 
     def is_possible_move_top_card(self, player: Player, top_card: Card,
@@ -557,7 +867,7 @@ class DurakGame:
         Returns: bool
         """
         return (player == self.current_player and
-                top_card in self.table_cards.values() and
+                self.table_cards.has_top_card(top_card) and
                 new_bottom_card in self.table_cards and
                 not self.table_cards[new_bottom_card])
 
@@ -565,6 +875,7 @@ class DurakGame:
     # TAKING CARDS
 
 
+    @consistency_checked
     def take_cards(self, player: Player) -> bool:
         """Player takes the cards on the table
 
@@ -583,13 +894,9 @@ class DurakGame:
         """
         if not self.is_possible_take_cards(player):
             return False
-        cards = []
-        for bottom, top in self.table_cards.items():
-            cards.append(bottom)
-            if top:
-                cards.append(top)
-        self.current_player.add_cards(cards)
+        self.current_player.add_mask(self.table_cards.get_mask())
         self.finish_round(has_broken=False)
+        self.record(journal.TAKE, player.username)
         return True
 
     def is_possible_take_cards(self, player: Player) -> bool:
@@ -611,6 +918,7 @@ class DurakGame:
     # PASSING ON
 
 
+    @consistency_checked
     def pass_on(self, player: Player, cards: List[Card]) -> bool:
         """Pass on the cards to the next player using cards
 
@@ -632,15 +940,27 @@ class DurakGame:
         """
         if not self.is_possible_pass_on(player, cards):
             return False
+        if not player.has_cards(cards):
+            return False
         if not self.is_legal_pass_on(cards):
             print("Illegal passing on")
             return False # Illegal for now
+        mask = cardset.to_mask(cards)
+        if self.rollback.cheats:
+            self.record_undo(rollback.HAND, self.current_player.username,
+                             mask, 0)
+            self.record_undo(rollback.TABLE_BOTTOMS, mask)
+            self.record_undo(rollback.CURRENT, self.current_player.username)
+        self.state_hash ^= (self.get_hand_key(self.current_player, mask)
+                            ^ zobrist.get_mask_key(zobrist.TABLE, mask))
         for card in cards:
             self.table_cards[card] = None
         self.current_player.remove_cards(cards)
-        self.current_player = self.next_player(self.current_player)
+        self.set_current_player(self.next_player(self.current_player))
+        self.record(journal.PASS, player.username, mask)
         return True
 
+    @consistency_checked
     def pass_on_using_trump(self, player) -> bool:
         """Pass on the cards to the next player using trump card
 
@@ -663,7 +983,10 @@ class DurakGame:
         if not self.is_legal_pass_on_using_trump():
             print("Illegal passing on (trump)")
             return False # impossible for now
-        self.current_player = self.next_player(self.current_player)
+        if self.rollback.cheats:
+            self.record_undo(rollback.CURRENT, self.current_player.username)
+        self.set_current_player(self.next_player(self.current_player))
+        self.record(journal.PASS_TRUMP, player.username)
         return True
 
     def is_possible_pass_on(self, player: Player, cards: List[Card]) -> bool:
@@ -685,7 +1008,7 @@ class DurakGame:
         if (len(cards) + self.get_table_cards_count() >
            self.next_player(self.current_player).get_card_count()):
             return False
-        return all(card is None for card in self.table_cards.values())
+        return self.table_cards.top_mask == 0
 
     def is_legal_pass_on(self, cards: List[Card]) -> bool:
         """Test whether passing on is legal
@@ -705,10 +1028,8 @@ class DurakGame:
             return False
         if not self.table_cards:
             return False
-        symbol = next(iter(self.table_cards)).symbol
-        return (all(card.symbol == symbol for card in cards)
-            and all(bottom_card.symbol == symbol
-                for bottom_card, _ in self.table_cards.items()))
+        return cardset.is_single_symbol(cardset.to_mask(cards)
+                                        | self.table_cards.bottom_mask)
 
     def is_legal_pass_on_using_trump(self) -> bool:
         """Test whether passing on using trump is legal
@@ -721,43 +1042,158 @@ class DurakGame:
         """
         if not self.table_cards:
             return False
-        symbol = next(iter(self.table_cards)).symbol
-        if not all(bottom_card.symbol == symbol and top_card is None 
-               for bottom_card, top_card in self.table_cards.items()):
+        bottom_mask = self.table_cards.bottom_mask
+        if (self.table_cards.top_mask
+            or not cardset.is_single_symbol(bottom_mask)):
             return False
-        return Card(self.trump, symbol) in self.current_player.cards
+        trumps = (cardset.with_symbols(cardset.get_symbols(bottom_mask))
+                  & cardset.SUIT_MASKS[self.trump])
+        return bool(self.current_player.mask & trumps)
+
+
+    # LEGAL ACTIONS
+
+
+    def legal_actions(self, player: Player) -> list[tuple]:
+        """Get every action the player can perform right now
+
+        Actions are compact tuples (see actions), every returned action
+        succeeds when performed. Derived from the bitsets of the hand and
+        the table, nothing is tried on the game.
+        Throws after the first throw are single cards, throwing more cards
+        at once is the same as throwing them one by one. First throws and
+        passes contain every possible subset of cards of one symbol.
+        Allowing breaking is only offered once throwing has started and if
+        the player has not allowed it yet.
+
+        Args:
+            player: Player
+                The player to get the actions of
+
+        Returns: list[tuple]
+            Empty if the player cannot do anything
+        """
+        if not self.is_in_progress or player not in self.seats:
+            return []
+        if player == self.current_player:
+            return self._get_defender_actions(player)
+        is_prev = player == self.prev_player(self.current_player)
+        is_next = player == self.next_player(self.current_player)
+        if not is_prev and not is_next:
+            return []
+        return self._get_attacker_actions(player, is_prev, is_next)
+
+    def _get_defender_actions(self, player: Player) -> list[tuple]:
+        """Get the legal actions of the current player """
+        table_cards = self.table_cards
+        if not table_cards:
+            return []
+        result = [(actions.TAKE,)]
+        hand = player.mask
+
+        for bottom_card, top_card in table_cards.items():
+            if top_card is None:
+                beating = hand & self.get_beating_mask(bottom_card)
+                for card in cardset.to_cards(beating):
+                    result.append((actions.BREAK, bottom_card, card))
+
+        bottom_mask = table_cards.bottom_mask
+        if table_cards.top_mask == 0 and cardset.is_single_symbol(bottom_mask):
+            next_player = self.next_player(player)
+            room = next_player.get_card_count() - table_cards.get_card_count()
+            matching = hand & cardset.with_symbols(
+                cardset.get_symbols(bottom_mask))
+            if room >= 0:
+                for cards in cardset.get_subsets(matching, room):
+                    result.append((actions.PASS, cards))
+                if matching & cardset.SUIT_MASKS[self.trump]:
+                    result.append((actions.PASS_TRUMP,))
+
+        if (self.next_allows_break and self.prev_allows_break
+            and self.is_legal_break_cards()):
+            result.append((actions.BREAK_ALL,))
+        return result
+
+    def _get_attacker_actions(self, player: Player, is_prev: bool,
+                              is_next: bool) -> list[tuple]:
+        """Get the legal actions of a neighbor of the current player """
+        result = []
+        hand = player.mask
+        room = (self.current_player.get_card_count()
+                - self.table_cards.get_open_count())
+
+        if not self.throwing_started:
+            if is_prev:
+                symbols = cardset.get_symbols(hand)
+                for idx, symbol in enumerate(Card.SYMBOLS):
+                    if symbols >> idx & 1:
+                        for cards in cardset.get_subsets(
+                                hand & cardset.SYMBOL_MASKS[symbol], room):
+                            result.append((actions.THROW, cards))
+            return result
+
+        allowed = cardset.with_symbols(self.table_cards.get_symbols())
+        if room > 0:
+            for card in cardset.to_cards(hand & allowed):
+                result.append((actions.THROW, (card,)))
+        if ((is_next and not self.next_allows_break)
+            or (is_prev and not self.prev_allows_break)):
+            result.append((actions.ALLOW_BREAK,))
+        return result
 
 
     # CHEATING
     # TODO cheating while another cheat of this player is active is not allowed
 
 
-    def steal_trump_card(self, player: Player, card: Card):
+    @consistency_checked
+    def steal_trump_card(self, player: Player, card: Card) -> bool:
         """Player replaces the trump card with one of his own cards
 
+        If the player is not playing, the trump card is not at the bottom
+        of the deck anymore or the player does not have the card, nothing
+        happens and False is returned.
+        Otherwise:
         The cheat is added to the cheating info.
         The card is removed from the player's cards.
         The trump card is added to the player's cards.
         The trump card is set to the given card.
-        The given card is added to the deck.
+        The given card replaces the trump card at the bottom of the deck.
 
         Args:
             player: Player
                 The player stealing the trump card
             card: Card
                 The card to replace the trump card with
+
+        Returns: bool
+            True if the trump card has been stolen
         """
-        cheat = Cheat(Cheat.STEAL_TRUMP, self.trump_card)
-        self.cheating[player] = cheat
+        if (not self.is_in_progress or player not in self.players
+                or not self.deck.cards or not player.has_card(card)):
+            return False
+
+        cheat = StealTrumpCard(player, self.trump_card)
+        self.add_cheat(player, cheat)
+        self.record_undo(rollback.HAND, player.username, card.bit,
+                         self.trump_card.bit)
+        self.record_undo(rollback.TRUMP, self.trump_card.index)
 
         player.remove_cards([card])
         player.add_cards([self.trump_card])
         self.trump_card = card
-        deck.add_card(card)
+        self.deck.cards[0] = card
+        self.rehash()
+        self.record(journal.STEAL_TRUMP, player.username, card.index)
+        return True
 
-    def put_into_deck(self, player: Player, cards: List[Card]):
+    @consistency_checked
+    def put_into_deck(self, player: Player, cards: List[Card]) -> bool:
         """Player puts his own cards into the deck
 
+        If the player is not playing, does not have all the cards or
+        names a card twice, nothing happens and False is returned.
+        Otherwise:
         The cheat is added to the cheating info.
         The cards are removed from the player's cards.
         The cards are added to the deck.
@@ -767,12 +1203,180 @@ class DurakGame:
                 The player putting cards into the deck
             cards: List[Card]
                 The cards put into the deck
+
+        Returns: bool
+            True if the cards have been put into the deck
         """
-        cheat = Cheat(Cheat.PUT_INTO_DECK, cards)
-        self.cheating[player] = cheat
+        mask = cardset.to_mask(cards)
+        if (not self.is_in_progress or player not in self.players
+                or not cards or cardset.count(mask) != len(cards)
+                or player.mask & mask != mask):
+            return False
 
-        player.remove_cards(cards)
+        cheat = PutIntoDeck(player, cards)
+        self.add_cheat(player, cheat)
+        self.record_undo(rollback.HAND, player.username, mask, 0)
+        self.record_undo(rollback.DECK_TOP, len(cards))
+
+        player.remove_mask(mask)
         self.deck.insert_cards(cards)
+        self.rehash()
+        self.record(journal.PUT_INTO_DECK, player.username, mask)
+        return True
+
+    def add_cheat(self, player: Player, cheat: Cheat):
+        """Add a cheat to the cheating info, logging how to undo it """
+        if self.timers is not None:
+            # Windows are timed by the clock of the wheel
+            self.rollback.clock = self.timers.clock
+            cheat.finish_time = self.timers.clock() + Cheat.DURATION
+        self.rollback.add_cheat(cheat)
+        self.schedule_cheat_expiry()
+        self.record_undo(rollback.CHEAT, player.username,
+                         self.cheating.get(player))
+        self.cheating[player] = cheat
+
+    @consistency_checked
+    def revert_cheat(self, player: Player, now: float = None) -> bool:
+        """Revert the cheat of a player
+
+        Every change since the cheat is undone, newest first, including
+        the changes of later cheats and the actions of all players.
+        Only the changes are undone, the game is not copied.
+
+        Args:
+            player: Player
+                The player whose cheat is reverted
+            now: float, optional
+                The current time, defaults to the time of the rollback log
+
+        Returns: bool
+            True if the cheat has been reverted,
+            False if the player has no cheat or its window has passed
+        """
+        cheat = self.cheating.get(player)
+        if cheat is None:
+            return False
+        diffs = self.rollback.pop_cheat(cheat, now)
+        if diffs is None:
+            return False
+        for diff in diffs:
+            rollback.undo_diff(self, diff)
+        # The oldest cheat may have been reverted
+        self.cancel_cheat_timer()
+        self.schedule_cheat_expiry()
+        self.rehash()
+        self.record(journal.REVERT, player.username)
+        return True
+
+    def record_undo(self, *diff):
+        """Log how to undo a change, while a cheat can be reverted """
+        self.rollback.record(diff)
+
+    def record_flags(self):
+        """Log how to undo a change of the flags of the round """
+        self.record_undo(rollback.FLAGS, self.throwing_started,
+                         self.next_allows_break, self.prev_allows_break)
+
+    def clear_rollback(self):
+        """Make every cheat final, dropping the rollback log """
+        self.rollback.clear()
+        self.cancel_cheat_timer()
+
+    def schedule_cheat_expiry(self):
+        """Start the timer dropping the diffs of the oldest cheat after its
+        window, so they are freed even if the game is idle
+        """
+        cheats = self.rollback.cheats
+        if self.timers is None or self.cheat_timer is not None or not cheats:
+            return
+        self.cheat_timer = self.timers.schedule_at(cheats[0][1].finish_time,
+                                                   self.expire_cheats)
+
+    def expire_cheats(self):
+        """Drop the diffs of the cheats whose window has passed """
+        self.cheat_timer = None
+        self.rollback.expire()
+        self.schedule_cheat_expiry()
+
+    def cancel_cheat_timer(self):
+        if self.cheat_timer is not None:
+            self.timers.cancel(self.cheat_timer)
+            self.cheat_timer = None
+
+
+    # TURN DEADLINES
+
+
+    def restart_turn_timer(self):
+        """Start the deadline of the turn after an action
+
+        The running deadline is cancelled. A new deadline only starts if
+        the game has timers and a turn time, and the first cards of the
+        round have been thrown.
+        """
+        self.cancel_turn_timer()
+        if (self.timers is not None and self.turn_time is not None
+                and self.is_in_progress and self.throwing_started):
+            self.turn_timer = self.timers.schedule(self.turn_time,
+                                                   self.timeout_turn)
+
+    def cancel_turn_timer(self):
+        if self.turn_timer is not None:
+            self.timers.cancel(self.turn_timer)
+            self.turn_timer = None
+
+    def cancel_timers(self):
+        """Cancel every timer of the game, before it is removed """
+        self.cancel_turn_timer()
+        self.cancel_cheat_timer()
+
+    def get_timeout_actions(self) -> list[tuple]:
+        """Get the actions performed for idle players at a deadline
+
+        If cards on the table are not broken, the current player takes.
+        Otherwise the neighbors that have not allowed breaking yet allow
+        it, and if both have, the current player breaks the cards.
+
+        Returns: list[tuple[Player, tuple]]
+            (player, action) pairs, see actions
+        """
+        if not (self.is_in_progress and self.throwing_started):
+            return []
+        current = self.current_player
+        if self.table_cards.get_open_count():
+            return [(current, (actions.TAKE,))]
+        result = []
+        prev_player = self.prev_player(current)
+        next_player = self.next_player(current)
+        if not self.prev_allows_break:
+            result.append((prev_player, (actions.ALLOW_BREAK,)))
+        # With 2 players one allow sets both indicators
+        if not self.next_allows_break and next_player != prev_player:
+            result.append((next_player, (actions.ALLOW_BREAK,)))
+        if result:
+            return result
+        if self.is_legal_break_cards():
+            return [(current, (actions.BREAK_ALL,))]
+        return [(current, (actions.TAKE,))]
+
+    def timeout_turn(self) -> list[tuple]:
+        """Act for the idle players when the deadline of a turn has passed
+
+        The actions of get_timeout_actions are performed and passed to
+        the turn listener. Performing them starts the next deadline.
+
+        Returns: list[tuple[Player, tuple]]
+            The performed (player, action) pairs
+        """
+        self.turn_timer = None
+        performed = []
+        for player, action in self.get_timeout_actions():
+            if actions.apply_action(self, player, action):
+                performed.append((player, action))
+                if self.turn_listener is not None:
+                    self.turn_listener(self, player, action)
+        return performed
 
 
     # HELPER FUNCTIONS
@@ -780,23 +1384,118 @@ class DurakGame:
 
     def is_trump(self, card: Card) -> bool:
         return card.get_suit() == self.trump
+
+    def record(self, *entry):
+        """Append an entry to the journal, if the game has one """
+        if self.journal is not None:
+            self.journal.record(self, entry)
+        if self.turn_time is not None:
+            self.restart_turn_timer()
+
+    def set_current_player(self, player: Player):
+        """Change the current player, updating the hash """
+        old_seat = self.seats.get_seat(self.current_player)
+        new_seat = self.seats.get_seat(player)
+        self.state_hash ^= (zobrist.CURRENT_KEYS[old_seat]
+                            ^ zobrist.CURRENT_KEYS[new_seat])
+        self.current_player = player
+
+    def get_hand_key(self, player: Player, mask: int) -> int:
+        """Get the Zobrist key of cards in the hand of a seated player """
+        return zobrist.get_mask_key(self.seats.get_seat(player), mask)
+
+    def compute_hash(self) -> int:
+        """Compute the Zobrist hash of the state from scratch
+
+        Returns: int
+            0 if no game is in progress
+        """
+        if not self.is_in_progress:
+            return 0
+        key = zobrist.TRUMP_KEYS[self.trump]
+        for player in self.players:
+            key ^= self.get_hand_key(player, player.mask)
+        key ^= zobrist.get_mask_key(zobrist.DECK,
+                                    cardset.to_mask(self.deck.cards))
+        key ^= zobrist.get_table_key(self.table_cards)
+        key ^= zobrist.CURRENT_KEYS[self.seats.get_seat(self.current_player)]
+        if self.throwing_started:
+            key ^= zobrist.THROWING_STARTED_KEY
+        if self.next_allows_break:
+            key ^= zobrist.NEXT_ALLOWS_BREAK_KEY
+        if self.prev_allows_break:
+            key ^= zobrist.PREV_ALLOWS_BREAK_KEY
+        return key
+
+    def rehash(self):
+        """Recompute state_hash, after changes that were not tracked """
+        self.state_hash = self.compute_hash()
+
+    def get_beating_mask(self, card: Card) -> int:
+        """Get the bitset of the cards that can break the given card
+
+        Higher cards of the same suit, and every trump if the card is not
+        a trump.
+
+        Returns: int
+        """
+        return cardset.BEAT_MASKS[self.trump][card.index]
     
     def next_player(self, player: Player) -> Player:
-        try:
-            idx = self.players.index(player)
-            return self.players[(idx + 1) % len(self.players)]
-        except ValueError:
-            return None
+        return self.seats.next(player)
 
     def prev_player(self, player: Player) -> Player:
-        try:
-            idx = self.players.index(player)
-            return self.players[idx - 1]
-        except ValueError:
-            return None
+        return self.seats.prev(player)
+
+    def get_lobby_role(self) -> str:
+        """Get the role of players in the lobby
+
+        Returns: str
+            SPECTATING if the game is in progress, LOBBY otherwise
+        """
+        if self.is_in_progress:
+            return DurakGame.SPECTATING
+        return DurakGame.LOBBY
+
+    def is_consistent(self) -> bool:
+        """Test whether the indexes of the game match its state
+
+        Checks the username index, the roles, the seating order and the
+        bitsets of the table. Meant for tests, this is not fast.
+
+        Returns: bool
+        """
+        everyone = self.players + self.lobby
+        if len(self.usernames) != len(everyone):
+            return False
+        for player in everyone:
+            if self.usernames.get(player.username) is not player:
+                return False
+        for player in self.players:
+            if self.roles.get(player.username) != DurakGame.PLAYING:
+                return False
+        for player in self.lobby:
+            if self.roles.get(player.username) != self.get_lobby_role():
+                return False
+        if len(self.roles) != len(everyone):
+            return False
+
+        if len(self.seats) != len(self.players):
+            return False
+        for idx, player in enumerate(self.players):
+            next_player = self.players[(idx + 1) % len(self.players)]
+            if self.seats.next(player) is not next_player:
+                return False
+
+        table = Table(self.table_cards)
+        return (table.bottom_mask == self.table_cards.bottom_mask
+                and table.top_mask == self.table_cards.top_mask
+                and table.card_count == self.table_cards.card_count
+                and table.open_count == self.table_cards.open_count
+                and table.bottoms_by_top == self.table_cards.bottoms_by_top)
 
     def is_finished(self) -> bool:
-        return self.get_player_count() == 1
+        return self.get_player_count() <= 1
     
     def is_full(self) -> bool:
         return (self.get_player_count() + self.get_lobby_count() >=
@@ -814,4 +1513,39 @@ class DurakGame:
         count = self.get_player_count()
         if count < 6:
             return Card.EIGHT - count
-        return Card.TWO
\ No newline at end of file
+        return Card.TWO
+
+
+def replay(game_journal: Journal, upto: int = None) -> DurakGame:
+    """Rebuild a game from its journal
+
+    Starts from the latest snapshot at or before the entry and performs
+    the remaining entries.
+
+    Args:
+        game_journal: Journal
+            The journal of the game
+        upto: int, optional
+            The amount of entries to replay, defaults to all entries
+
+    Returns: DurakGame
+        The game after the entries, with a journal of these entries
+    """
+    if upto is None:
+        upto = len(game_journal)
+    start, snapshot = game_journal.get_snapshot(upto)
+    if snapshot is None:
+        game = DurakGame(game_journal.game_id, game_journal.name,
+                         game_journal.seed)
+    else:
+        # Snapshots stay untouched for later replays
+        game = snapshot.clone()
+    game.journal = None
+    # Reverts succeeded when they were recorded, cheats do not expire
+    # while replaying
+    game.rollback.clock = lambda: 0.0
+    for entry in game_journal.entries[start:upto]:
+        journal.apply_entry(game, entry)
+    game.rollback.clock = time
+    game.journal = game_journal.truncated(upto)
+    return game
@@ -0,0 +1,181 @@
+"""Versions of a game as seen by its clients
+
+Every change of a game sent to its clients gets the next sequence number,
+and its events are deltas: a client applies the events of number n on top
+of number n - 1 only. A client that sees a gap in the numbers, or
+acknowledges a number more than MAX_LAG behind, gets a snapshot of the
+game instead (see get_snapshot), after which it applies deltas again.
+
+The last changes are kept in a ring buffer, so a client that reconnects
+gets the changes it missed (see get_missed). Once they have rolled out of
+the buffer, it gets a snapshot instead. The buffer holds history_size
+changes, so its memory per game is bounded.
+
+The stream also keeps the cards every player has been told it holds, so
+the end of a round sends the cards a player got instead of its hand.
+"""
+from __future__ import annotations
+from collections import deque
+
+from . import cardset
+
+
+def get_allowed_break_players(game: DurakGame) -> list:
+    """Get the players next to the current player that allowed a break
+
+    Returns: list[Player]
+    """
+    players = []
+    if game.next_allows_break:
+        players.append(game.next_player(game.current_player))
+    if game.prev_allows_break:
+        players.append(game.prev_player(game.current_player))
+    return players
+
+
+def get_snapshot(game: DurakGame, player: Player, seq: int) -> dict:
+    """Get the state of a game as shown to a player
+
+    Cards are strings as in the events (see Card.__str__). Only players
+    that are playing get their hand.
+
+    Args:
+        game: DurakGame
+            A game in progress
+        player: Player
+            The player to show the game to, a spectator if not playing
+        seq: int
+            The sequence number of the state
+
+    Returns: dict
+    """
+    snapshot = {
+        "event": "snapshot",
+        "seq": seq,
+        "currentplayer": game.current_player.username,
+        "deckcount": game.deck.get_card_count(),
+        "cardcounts": {other.username: other.get_card_count()
+                       for other in game.players},
+        "table": [[str(bottom), str(top) if top else None]
+                  for bottom, top in game.table_cards.items()],
+        "allowedbreak": [other.username for other in
+                         get_allowed_break_players(game)],
+    }
+    if player in game.players:
+        snapshot["cards"] = [str(card) for card in player.cards]
+    return snapshot
+
+
+class EventStream:
+    """Class containing the versions of a game sent to its clients
+
+    Attributes:
+        seq: int
+            The sequence number of the last change sent
+        history: deque[tuple[str, dict, dict]]
+            (name, event, private events) of the last changes, the last
+            one has number seq
+        acks: dict(str, int)
+            Key: username, Value: the last number its client applied
+        hands: dict(str, int)
+            Key: username, Value: mask of the cards its client was told it
+            holds, never a card the client does not show
+    """
+
+    __slots__ = ("seq", "history", "acks", "hands")
+
+    # Clients further behind get a snapshot instead of more deltas
+    MAX_LAG = 32
+    # Default amount of changes kept for clients that reconnect, a change
+    # takes about 0.7 kB
+    HISTORY_SIZE = 32
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        """Initialize a stream without changes
+
+        Args:
+            history_size: int, optional
+                The amount of changes kept, defaults to HISTORY_SIZE
+        """
+        self.seq = 0
+        self.history = deque(maxlen=history_size)
+        self.acks = {}
+        self.hands = {}
+
+    def add(self, name: str, event: dict, private: dict = None) -> int:
+        """Number a change and keep it for clients that reconnect
+
+        Args:
+            name: str
+                The name of the socket event
+            event: dict
+                The event sent to every client, gets the number as "seq"
+            private: dict(str, dict), optional
+                Key: username, Value: fields added to the event for that
+                player only
+
+        Returns: int
+            The number of the change
+        """
+        self.seq += 1
+        event["seq"] = self.seq
+        self.history.append((name, event, private))
+        return self.seq
+
+    def get_missed(self, seq: int, username: str) -> list:
+        """Get the changes after a number, as sent to a player
+
+        Returns: list[tuple[str, dict]]
+            (name, event) of every change, None if they are no longer
+            kept or the number is ahead of the stream
+        """
+        missed = self.seq - seq
+        if not 0 <= missed <= len(self.history):
+            return None
+        changes = []
+        for index in range(len(self.history) - missed, len(self.history)):
+            name, event, private = self.history[index]
+            if private and username in private:
+                event = dict(event, **private[username])
+            changes.append((name, event))
+        return changes
+
+    def ack(self, username: str, seq: int) -> bool:
+        """Record the last number the client of a player applied
+
+        Returns: bool
+            True if the client needs a snapshot: it is more than MAX_LAG
+            behind, or ahead of the stream, showing an earlier game with
+            the same id
+        """
+        self.acks[username] = seq
+        return not 0 <= self.seq - seq <= EventStream.MAX_LAG
+
+    def forget(self, username: str):
+        """Forget a player that left """
+        self.acks.pop(username, None)
+        self.hands.pop(username, None)
+
+    def get_new_cards(self, player: Player) -> list:
+        """Get the cards a player holds that its client was not told about
+
+        Its client is told about them now.
+
+        Returns: list[Card]
+        """
+        known = self.hands.get(player.username, 0)
+        self.hands[player.username] = player.mask
+        return cardset.to_cards(player.mask & ~known)
+
+    def set_hand(self, player: Player):
+        """Record that the client of a player was told its whole hand """
+        self.hands[player.username] = player.mask
+
+    def remove_cards(self, player: Player, cards: list):
+        """Record that the client of a player was told it played cards """
+        if player.username in self.hands:
+            self.hands[player.username] &= ~cardset.to_mask(cards)
+
+    def clear_hands(self):
+        """Forget every hand, clients show the hands of a new game """
+        self.hands.clear()
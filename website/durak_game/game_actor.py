@@ -0,0 +1,230 @@
+"""Mailbox and worker of a game
+
+Socket handlers do not change games themselves: they put a job into the
+mailbox of the game and return. A worker, started when the mailbox gets
+its first job, runs the jobs in order under the lock of the game, and
+sends the socket events the jobs produced once per batch of jobs, after
+releasing the lock. Handlers never wait for a busy game, and a slow game
+only keeps its own worker busy.
+
+Timers of the game go through the mailbox too, so the wheel never waits
+for a game, and timer callbacks are ordered with the events of the game.
+"""
+from __future__ import annotations
+from collections import deque
+from threading import Lock
+from time import perf_counter
+from traceback import print_exc
+
+from .event_stream import EventStream
+from .timer_wheel import Timer, TimerWheel
+
+
+def run_inline(worker):
+    """Run a worker right away, for games without a background server """
+    worker()
+
+
+class GameActor:
+    """Class representing the mailbox and worker of a game
+
+    Has the scheduling methods of TimerWheel, and is the timers of its game.
+
+    Attributes:
+        game: DurakGame
+        wheel: TimerWheel
+            The shared wheel of the timers of the game
+        lock: Lock
+            The lock of the game, held while running jobs
+        mailbox: deque[tuple]
+            (job, args, time of submission) of every pending job
+        outbox: list[tuple[str, dict, object, dict]]
+            (event, data, room, private fields per sid) of every socket
+            event of the running batch of jobs
+        is_running: bool
+            Indicates whether a worker is running the mailbox
+        is_closed: bool
+            Indicates whether the game has been removed
+        spawn: Callable[[Callable], None]
+            Starts a worker, e.g. as a green thread
+        sleep: Callable[[float], None]
+            Yields to other workers between batches
+        sender: Callable[[list[tuple]], None]
+            Sends the socket events of a batch
+        stream: EventStream
+            The versions of the game sent to its clients, used by jobs
+        max_depth: int
+            The largest amount of pending jobs so far
+        processed: int
+        rejected: int
+            The amount of jobs run, and of jobs refused because the
+            mailbox was full
+        latencies: deque[float]
+            Seconds from submission until the end of the job, of the last
+            LATENCY_HISTORY jobs
+    """
+
+    __slots__ = ("game", "wheel", "lock", "mailbox", "outbox", "is_running",
+                 "is_closed", "spawn", "sleep", "sender", "stream", "max_depth",
+                 "processed", "rejected", "latencies", "_mailbox_lock")
+
+    # Jobs beyond this amount are refused, so a flood of events cannot
+    # grow a game without bound
+    MAX_DEPTH = 256
+    # Maximum amount of jobs run under one hold of the lock of the game
+    MAX_BATCH = 16
+    LATENCY_HISTORY = 1000
+
+    def __init__(self, game: DurakGame, wheel: TimerWheel,
+                 spawn=run_inline, sleep=None, sender=None,
+                 stream: EventStream = None):
+        """Initialize the actor of a game, which uses it as timers
+
+        Args:
+            game: DurakGame
+            wheel: TimerWheel
+            spawn: Callable[[Callable], None], optional
+                Starts a worker, defaults to running it right away
+            sleep: Callable[[float], None], optional
+                Yields between batches, defaults to not yielding
+            sender: Callable[[list[tuple]], None], optional
+                Sends socket events, defaults to dropping them
+            stream: EventStream, optional
+                Defaults to a stream keeping EventStream.HISTORY_SIZE
+                changes
+        """
+        self.game = game
+        self.wheel = wheel
+        self.lock = Lock()
+        self.mailbox = deque()
+        self.outbox = []
+        self.is_running = False
+        self.is_closed = False
+        self.spawn = spawn
+        self.sleep = sleep
+        self.sender = sender
+        self.stream = stream or EventStream()
+        self.max_depth = 0
+        self.processed = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=GameActor.LATENCY_HISTORY)
+        self._mailbox_lock = Lock()
+        game.timers = self
+
+    def submit(self, job, *args) -> bool:
+        """Queue a job, job(game, *args) runs under the lock of the game
+
+        Returns: bool
+            False if the game was removed or has MAX_DEPTH pending jobs
+        """
+        return self._put(job, args, GameActor.MAX_DEPTH)
+
+    def _put(self, job, args: tuple, max_depth: float) -> bool:
+        with self._mailbox_lock:
+            if self.is_closed or len(self.mailbox) >= max_depth:
+                self.rejected += 1
+                return False
+            self.mailbox.append((job, args, perf_counter()))
+            self.max_depth = max(self.max_depth, len(self.mailbox))
+            if self.is_running:
+                return True
+            self.is_running = True
+        self.spawn(self.run)
+        return True
+
+    def run(self):
+        """Run jobs until the mailbox is empty """
+        while True:
+            with self._mailbox_lock:
+                mailbox = self.mailbox
+                if not mailbox:
+                    self.is_running = False
+                    return
+                batch = [mailbox.popleft() for _ in
+                         range(min(len(mailbox), GameActor.MAX_BATCH))]
+            with self.lock:
+                for job, args, submitted in batch:
+                    try:
+                        job(self.game, *args)
+                    except Exception:
+                        # A failing event must not stop the game
+                        print_exc()
+                    self.latencies.append(perf_counter() - submitted)
+            self.processed += len(batch)
+            self.flush()
+            if self.sleep is not None:
+                self.sleep(0)
+
+    def send(self, event: str, data: dict, room, private: dict = None):
+        """Send a socket event after the running batch of jobs
+
+        Args:
+            event: str
+            data: dict
+            room: object
+                The room or sid to send the event to
+            private: dict(object, dict), optional
+                Key: sid, Value: fields added to the data for that member
+                of the room only
+        """
+        self.outbox.append((event, data, room, private))
+
+    def flush(self):
+        """Send the socket events of the batch """
+        events = self.outbox
+        if not events:
+            return
+        self.outbox = []
+        if self.sender is not None:
+            self.sender(events)
+
+    def close(self):
+        """Refuse new jobs, the game has been removed """
+        with self._mailbox_lock:
+            self.is_closed = True
+
+    def get_depth(self) -> int:
+        return len(self.mailbox)
+
+    def get_latency_percentiles(self, percentiles: tuple = (50, 90, 99)
+                                ) -> list[float]:
+        """Get percentiles of the latency of the last jobs in milliseconds
+
+        Returns: list[float]
+            One value per percentile, empty if no job has run
+        """
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return []
+        return [latencies[min(len(latencies) - 1,
+                              len(latencies) * percentile // 100)] * 1000
+                for percentile in percentiles]
+
+    # TIMERS
+
+    @property
+    def clock(self):
+        return self.wheel.clock
+
+    def schedule(self, delay: float, callback, *args) -> Timer:
+        return self.schedule_at(self.wheel.clock() + delay, callback, *args)
+
+    def schedule_at(self, deadline: float, callback, *args) -> Timer:
+        # The timer is only known after scheduling
+        handle = []
+        timer = self.wheel.schedule_at(deadline, self._submit_timer, handle,
+                                       callback, args)
+        handle.append(timer)
+        return timer
+
+    def _submit_timer(self, handle: list, callback, args: tuple):
+        # Deadlines are never refused, however full the mailbox
+        self._put(self._fire, (handle, callback, args), float("inf"))
+
+    def _fire(self, game: DurakGame, handle: list, callback, args: tuple):
+        # Timers cancelled while waiting in the mailbox do not fire
+        if not handle[0].is_cancelled:
+            callback(*args)
+
+    def cancel(self, timer: Timer) -> bool:
+        return self.wheel.cancel(timer)
@@ -0,0 +1,99 @@
+"""Allocation of unique game ids
+
+Ids of a range are handed out in a scrambled order: the i-th fresh id is
+first + (i * step + offset) % size, with step coprime to size, so every id
+of the range comes up exactly once without storing the range. Released ids
+are reused after every fresh id, oldest first, which keeps a released id
+from pointing players at a new game for as long as possible.
+
+Allocating and releasing an id takes O(1) time, memory grows with the
+amount of released ids only, so large ranges cost nothing up front.
+"""
+from __future__ import annotations
+from collections import deque
+from math import gcd
+from random import Random
+
+
+class IdAllocator:
+    """Class handing out unused ids of a range
+
+    Attributes:
+        first: int
+            The lowest id of the range
+        size: int
+            The amount of ids of the range
+        fresh: int
+            The amount of ids handed out for the first time
+        free: deque[int]
+            Released ids, oldest first
+        used: set[int]
+            The ids currently handed out
+    """
+
+    __slots__ = ("first", "size", "fresh", "free", "used", "_step",
+                 "_offset")
+
+    def __init__(self, first: int, stop: int, rng: Random = None):
+        """Initialize an allocator of range(first, stop)
+
+        Args:
+            first: int
+            stop: int
+                The range of ids
+            rng: Random, optional
+                Generator of the order of the ids, defaults to an
+                unseeded generator
+        """
+        if stop <= first:
+            raise ValueError(f"Empty id range: {first} to {stop}")
+        rng = rng or Random()
+        self.first = first
+        self.size = stop - first
+        self.fresh = 0
+        self.free = deque()
+        self.used = set()
+        step = rng.randrange(1, self.size) if self.size > 1 else 1
+        while gcd(step, self.size) != 1:
+            step += 1
+        self._step = step
+        self._offset = rng.randrange(self.size)
+
+    def allocate(self) -> int:
+        """Get an unused id
+
+        Returns: int
+            None if every id of the range is used
+        """
+        if self.fresh < self.size:
+            id = self.first + ((self.fresh * self._step + self._offset)
+                               % self.size)
+            self.fresh += 1
+        elif self.free:
+            id = self.free.popleft()
+        else:
+            return None
+        self.used.add(id)
+        return id
+
+    def release(self, id: int) -> bool:
+        """Make an id available again
+
+        Returns: bool
+            True if the id was in use
+        """
+        if id not in self.used:
+            return False
+        self.used.remove(id)
+        self.free.append(id)
+        return True
+
+    def get_occupancy(self) -> float:
+        """Get the fraction of the range in use """
+        return len(self.used) / self.size
+
+    def __contains__(self, id: int) -> bool:
+        return self.first <= id < self.first + self.size
+
+    def __len__(self) -> int:
+        return len(self.used)
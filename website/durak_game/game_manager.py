@@ -1,61 +1,466 @@
+from __future__ import annotations
+import gc
+import sys
+from collections import deque
+from contextlib import contextmanager
+from heapq import heappop, heappush
+from threading import Lock
 from time import time
-from apscheduler.schedulers.background import BackgroundScheduler
+from types import (BuiltinFunctionType, FunctionType, MethodType,
+                   ModuleType)
 
+from .card import Card
 from .durak import DurakGame
+from .event_stream import EventStream
+from .game_actor import GameActor, run_inline
+from .game_ids import IdAllocator
+from .timer_wheel import Timer, TimerWheel
+
+# Objects games share with each other, not freed with a game
+_SHARED_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType,
+                 MethodType, Card, Timer, TimerWheel)
+
+
+def get_game_size(game: DurakGame) -> int:
+    """Estimate the amount of bytes held by a game
+
+    Sums the size of every object reachable from the game, except the
+    objects it shares with other games: interned cards, classes, functions
+    and the timers of the manager.
+    """
+    seen = set()
+    stack = [game]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return size
 
-class GameManager:
-    """ Class to manage current games for the site 
+
+class SweepStats:
+    """Class containing the result of a sweep of the garbage collector
 
     Attributes:
-        current_id: int
-            The current id for the next game
-        current_games: dict(int, DurakGame)
+        time: float
+            Time of the sweep
+        games_reclaimed: int
+            The amount of games removed by the sweep
+        bytes_freed: int
+            Estimated size of the removed games (see get_game_size)
+        games_left: int
+            The amount of games after the sweep
+    """
+
+    __slots__ = ("time", "games_reclaimed", "bytes_freed", "games_left")
+
+    def __init__(self, time: float, games_reclaimed: int, bytes_freed: int,
+                 games_left: int):
+        self.time = time
+        self.games_reclaimed = games_reclaimed
+        self.bytes_freed = bytes_freed
+        self.games_left = games_left
+
+    def __repr__(self):
+        return (f"SweepStats ({self.games_reclaimed} games, "
+                f"{self.bytes_freed} bytes, {self.games_left} left)")
+
+
+class GameShard:
+    """Class representing a partition of the games of a manager
+
+    Every game has its own actor, which serializes its events and timers.
+    The lock of the shard only guards its dicts and heap, and is held
+    briefly; it may be taken while holding no lock or before a lock of a
+    game, never after one.
+
+    Attributes:
+        games: dict(int, DurakGame)
             Key: id, Value: game
-            The current games for the site
+        actors: dict(int, GameActor)
+            Key: id, Value: the mailbox and worker of the game
+        expiries: dict(int, float)
+            Key: id, Value: the expiry of the game in the heap
+        expiry_heap: list[tuple[float, int]]
+            Heap of (expiry, id), entries of removed games and entries
+            whose expiry differs from expiries are skipped
+        lock: Lock
+    """
+
+    __slots__ = ("games", "actors", "expiries", "expiry_heap", "lock")
+
+    def __init__(self):
+        self.games = {}
+        self.actors = {}
+        self.expiries = {}
+        self.expiry_heap = []
+        self.lock = Lock()
+
+    def push_expiry(self, game_id: int, expiry: float):
+        self.expiries[game_id] = expiry
+        heappush(self.expiry_heap, (expiry, game_id))
+
+    def pop_expired(self, now: float) -> list:
+        """Remove the games that have been idle for IDLE_TIME
+
+        Takes O(log n) per game whose expiry has come up.
+        Call while holding the lock of the shard.
+
+        Returns: list[DurakGame]
+            The removed games
+        """
+        heap = self.expiry_heap
+        expired = []
+        while heap and heap[0][0] <= now:
+            expiry, game_id = heappop(heap)
+            if self.expiries.get(game_id) != expiry:
+                # The game was removed or its expiry moved
+                continue
+            expiry = (self.games[game_id].last_activity
+                      + GameManager.IDLE_TIME)
+            if expiry > now:
+                self.push_expiry(game_id, expiry)
+                continue
+            expired.append(self.pop(game_id))
+        return expired
+
+    def pop(self, game_id: int) -> DurakGame:
+        """Remove a game, call while holding the lock of the shard
+
+        The actor of the game refuses new jobs, pending jobs still run.
+        """
+        self.expiries.pop(game_id, None)
+        self.actors.pop(game_id).close()
+        return self.games.pop(game_id)
+
+
+class GameManager:
+    """ Class to manage current games for the site
+
+    Games are partitioned over SHARD_COUNT shards by id, so looking up,
+    creating and removing games of different shards never contend. Events
+    of a game are jobs in the mailbox of the game (see submit and
+    GameActor), run in order by a worker of the game while holding the
+    lock of the game, which page requests take too (see lock_game). Locks
+    are threading locks, which are green under eventlet's monkey patching
+    (see run.py).
+
+    Games expire when their players have been idle for IDLE_TIME seconds.
+    The expiry of every game is kept in a heap of its shard, which is only
+    updated when an expiry comes up: the garbage collector pops the games
+    whose expiry has passed, removes those that have been idle since and
+    pushes the others back with the expiry of their last activity.
+    Recording activity is an assignment, and a sweep only visits the games
+    it pops.
+
+    Attributes:
+        ids: IdAllocator
+            The 4 digit ids of games of players, which players type to
+            join a game
+        bot_ids: IdAllocator
+            The longer ids of games between bots, which do not use up
+            the ids of games of players
+        shards: list[GameShard]
+            The games with id i are in shard i % SHARD_COUNT
+        timers: TimerWheel
+            Cheat windows and turn deadlines of every game, and the
+            garbage collector
+        turn_time: float
+            Seconds per turn of new games before idle players are acted
+            for, None for no deadlines
+        turn_listener: Callable[[DurakGame, Player, tuple], None]
+            Called with every action performed on a timeout
+        history_size: int
+            The amount of changes of every game kept for clients that
+            reconnect (see EventStream)
+        spawn: Callable[[Callable], None]
+        sleep: Callable[[float], None]
+        sender: Callable[[list[tuple]], None]
+            Start workers, yield between batches of jobs and send the
+            socket events of a batch, for the actors of new games
+            (see GameActor)
+        sweeps: deque[SweepStats]
+            The stats of the last SWEEP_HISTORY sweeps
+        games_reclaimed: int
+        bytes_freed: int
+            Totals of every sweep
     """
 
-    # Maximum ID of a game (restarts at 1)
+    # Ids of games of players are in range(MIN_ID, MAX_ID)
+    MIN_ID = 1000
     MAX_ID = 10000
-    # Time a game can last in seconds before it gets
+    # Ids of games between bots are in range(MIN_BOT_ID, MAX_BOT_ID)
+    MIN_BOT_ID = 10 ** 6
+    MAX_BOT_ID = 10 ** 7
+    # Amount of partitions of the games
+    SHARD_COUNT = 16
+    # Time in seconds a game can be idle before it gets
     # removed by the garbage collector
-    GAME_TIME = 3600
-    # Interval in minutes after which games are removed 
+    IDLE_TIME = 3600
+    # Interval in seconds after which idle games are removed
     # by the garbage collector
     GARBAGE_COLLECTOR_INTERVAL = 60
+    # Amount of sweeps of which the stats are kept
+    SWEEP_HISTORY = 60
+    # Length of a tick of the timer wheel in seconds
+    TIMER_TICK = 0.1
+    # Default seconds per turn, None for no deadlines
+    TURN_TIME = None
 
-    def __init__(self):
-        """ Initialize a game manager """
-        self.current_id = 3865
-        self.current_games = {}
+    def __init__(self, turn_time: float = TURN_TIME, clock=time,
+                 history_size: int = EventStream.HISTORY_SIZE):
+        """ Initialize a game manager
+
+        Nothing runs in the background until start is called.
+
+        Args:
+            turn_time: float, optional
+                Seconds per turn, defaults to TURN_TIME
+            clock: Callable[[], float], optional
+                Current time in seconds, defaults to time.time
+            history_size: int, optional
+                Changes kept per game, defaults to EventStream.HISTORY_SIZE
+        """
+        self.ids = IdAllocator(GameManager.MIN_ID, GameManager.MAX_ID)
+        self.bot_ids = IdAllocator(GameManager.MIN_BOT_ID,
+                                   GameManager.MAX_BOT_ID)
+        # Guards both allocators
+        self.ids_lock = Lock()
+        self.shards = [GameShard() for _ in range(GameManager.SHARD_COUNT)]
+        self.timers = TimerWheel(GameManager.TIMER_TICK, clock)
+        self.turn_time = turn_time
+        self.turn_listener = None
+        self.history_size = history_size
+        self.spawn = run_inline
+        self.sleep = None
+        self.sender = None
+        self.sweeps = deque(maxlen=GameManager.SWEEP_HISTORY)
+        self.games_reclaimed = 0
+        self.bytes_freed = 0
+
+    def start(self, socketio):
+        """ Turn the timer wheel in a background task of the socket server
+
+        Timers and the workers of games run in green threads under
+        eventlet, like the socket handlers.
+
+        Args:
+            socketio: SocketIO
+                The socket server of the site
+        """
+        self.spawn = socketio.start_background_task
+        self.sleep = socketio.sleep
         self.start_garbage_collector()
+        socketio.start_background_task(self.run_timers, socketio.sleep)
+
+    def run_timers(self, sleep):
+        """ Advance the timer wheel every tick, forever """
+        while True:
+            self.timers.advance()
+            sleep(GameManager.TIMER_TICK)
+
+    def get_shard(self, game_id: int) -> GameShard:
+        return self.shards[game_id % GameManager.SHARD_COUNT]
 
-    def create_game(self, name: str) -> DurakGame:
-        """ Create a new durakgame with given name 
+    def create_game(self, name: str, seed: int = None,
+                    is_bot_game: bool = False) -> DurakGame:
+        """ Create a new durakgame with given name
 
-        Updates the current id.
+        Takes an unused id.
         Creates the game, adds it to the current games and returns it.
+        The game gets an actor, which is also its timers (game.timers)
+        on the wheel of the manager.
+
+        Args:
+            name: str
+                The name of the game
+            seed: int, optional
+                Seed for the random generator of the game,
+                defaults to a random seed
+            is_bot_game: bool, optional
+                Take a bot game id instead of a 4 digit id,
+                defaults to False
 
         Returns: DurakGame
+            None if every id is in use
         """
-        id = self.current_id
-        self.current_id = (self.current_id + 1) % GameManager.MAX_ID
-        game = DurakGame(id, name)
-        self.current_games[id] = game
+        with self.ids_lock:
+            id = (self.bot_ids if is_bot_game else self.ids).allocate()
+        if id is None:
+            return None
+        game = DurakGame(id, name, seed)
+        actor = GameActor(game, self.timers, self.spawn, self.sleep,
+                          self.sender, EventStream(self.history_size))
+        game.turn_time = self.turn_time
+        game.turn_listener = self.on_turn_timeout
+        game.last_activity = self.timers.clock()
+        shard = self.get_shard(id)
+        with shard.lock:
+            shard.games[id] = game
+            shard.actors[id] = actor
+            shard.push_expiry(id, game.last_activity + GameManager.IDLE_TIME)
         return game
 
+    def find_game(self, game_id: int) -> DurakGame:
+        """ Get a game by id
+
+        Returns: DurakGame
+            None if there is no game with this id
+        """
+        shard = self.get_shard(game_id)
+        with shard.lock:
+            return shard.games.get(game_id)
+
+    def get_game(self, game_id: int) -> DurakGame:
+        """ Get a game for an event of its players, recording the activity
+
+        Raises: KeyError
+            If there is no game with this id
+        """
+        shard = self.get_shard(game_id)
+        with shard.lock:
+            game = shard.games[game_id]
+        game.last_activity = self.timers.clock()
+        return game
+
+    def get_actor(self, game_id: int) -> GameActor:
+        """ Get the mailbox and worker of a game
+
+        Returns: GameActor
+            None if there is no game with this id
+        """
+        shard = self.get_shard(game_id)
+        with shard.lock:
+            return shard.actors.get(game_id)
+
+    def submit(self, game_id: int, job, *args) -> bool:
+        """ Queue an event of a game, recording the activity
+
+        job(game, *args) runs later, in order with the other events and
+        the timers of the game.
+
+        Returns: bool
+            False if the mailbox of the game is full (see
+            GameActor.MAX_DEPTH) or the game has just been removed
+
+        Raises: KeyError
+            If there is no game with this id
+        """
+        shard = self.get_shard(game_id)
+        with shard.lock:
+            game = shard.games[game_id]
+            actor = shard.actors[game_id]
+        game.last_activity = self.timers.clock()
+        return actor.submit(job, *args)
+
+    def send(self, game: DurakGame, event: str, data: dict, room,
+             private: dict = None):
+        """ Send a socket event once the running job of a game is done
+
+        Call from a job of the game. See GameActor.send.
+        """
+        game.timers.send(event, data, room, private)
+
+    def get_stream(self, game: DurakGame) -> EventStream:
+        """ Get the versions of a game sent to its clients
+
+        Call from a job of the game, or while holding its lock.
+        """
+        return game.timers.stream
+
+    @contextmanager
+    def lock_game(self, game_id: int):
+        """ Hold the lock of a game for a page request, recording the
+        activity
+
+        Events of sockets go through submit instead.
+
+        Usage: with manager.lock_game(game_id) as game: ...
+
+        Raises: KeyError
+            If there is no game with this id, or it is removed while
+            waiting for its lock
+        """
+        shard = self.get_shard(game_id)
+        with shard.lock:
+            game = shard.games[game_id]
+            lock = shard.actors[game_id].lock
+        game.last_activity = self.timers.clock()
+        with lock:
+            if shard.games.get(game_id) is not game:
+                raise KeyError(game_id)
+            yield game
+
     def remove_game(self, game_id: int):
-        del self.current_games[game_id]
+        shard = self.get_shard(game_id)
+        with shard.lock:
+            game = shard.pop(game_id)
+        self.release(game)
+
+    def release(self, game: DurakGame):
+        """ Cancel the timers and release the id of a removed game """
+        game.cancel_timers()
+        with self.ids_lock:
+            if game.id in self.bot_ids:
+                self.bot_ids.release(game.id)
+            else:
+                self.ids.release(game.id)
 
-    def collect_garbage(self):
-        """ Removes all games that have passed the lifetime threshold """
-        curr_time = time()
-        for game_id, game in list(self.current_games.items()):
-            if (game.timestamp + GameManager.GAME_TIME < curr_time):
-                del self.current_games[game_id]
+    def get_game_count(self) -> int:
+        return sum(len(shard.games) for shard in self.shards)
+
+    def get_pending_jobs(self) -> int:
+        """ Get the amount of events waiting in the mailboxes of games """
+        count = 0
+        for shard in self.shards:
+            with shard.lock:
+                count += sum(actor.get_depth()
+                             for actor in shard.actors.values())
+        return count
+
+    def get_id_occupancy(self) -> float:
+        """ Get the fraction of the 4 digit ids in use """
+        return self.ids.get_occupancy()
+
+    def on_turn_timeout(self, game: DurakGame, player: Player,
+                        action: tuple):
+        """ Pass an action performed on a timeout to the turn listener """
+        if self.turn_listener is not None:
+            self.turn_listener(game, player, action)
+
+    def collect_garbage(self) -> SweepStats:
+        """ Removes all games that have been idle for IDLE_TIME
+
+        Takes O(log n) per game whose expiry has come up, shards are
+        swept one at a time.
+
+        Returns: SweepStats
+        """
+        now = self.timers.clock()
+        reclaimed = 0
+        freed = 0
+        for shard in self.shards:
+            with shard.lock:
+                expired = shard.pop_expired(now)
+            for game in expired:
+                freed += get_game_size(game)
+                self.release(game)
+            reclaimed += len(expired)
+
+        stats = SweepStats(now, reclaimed, freed, self.get_game_count())
+        self.sweeps.append(stats)
+        self.games_reclaimed += reclaimed
+        self.bytes_freed += freed
+        return stats
 
     def start_garbage_collector(self):
-        """ Schedule a background job to delete games at set interval """
-        sched = BackgroundScheduler(daemon=True)
-        sched.add_job(self.collect_garbage, trigger="interval",
-                      minutes=GameManager.GARBAGE_COLLECTOR_INTERVAL)
-        sched.start()
\ No newline at end of file
+        """ Collect garbage on the timer wheel at set interval """
+        self.timers.schedule(GameManager.GARBAGE_COLLECTOR_INTERVAL,
+                             self.run_garbage_collector)
+
+    def run_garbage_collector(self):
+        self.collect_garbage()
+        self.start_garbage_collector()
@@ -0,0 +1,167 @@
+"""Journal of every successful action of a game
+
+Every entry is a compact tuple starting with an entry code, followed by
+the username of the acting player and the cards as indices or bitsets:
+    (JOIN, username)
+    (LEAVE, username)
+    (START, cards_per_player)
+    (THROW, username, mask)
+    (BREAK, username, bottom_index, top_index)
+    (BREAK_ALL, username)
+    (ALLOW_BREAK, username)
+    (MOVE, username, top_index, new_bottom_index)
+    (TAKE, username)
+    (PASS, username, mask)
+    (PASS_TRUMP, username)
+    (STEAL_TRUMP, username, card_index)
+    (PUT_INTO_DECK, username, mask)
+    (REVERT, username)
+
+Appending an entry is a list append, a clone of the game is stored as a
+snapshot every SNAPSHOT_INTERVAL entries. Replaying (see durak.replay)
+starts from the nearest snapshot, so it is bounded by the interval instead
+of the length of the journal. A journal keeps at most MAX_SNAPSHOTS
+snapshots: beyond that every other snapshot is dropped and the interval
+doubles, so the memory of long games grows with their entries only.
+"""
+from __future__ import annotations
+
+from . import cardset
+from .card import Card
+
+JOIN = 0
+LEAVE = 1
+START = 2
+THROW = 3
+BREAK = 4
+BREAK_ALL = 5
+ALLOW_BREAK = 6
+MOVE = 7
+TAKE = 8
+PASS = 9
+PASS_TRUMP = 10
+STEAL_TRUMP = 11
+PUT_INTO_DECK = 12
+REVERT = 13
+
+
+class Journal:
+    """Class representing the history of a game
+
+    Attributes:
+        game_id: int
+        name: str
+        seed: int
+            The arguments the game was created with
+        entries: list[tuple]
+            Every successful action, oldest first
+        snapshots: list[tuple[int, DurakGame]]
+            (entry count, clone of the game after that many entries),
+            ordered by entry count
+        snapshot_interval: int
+            A snapshot is taken every snapshot_interval entries,
+            doubled whenever the snapshots are thinned out
+    """
+
+    __slots__ = ("game_id", "name", "seed", "entries", "snapshots",
+                 "snapshot_interval")
+
+    SNAPSHOT_INTERVAL = 64
+    MAX_SNAPSHOTS = 16
+
+    def __init__(self, game_id: int, name: str, seed: int,
+                 snapshot_interval: int = SNAPSHOT_INTERVAL):
+        self.game_id = game_id
+        self.name = name
+        self.seed = seed
+        self.entries = []
+        self.snapshots = []
+        self.snapshot_interval = snapshot_interval
+
+    def record(self, game: DurakGame, entry: tuple):
+        """Append an entry, taking a snapshot if one is due
+
+        Args:
+            game: DurakGame
+                The game after the action of the entry
+            entry: tuple
+                The encoded action
+        """
+        entries = self.entries
+        entries.append(entry)
+        if len(entries) % self.snapshot_interval == 0:
+            self.snapshots.append((len(entries), game.clone()))
+            if len(self.snapshots) > Journal.MAX_SNAPSHOTS:
+                # Keeps the snapshots at multiples of the new interval
+                self.snapshots = self.snapshots[1::2]
+                self.snapshot_interval *= 2
+
+    def get_snapshot(self, upto: int) -> tuple:
+        """Get the latest snapshot taken at or before an entry count
+
+        Returns: tuple[int, DurakGame]
+            The entry count and the snapshot, (0, None) if there is none
+        """
+        # Snapshots are taken at every multiple of the interval
+        index = min(upto // self.snapshot_interval, len(self.snapshots)) - 1
+        if index < 0:
+            return 0, None
+        return self.snapshots[index]
+
+    def truncated(self, upto: int) -> Journal:
+        """Get a copy of the journal with the first upto entries """
+        journal = Journal(self.game_id, self.name, self.seed,
+                          self.snapshot_interval)
+        journal.entries = self.entries[:upto]
+        journal.snapshots = [snapshot for snapshot in self.snapshots
+                             if snapshot[0] <= upto]
+        return journal
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def apply_entry(game: DurakGame, entry: tuple) -> bool:
+    """Perform the action of an entry in the game
+
+    Returns: bool
+        True if the action has happened succesfully
+    """
+    code = entry[0]
+    if code == START:
+        game.start_game(entry[1])
+        return True
+    if code == JOIN:
+        game.add_player(entry[1])
+        return True
+    player = game.get_player(entry[1])
+    if player is None:
+        return False
+    if code == LEAVE:
+        game.remove_player(player)
+        return True
+    if code == THROW:
+        return game.throw_cards(player, cardset.to_cards(entry[2]))
+    if code == BREAK:
+        return game.break_card(player, Card.CARDS[entry[2]],
+                               Card.CARDS[entry[3]])
+    if code == BREAK_ALL:
+        return game.break_cards(player)
+    if code == ALLOW_BREAK:
+        return game.allow_break_cards(player)
+    if code == MOVE:
+        return game.move_top_card(player, Card.CARDS[entry[2]],
+                                  Card.CARDS[entry[3]])
+    if code == TAKE:
+        return game.take_cards(player)
+    if code == PASS:
+        return game.pass_on(player, cardset.to_cards(entry[2]))
+    if code == PASS_TRUMP:
+        return game.pass_on_using_trump(player)
+    if code == STEAL_TRUMP:
+        return game.steal_trump_card(player, Card.CARDS[entry[2]])
+    if code == PUT_INTO_DECK:
+        return game.put_into_deck(player, cardset.to_cards(entry[2]))
+    if code == REVERT:
+        return game.revert_cheat(player)
+    raise ValueError(f"Unknown journal entry: {entry}")
@@ -0,0 +1,282 @@
+"""Monte Carlo tree search bot for seats without a human player
+
+The bot runs information set Monte Carlo tree search (single observer
+ISMCTS): every iteration determinizes the game, guessing the cards the bot
+cannot see, and walks a tree shared by all determinizations. Playouts are
+played by a fast policy until the game ends.
+
+Any player can act at any moment in durak, so an edge of the tree is a
+(username, action) pair of any player and its value is the result for the
+acting player. A bot therefore waits when another player's action is the
+most promising continuation.
+"""
+from __future__ import annotations
+from math import log, sqrt
+from random import Random
+from time import perf_counter
+
+from . import actions
+from .durak import DurakGame
+from .simulator import GreedyPolicy, Policy, choose_action
+from .transposition import TranspositionTable
+
+# Result of a playout for a player
+WIN = 1.0
+LOSS = 0.0
+# Result for everyone if a playout is stopped before the game is finished
+UNDECIDED = 0.5
+
+
+def determinize(game: DurakGame, observer: Player, rng: Random) -> DurakGame:
+    """Get a clone of the game with the hidden cards dealt at random
+
+    The observer sees its own hand, the table and the trump card at the
+    bottom of the deck. All other cards in hands and in the deck are
+    shuffled and dealt again, every player keeps its amount of cards.
+    Cards taken from the table by other players are treated as hidden too.
+
+    Args:
+        game: DurakGame
+            The game in progress
+        observer: Player
+            The player whose knowledge is used
+        rng: Random
+            Random generator to deal the hidden cards with
+
+    Returns: DurakGame
+        A clone sharing the random generator of the game
+    """
+    clone = game.clone(copy_rng=False)
+    others = [player for player in clone.players if player != observer]
+    deck_cards = list(clone.deck.cards)
+    # The bottom card of the deck is the visible trump card
+    hidden = deck_cards[1:]
+    for player in others:
+        hidden += player.cards
+    rng.shuffle(hidden)
+
+    start = 0
+    for player in others:
+        count = player.get_card_count()
+        player.cards = hidden[start:start + count]
+        start += count
+    clone.deck.cards = deck_cards[:1] + hidden[start:]
+    clone.rehash()
+    return clone
+
+
+def get_moves(game: DurakGame) -> list[tuple]:
+    """Get the legal (player, action) pairs of every player """
+    return [(player, action) for player in game.players
+            for action in game.legal_actions(player)]
+
+
+def get_rewards(game: DurakGame) -> dict:
+    """Get the result of a playout for every player, by username """
+    if game.is_in_progress:
+        return dict.fromkeys(game.usernames, UNDECIDED)
+    rewards = dict.fromkeys(game.usernames, WIN)
+    if game.durak is not None:
+        rewards[game.durak.username] = LOSS
+    return rewards
+
+
+class Node:
+    """Class representing a node of the search tree
+
+    Attributes:
+        actor: str
+            Username of the player whose action leads to this node,
+            None for the root
+        children: dict(tuple: Node)
+            Key: (username, action), Value: the node after the action
+        visits: int
+        availability: int
+            The amount of visits of the parent in which this node's action
+            was legal
+        reward: float
+            Total result of the playouts through this node for the actor
+    """
+
+    __slots__ = ("actor", "children", "visits", "availability", "reward")
+
+    def __init__(self, actor: str = None):
+        self.actor = actor
+        self.children = {}
+        self.visits = 0
+        self.availability = 0
+        self.reward = 0.0
+
+    def get_score(self, exploration: float) -> float:
+        """Get the UCB1 score of the node, availability replaces the
+        visits of the parent
+        """
+        return (self.reward / self.visits
+                + exploration * sqrt(log(self.availability) / self.visits))
+
+
+class MCTSPolicy(Policy):
+    """Policy choosing actions with ISMCTS
+
+    Attributes:
+        iterations: int
+            Maximum amount of playouts per decision
+        time_limit: float
+            Maximum time per decision in seconds, None for no limit
+        exploration: float
+            Exploration constant of UCB1
+        max_playout_actions: int
+            Playouts are stopped after this amount of actions
+        playout_policy: Policy
+            Policy of every player during playouts
+        transpositions: TranspositionTable
+            Results of earlier playouts by state hash, None to always
+            play out. The results of every playout from a state are
+            summed; once a state was played out transposition_visits
+            times, their mean is reused across iterations, decisions
+            and games instead of playing out again.
+        transposition_visits: int
+            Playouts of a state before its mean result is reused
+        last_iterations: int
+            The amount of playouts of the last decision
+    """
+
+    name = "mcts"
+
+    def __init__(self, iterations: int = 200, time_limit: float = None,
+                 exploration: float = 0.7, max_playout_actions: int = 300,
+                 playout_policy: Policy = None,
+                 transpositions: TranspositionTable = None,
+                 transposition_visits: int = 8):
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.max_playout_actions = max_playout_actions
+        self.playout_policy = playout_policy or GreedyPolicy()
+        self.transpositions = transpositions
+        self.transposition_visits = transposition_visits
+        self.last_iterations = 0
+
+    def choose_action(self, game, player, legal_actions, rng):
+        root = self.search(game, player, rng)
+        best = max(root.children.items(), key=lambda item: item[1].visits,
+                   default=None)
+        if best is None:
+            return None
+        username, action = best[0]
+        if username != player.username:
+            # Another player's action is more promising, wait for it
+            return None
+        return action
+
+    def search(self, game: DurakGame, player: Player, rng: Random) -> Node:
+        """Run the search for the player
+
+        Stops after the amount of iterations or when the time limit is
+        reached, whichever comes first.
+
+        Returns: Node
+            The root of the tree
+        """
+        root = Node()
+        deadline = None
+        if self.time_limit is not None:
+            deadline = perf_counter() + self.time_limit
+        iteration = 0
+        while iteration < self.iterations:
+            if deadline is not None and perf_counter() >= deadline:
+                break
+            self.iterate(root, determinize(game, player, rng), rng)
+            iteration += 1
+        self.last_iterations = iteration
+        return root
+
+    def iterate(self, root: Node, game: DurakGame, rng: Random):
+        """Select, expand, play out and backpropagate once
+
+        Args:
+            root: Node
+                The root of the tree
+            game: DurakGame
+                A determinization of the game, changed by the iteration
+            rng: Random
+        """
+        node = root
+        path = [root]
+        while game.is_in_progress:
+            moves = get_moves(game)
+            if not moves:
+                break
+            untried = []
+            available = []
+            for move in moves:
+                child = node.children.get((move[0].username, move[1]))
+                if child is None:
+                    untried.append(move)
+                else:
+                    child.availability += 1
+                    available.append((child, move))
+            if untried:
+                player, action = rng.choice(untried)
+                child = Node(player.username)
+                child.availability = 1
+                node.children[(player.username, action)] = child
+                actions.apply_action(game, player, action)
+                path.append(child)
+                break
+            node, (player, action) = max(
+                available, key=lambda item: item[0].get_score(self.exploration))
+            actions.apply_action(game, player, action)
+            path.append(node)
+
+        rewards = self.evaluate(game, rng)
+        root.visits += 1
+        for node in path[1:]:
+            node.visits += 1
+            node.reward += rewards[node.actor]
+
+    def evaluate(self, game: DurakGame, rng: Random) -> dict:
+        """Get the result of a playout from the state of the game
+
+        Returns: dict(str: float)
+            The result for every player, by username
+        """
+        if self.transpositions is None or not game.is_in_progress:
+            # Finished games all have hash 0
+            self.playout(game, rng)
+            return get_rewards(game)
+        key = game.state_hash
+        # (visits, reward sums by username)
+        entry = self.transpositions.get(key)
+        if entry is not None and entry[0] >= self.transposition_visits:
+            visits, sums = entry
+            return {username: total / visits
+                    for username, total in sums.items()}
+        self.playout(game, rng)
+        rewards = get_rewards(game)
+        if entry is None:
+            entry = (1, rewards)
+        else:
+            visits, sums = entry
+            entry = (visits + 1,
+                     {username: sums.get(username, 0.0) + reward
+                      for username, reward in rewards.items()})
+        # Entries backed by more playouts are kept first
+        self.transpositions.store(key, entry, entry[0])
+        return rewards
+
+    def playout(self, game: DurakGame, rng: Random) -> int:
+        """Play the game with the playout policy until it ends
+
+        Returns: int
+            The amount of actions performed
+        """
+        policies = dict.fromkeys(game.players, self.playout_policy)
+        action_count = 0
+        while game.is_in_progress and action_count < self.max_playout_actions:
+            _, player, action = choose_action(game, policies, rng)
+            if action is None:
+                break
+            actions.apply_action(game, player, action)
+            action_count += 1
+        return action_count
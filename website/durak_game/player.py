@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from . import cardset
+
 class Player:
     """Class representing players of the game
 
@@ -8,12 +10,18 @@ class Player:
             The username of the player.
             This is unique for each player. 
         cards: List[Card]
-            The cards of this player.
+            The cards of this player, ordered by card index.
+            The list must not be modified, use add_cards and remove_cards
+            or assign a new list.
+        mask: int
+            Bitset of the cards of this player (see cardset).
         sid: str
             The session id of this player.
             Gets set when player joins a game.
     """
 
+    __slots__ = ("username", "mask", "_cards", "sid")
+
     # Mapping the number of players on the table to
     # the positions the players should be at
     POSITIONS = {
@@ -30,7 +38,9 @@ class Player:
     def __init__(self, username: str):
         """ Initialize a player """
         self.username = username
-        self.cards = []
+        self.mask = 0
+        self._cards = []
+        self.sid = None
 
     def __repr__(self):
         return "Player {}".format(self.username)
@@ -39,19 +49,62 @@ class Player:
         return "{}".format(self.username)
     
     def __eq__(self, other):
-        return self.username == other.username
+        return (self is other
+                or self.username == getattr(other, "username", None))
+
+    def __hash__(self):
+        return hash(self.username)
+
+    @property
+    def cards(self) -> list[Card]:
+        # The list is only rebuilt after the hand has changed
+        if self._cards is None:
+            self._cards = cardset.to_cards(self.mask)
+        return self._cards
+
+    @cards.setter
+    def cards(self, cards: list[Card]):
+        self.mask = cardset.to_mask(cards)
+        self._cards = None
 
     def add_cards(self, new_cards: list[Card]):
         """ Add the given cards to the player's cards """
-        self.cards += new_cards
+        self.add_mask(cardset.to_mask(new_cards))
+
+    def add_mask(self, mask: int):
+        """ Add the cards in the given bitset to the player's cards """
+        self.mask |= mask
+        self._cards = None
 
     def remove_cards(self, cards: list[Card]):
         """ Remove the given cards from the player's cards """
-        for card in cards:
-            self.cards.remove(card)
+        self.mask &= ~cardset.to_mask(cards)
+        self._cards = None
+
+    def remove_mask(self, mask: int):
+        """ Remove the cards in the given bitset from the player's cards """
+        self.mask &= ~mask
+        self._cards = None
+
+    def has_cards(self, cards: list[Card]) -> bool:
+        """ Test whether the player has all the given cards """
+        mask = cardset.to_mask(cards)
+        return self.mask & mask == mask
+
+    def has_card(self, card: Card) -> bool:
+        return bool(self.mask & card.bit)
 
     def get_card_count(self) -> int:
-        return len(self.cards)
+        return cardset.count(self.mask)
+
+    def copy(self) -> Player:
+        """ Get a copy of the player with its own hand """
+        player = Player(self.username)
+        player.mask = self.mask
+        # The cached list is never modified, only replaced
+        player._cards = self._cards
+        player.sid = self.sid
+        return player
 
     def get_players_in_position(self, game: DurakGame, spectating: bool = False
                             ) -> List[Tuple[Player, int]]:
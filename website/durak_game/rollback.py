@@ -0,0 +1,193 @@
+"""Rollback of cheats
+
+A cheat can be reverted within Cheat.DURATION seconds. While a cheat can be
+reverted, DurakGame logs how to undo every change of the state as a small
+diff tuple, by username and card indices or bitsets:
+    (HAND, username, removed_mask, added_mask)
+    (TABLE_BOTTOMS, mask)
+        Bottom cards added to the table
+    (TABLE_TOP, bottom_index, old_top_index)
+        The top card of a bottom card changed, -1 for no top card
+    (FLAGS, throwing_started, next_allows_break, prev_allows_break)
+        The flags before the change
+    (CURRENT, username)
+        The current player before the change
+    (TRUMP, old_trump_index)
+        The trump card at the bottom of the deck was replaced
+    (DECK_TOP, count)
+        Cards inserted at the top of the deck
+    (CHEAT, username, old_cheat)
+        A cheat was performed, old_cheat is the cheat it replaced
+
+Reverting a cheat undoes its own diffs and every diff after it, newest
+first, in time proportional to the amount of diffs. Rounds clear the log,
+because all cheats are reset when a round is finished. Diffs are only
+kept while a cheat they belong to can be reverted: the log is trimmed
+whenever a diff is added, so its size stays bounded by the window. The
+deques of the log only exist while a cheat can be reverted, so games
+without cheats do not hold them.
+"""
+from __future__ import annotations
+from collections import deque
+from time import time
+
+from . import cardset
+from .card import Card
+
+HAND = 0
+TABLE_BOTTOMS = 1
+TABLE_TOP = 2
+FLAGS = 3
+CURRENT = 4
+TRUMP = 5
+DECK_TOP = 6
+CHEAT = 7
+
+# TABLE_TOP index of an open bottom card
+NO_CARD = -1
+
+
+class RollbackLog:
+    """Class representing the diffs since the revertable cheats of a game
+
+    Attributes:
+        diffs: deque[tuple]
+            The diffs, oldest first, an empty tuple without cheats
+        cheats: deque[tuple[int, Cheat]]
+            (position of its first diff, cheat) of every cheat that can
+            still be reverted, oldest first, an empty tuple without
+            cheats. Positions count every diff ever added, including
+            dropped diffs.
+        dropped: int
+            The amount of diffs dropped from the start of the log
+        clock: Callable[[], float]
+            Current time in seconds, defaults to time.time
+    """
+
+    __slots__ = ("diffs", "cheats", "dropped", "clock")
+
+    def __init__(self, clock=time):
+        self.diffs = ()
+        self.cheats = ()
+        self.dropped = 0
+        self.clock = clock
+
+    def add_cheat(self, cheat: Cheat):
+        """Start logging for a cheat, its diffs are added next """
+        self.expire()
+        if not self.cheats:
+            self.diffs = deque()
+            self.cheats = deque()
+        self.cheats.append((self.dropped + len(self.diffs), cheat))
+
+    def record(self, diff: tuple):
+        """Add a diff, dropping diffs that cannot be reverted anymore """
+        self.expire()
+        if self.cheats:
+            self.diffs.append(diff)
+
+    def expire(self, now: float = None):
+        """Drop the cheats after their window and the diffs before the
+        oldest remaining cheat
+
+        Args:
+            now: float, optional
+                The current time, defaults to the time of the clock
+        """
+        cheats = self.cheats
+        if not cheats:
+            return
+        if now is None:
+            now = self.clock()
+        # Cheats last equally long, so they expire in order
+        while cheats and cheats[0][1].finish_time <= now:
+            cheats.popleft()
+        if not cheats:
+            self.clear()
+            return
+        diffs = self.diffs
+        for _ in range(cheats[0][0] - self.dropped):
+            diffs.popleft()
+        self.dropped = cheats[0][0]
+
+    def pop_cheat(self, cheat: Cheat, now: float = None) -> list:
+        """Remove a cheat and every later cheat and diff from the log
+
+        Args:
+            cheat: Cheat
+                The cheat to revert
+            now: float, optional
+                The current time, defaults to the time of the clock
+
+        Returns: list[tuple]
+            The diffs to undo, newest first,
+            None if the cheat cannot be reverted anymore
+        """
+        self.expire(now)
+        cheats = self.cheats
+        for index, (start, logged_cheat) in enumerate(cheats):
+            if logged_cheat is cheat:
+                break
+        else:
+            return None
+        for _ in range(len(cheats) - index):
+            cheats.pop()
+        diffs = self.diffs
+        return [diffs.pop()
+                for _ in range(self.dropped + len(diffs) - start)]
+
+    def clear(self):
+        self.dropped += len(self.diffs)
+        self.diffs = ()
+        self.cheats = ()
+
+    def copy(self) -> RollbackLog:
+        """Get a copy of the log, diffs and cheats are shared """
+        log = RollbackLog(self.clock)
+        if self.cheats:
+            log.diffs = self.diffs.copy()
+            log.cheats = self.cheats.copy()
+        log.dropped = self.dropped
+        return log
+
+    def __len__(self) -> int:
+        return len(self.diffs)
+
+
+def undo_diff(game: DurakGame, diff: tuple):
+    """Undo the change of a diff in the game
+
+    The hash of the game is not updated, see DurakGame.revert_cheat.
+    """
+    code = diff[0]
+    if code == HAND:
+        player = game.get_player(diff[1])
+        player.remove_mask(diff[3])
+        player.add_mask(diff[2])
+    elif code == TABLE_BOTTOMS:
+        for card in cardset.to_cards(diff[1]):
+            del game.table_cards[card]
+    elif code == TABLE_TOP:
+        top_index = diff[2]
+        game.table_cards[Card.CARDS[diff[1]]] = (
+            None if top_index == NO_CARD else Card.CARDS[top_index])
+    elif code == FLAGS:
+        (game.throwing_started, game.next_allows_break,
+         game.prev_allows_break) = diff[1:]
+    elif code == CURRENT:
+        game.current_player = game.get_player(diff[1])
+    elif code == TRUMP:
+        game.trump_card = Card.CARDS[diff[1]]
+        game.deck.cards[0] = game.trump_card
+    elif code == DECK_TOP:
+        cards = game.deck.cards
+        for _ in range(diff[1]):
+            cards.pop()
+    elif code == CHEAT:
+        player = game.get_player(diff[1])
+        if diff[2] is None:
+            game.cheating.pop(player, None)
+        else:
+            game.cheating[player] = diff[2]
+    else:
+        raise ValueError(f"Unknown rollback diff: {diff}")
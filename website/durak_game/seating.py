@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+
+class SeatRing:
+    """Class representing the seating order of the players of a game
+
+    Every seated player is linked to its neighbors, so neighbors can be
+    looked up and players can be removed in constant time.
+
+    Attributes:
+        seats: dict(Player: int)
+            The seat index of every seated player.
+            Seat indices are not changed when other players leave.
+    """
+
+    __slots__ = ("seats", "_next", "_prev")
+
+    def __init__(self, players: list[Player] = ()):
+        """Initialize the ring
+
+        Args:
+            players: list[Player], optional
+                The players in seating order
+        """
+        self.seats = {}
+        self._next = {}
+        self._prev = {}
+        self.reset(players)
+
+    def reset(self, players: list[Player]):
+        """Seat the given players in order, removing everyone else """
+        self.clear()
+        count = len(players)
+        for seat, player in enumerate(players):
+            self.seats[player] = seat
+            self._next[player] = players[(seat + 1) % count]
+            self._prev[player] = players[seat - 1]
+
+    def clear(self):
+        self.seats.clear()
+        self._next.clear()
+        self._prev.clear()
+
+    def remove(self, player: Player):
+        """Remove a player from the ring, linking its neighbors
+
+        Nothing happens if the player is not seated.
+        """
+        if player not in self.seats:
+            return
+        next_player = self._next.pop(player)
+        prev_player = self._prev.pop(player)
+        del self.seats[player]
+        if next_player != player:
+            self._next[prev_player] = next_player
+            self._prev[next_player] = prev_player
+
+    def next(self, player: Player) -> Player:
+        """Get the player seated after the given player
+
+        Returns: Player
+            None if the player is not seated
+        """
+        return self._next.get(player)
+
+    def prev(self, player: Player) -> Player:
+        """Get the player seated before the given player
+
+        Returns: Player
+            None if the player is not seated
+        """
+        return self._prev.get(player)
+
+    def copy(self, players: dict[str, Player]) -> SeatRing:
+        """Get a copy of the ring seating other player objects
+
+        Args:
+            players: dict(str: Player)
+                The player replacing every seated player, by username
+
+        Returns: SeatRing
+        """
+        ring = SeatRing()
+        for player, seat in self.seats.items():
+            new_player = players[player.username]
+            ring.seats[new_player] = seat
+            ring._next[new_player] = players[self._next[player].username]
+            ring._prev[new_player] = players[self._prev[player].username]
+        return ring
+
+    def get_seat(self, player: Player) -> int:
+        return self.seats.get(player)
+
+    def __contains__(self, player: Player) -> bool:
+        return player in self.seats
+
+    def __len__(self) -> int:
+        return len(self.seats)
@@ -0,0 +1,311 @@
+"""Headless self-play of complete games of durak
+
+Bots with pluggable policies play DurakGame without Flask. The simulator
+reports throughput and the latency of every engine action, and can record
+the actions of every game as a trace of socket events.
+"""
+from __future__ import annotations
+from collections import namedtuple
+from random import Random
+from time import perf_counter, perf_counter_ns
+
+from . import actions
+from .durak import DurakGame
+
+
+# Result of one simulated game
+#   seed: int
+#       Seed of the game
+#   policies: tuple[str]
+#       Name of the policy of every seat
+#   finish_order: tuple[int]
+#       Seats in the order the players finished
+#   loser: int
+#       Seat of the durak, None if the game ended in a draw or did not finish
+#   action_count: int
+#   finished: bool
+#       False if the game was stopped before it was finished
+GameResult = namedtuple("GameResult", ["seed", "policies", "finish_order",
+                                       "loser", "action_count", "finished"])
+
+
+class Policy:
+    """Base class of bot policies
+
+    A policy picks one of the legal actions of its player.
+    """
+
+    name = "policy"
+
+    def choose_action(self, game: DurakGame, player: Player,
+                      legal_actions: list[tuple], rng: Random) -> tuple:
+        """Choose the action to perform
+
+        Args:
+            game: DurakGame
+                The game being played
+            player: Player
+                The player of this policy
+            legal_actions: list[tuple]
+                The actions the player can perform, not empty
+            rng: Random
+                Random generator to use for random choices
+
+        Returns: tuple
+            One of the legal actions,
+            None if the player waits for other players
+        """
+        raise NotImplementedError
+
+
+class RandomPolicy(Policy):
+    """ Policy picking a random legal action """
+
+    name = "random"
+
+    def choose_action(self, game, player, legal_actions, rng):
+        return rng.choice(legal_actions)
+
+
+class GreedyPolicy(Policy):
+    """ Policy getting rid of its lowest cards, saving trumps
+
+    Attackers throw their lowest matching card and allow breaking when they
+    have nothing to throw. The defender breaks with its lowest card and takes
+    the cards if it cannot break.
+    """
+
+    name = "greedy"
+
+    def choose_action(self, game, player, legal_actions, rng):
+        def card_value(card):
+            return (game.is_trump(card), card.symbol)
+
+        by_kind = {}
+        for action in legal_actions:
+            by_kind.setdefault(action[0], []).append(action)
+
+        if player == game.current_player:
+            if actions.BREAK_ALL in by_kind:
+                return by_kind[actions.BREAK_ALL][0]
+            if actions.BREAK in by_kind:
+                return min(by_kind[actions.BREAK],
+                           key=lambda action: card_value(action[2]))
+            if game.table_cards.get_open_count() == 0:
+                # Everything is broken, wait for the other players
+                return None
+            if actions.TAKE in by_kind:
+                return by_kind[actions.TAKE][0]
+            return None
+
+        if actions.THROW in by_kind:
+            throw = min(by_kind[actions.THROW],
+                        key=lambda action: card_value(action[1][0]))
+            if not game.throwing_started or not game.is_trump(throw[1][0]):
+                return throw
+        if actions.ALLOW_BREAK in by_kind:
+            return by_kind[actions.ALLOW_BREAK][0]
+        return None
+
+
+POLICIES = {policy.name: policy for policy in (RandomPolicy, GreedyPolicy)}
+
+
+def choose_action(game: DurakGame, policies: dict, rng: Random) -> tuple:
+    """Pick the next action of a game played by bots
+
+    The players are asked for an action in a random order, the first
+    player choosing an action performs it. If nobody acts, the current
+    player takes the cards.
+
+    Args:
+        game: DurakGame
+            The game in progress
+        policies: dict(Player: Policy)
+            The policy of every player
+        rng: Random
+            Random generator for the order and the choices of the policies
+
+    Returns: tuple[list[Player], Player, tuple]
+        The order the players were asked in, the acting player and its
+        action. Player and action are None if nobody can act.
+    """
+    players = game.players
+    offset = rng.randrange(len(players))
+    order = players[offset:] + players[:offset]
+    for player in order:
+        player_actions = game.legal_actions(player)
+        if player_actions:
+            action = policies[player].choose_action(game, player,
+                                                    player_actions, rng)
+            if action is not None:
+                return order, player, action
+    if game.is_possible_take_cards(game.current_player):
+        return order, game.current_player, (actions.TAKE,)
+    return order, None, None
+
+
+class SimulationReport:
+    """Class containing the results of a simulation
+
+    Attributes:
+        results: list[GameResult]
+        action_count: int
+        seconds: float
+            Wall clock time of the simulation
+        latencies: dict(str: list[int])
+            Key: action kind, Value: engine time of every action in ns
+        traces: list[list[tuple[str, str, dict]]]
+            Per game, the (username, event, data) of every action,
+            only if traces were recorded
+    """
+
+    def __init__(self):
+        self.results = []
+        self.action_count = 0
+        self.seconds = 0.0
+        self.latencies = {kind: [] for kind in actions.KINDS}
+        self.traces = []
+
+    def get_game_count(self) -> int:
+        return len(self.results)
+
+    def get_games_per_second(self) -> float:
+        return self.get_game_count() / self.seconds if self.seconds else 0.0
+
+    def get_actions_per_second(self) -> float:
+        return self.action_count / self.seconds if self.seconds else 0.0
+
+    def get_percentiles(self, kind: str,
+                        percentiles: tuple = (50, 90, 99)) -> list[float]:
+        """Get percentiles of the latency of an action kind in microseconds
+
+        Returns: list[float]
+            One value per percentile, empty if the action never happened
+        """
+        latencies = sorted(self.latencies[kind])
+        if not latencies:
+            return []
+        return [latencies[min(len(latencies) - 1,
+                              len(latencies) * p // 100)] / 1000
+                for p in percentiles]
+
+    def format(self) -> str:
+        """Get a human readable summary of the report """
+        finished = sum(1 for result in self.results if result.finished)
+        lines = [
+            f"games:          {self.get_game_count()} ({finished} finished)",
+            f"actions:        {self.action_count}",
+            f"games/second:   {self.get_games_per_second():.1f}",
+            f"actions/second: {self.get_actions_per_second():.1f}",
+            "latency (us)        count      p50      p90      p99",
+        ]
+        for kind in actions.KINDS:
+            percentiles = self.get_percentiles(kind)
+            if percentiles:
+                lines.append(f"{kind:<14}{len(self.latencies[kind]):>11}"
+                             + "".join(f"{p:>9.1f}" for p in percentiles))
+        return "\n".join(lines)
+
+
+class Simulator:
+    """Class playing complete games between bots
+
+    Every step, the players are asked for an action (see choose_action).
+
+    Attributes:
+        policies: list[Policy]
+            The policy of every seat, the amount of policies is the amount
+            of players in every game
+        max_actions: int
+            Games are stopped after this amount of actions
+        record_traces: bool
+            Indicates whether the actions of every game are recorded
+    """
+
+    def __init__(self, policies: list[Policy], max_actions: int = 10000,
+                 record_traces: bool = False):
+        self.policies = policies
+        self.max_actions = max_actions
+        self.record_traces = record_traces
+
+    def play_game(self, seed: int, report: SimulationReport = None
+                  ) -> GameResult:
+        """Play one complete game
+
+        Args:
+            seed: int
+                Seed of the game and of the choices of the bots
+            report: SimulationReport, optional
+                Report to add latencies, actions and the trace to
+
+        Returns: GameResult
+        """
+        rng = Random(seed)
+        game = DurakGame(seed, "simulation", seed=seed)
+        # Simulations are reproduced from their seed, not replayed
+        game.journal = None
+        for seat in range(len(self.policies)):
+            game.add_player(f"bot{seat}")
+        game.start_game()
+        players = list(game.players)
+        seats = {player: seat for seat, player in enumerate(players)}
+        policies = {player: self.policies[seat]
+                    for seat, player in enumerate(players)}
+
+        trace = [] if self.record_traces and report is not None else None
+        finish_order = []
+        action_count = 0
+        while game.is_in_progress and action_count < self.max_actions:
+            player_count = game.get_player_count()
+            order, player, action = choose_action(game, policies, rng)
+            if action is None:
+                # Nobody can act anymore
+                break
+
+            start = perf_counter_ns()
+            actions.apply_action(game, player, action)
+            elapsed = perf_counter_ns() - start
+            action_count += 1
+            if report is not None:
+                report.latencies[action[0]].append(elapsed)
+            if trace is not None:
+                trace.append((player.username, *actions.to_event(action)))
+
+            if game.get_player_count() != player_count:
+                finish_order += [seats[player] for player in order
+                                 if player not in game.players
+                                 and player is not game.durak]
+
+        finished = not game.is_in_progress
+        loser = None
+        if finished and game.durak is not None:
+            loser = seats[game.durak]
+        result = GameResult(seed, tuple(policy.name
+                                        for policy in self.policies),
+                            tuple(finish_order), loser, action_count,
+                            finished)
+        if report is not None:
+            report.results.append(result)
+            report.action_count += action_count
+            if trace is not None:
+                report.traces.append(trace)
+        return result
+
+    def run(self, game_count: int, seed: int = 0) -> SimulationReport:
+        """Play games with consecutive seeds
+
+        Args:
+            game_count: int
+                The amount of games to play
+            seed: int, optional
+                Seed of the first game, defaults to 0
+
+        Returns: SimulationReport
+        """
+        report = SimulationReport()
+        start = perf_counter()
+        for game_seed in range(seed, seed + game_count):
+            self.play_game(game_seed, report)
+        report.seconds = perf_counter() - start
+        return report
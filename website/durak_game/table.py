@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from . import cardset
+
+
+class Table(dict):
+    """Class representing the cards on the table
+
+    Behaves like a dict with bottom cards as keys and their top card
+    (or None) as values. Bitsets, counts and a reverse index of the cards
+    are updated on every change, so queries never scan the table.
+
+    Attributes:
+        bottom_mask: int
+            Bitset of the bottom cards on the table
+        top_mask: int
+            Bitset of the top cards on the table
+        card_count: int
+            The amount of cards on the table, bottom and top cards
+        open_count: int
+            The amount of bottom cards without top card
+        bottoms_by_top: dict(Card: Card)
+            Key: top card, Value: bottom card
+    """
+
+    __slots__ = ("bottom_mask", "top_mask", "card_count", "open_count",
+                 "bottoms_by_top")
+
+    def __init__(self, table_cards: dict[Card, Card] = None):
+        """Initialize the table
+
+        Args:
+            table_cards: dict(Card: Card), optional
+                Key: bottom card, Value: top card
+                Initial cards on the table
+        """
+        dict.__init__(self)
+        self.bottom_mask = 0
+        self.top_mask = 0
+        self.card_count = 0
+        self.open_count = 0
+        self.bottoms_by_top = {}
+        if table_cards:
+            self.update(table_cards)
+
+    def __setitem__(self, bottom_card: Card, top_card: Card):
+        if bottom_card in self:
+            self._remove_top(bottom_card)
+        else:
+            self.bottom_mask |= bottom_card.bit
+            self.card_count += 1
+            self.open_count += 1
+        dict.__setitem__(self, bottom_card, top_card)
+        if top_card is not None:
+            self.top_mask |= top_card.bit
+            self.bottoms_by_top[top_card] = bottom_card
+            self.card_count += 1
+            self.open_count -= 1
+
+    def __delitem__(self, bottom_card: Card):
+        self._remove_top(bottom_card)
+        dict.__delitem__(self, bottom_card)
+        self.bottom_mask &= ~bottom_card.bit
+        self.card_count -= 1
+        self.open_count -= 1
+
+    def _remove_top(self, bottom_card: Card):
+        """Remove the top card of a bottom card from the bookkeeping
+
+        The dict itself is not changed.
+        """
+        top_card = dict.__getitem__(self, bottom_card)
+        if top_card is not None:
+            self.top_mask &= ~top_card.bit
+            del self.bottoms_by_top[top_card]
+            self.card_count -= 1
+            self.open_count += 1
+
+    def update(self, *args, **kwargs):
+        for bottom_card, top_card in dict(*args, **kwargs).items():
+            self[bottom_card] = top_card
+
+    def setdefault(self, bottom_card: Card, top_card: Card = None) -> Card:
+        if bottom_card not in self:
+            self[bottom_card] = top_card
+        return self[bottom_card]
+
+    def pop(self, bottom_card: Card, *default) -> Card:
+        if bottom_card not in self:
+            return dict.pop(self, bottom_card, *default)
+        top_card = self[bottom_card]
+        del self[bottom_card]
+        return top_card
+
+    def popitem(self) -> tuple[Card, Card]:
+        bottom_card, top_card = dict.popitem(self)
+        dict.__setitem__(self, bottom_card, top_card)
+        del self[bottom_card]
+        return bottom_card, top_card
+
+    def clear(self):
+        dict.clear(self)
+        self.bottom_mask = 0
+        self.top_mask = 0
+        self.card_count = 0
+        self.open_count = 0
+        self.bottoms_by_top.clear()
+
+    def copy(self) -> Table:
+        return Table(self)
+
+    def __reduce__(self):
+        # Rebuild the bookkeeping instead of restoring it before the items
+        return (Table, (dict(self),))
+
+    def get_card_count(self) -> int:
+        return self.card_count
+
+    def get_open_count(self) -> int:
+        return self.open_count
+
+    def get_bottom_card(self, top_card: Card) -> Card:
+        """Get the bottom card below a top card
+
+        Returns: Card
+            None if the card is not on the table as a top card
+        """
+        return self.bottoms_by_top.get(top_card)
+
+    def has_top_card(self, top_card: Card) -> bool:
+        return top_card in self.bottoms_by_top
+
+    def get_mask(self) -> int:
+        """Get the bitset of all cards on the table """
+        return self.bottom_mask | self.top_mask
+
+    def get_symbols(self) -> int:
+        """Get the bitset of symbols on the table (see cardset.get_symbols)
+
+        Derived from the bitsets of the table in constant time.
+        """
+        return cardset.get_symbols(self.bottom_mask | self.top_mask)
@@ -0,0 +1,306 @@
+"""Hierarchical timer wheel
+
+A single wheel holds the timers of every game: cheat windows (see
+rollback) and turn deadlines. Time is divided into ticks. Level 0 has a
+slot per tick for the next SLOT_COUNT ticks; every next level has slots
+SLOT_COUNT times as wide. A timer is put into the slot of the lowest level
+that reaches its tick, and moves down a level when the slot of its level
+comes up, until it fires from level 0.
+
+Timers scheduled for a tick that has passed fire at the next advance.
+
+Scheduling and cancelling a timer is a set insert or removal. Every level
+keeps a bitset of its occupied slots, so advancing the wheel jumps from
+one occupied slot to the next instead of visiting every tick, however far
+the wheel is advanced and however many timers are pending.
+
+GameActor (see game_actor) gives a game its timers on the shared wheel,
+with callbacks run by the worker of the game.
+"""
+from __future__ import annotations
+from math import ceil, floor
+from threading import Lock
+from time import time
+
+
+def _get_lowest_bit(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+
+class Timer:
+    """Class representing a pending call
+
+    Attributes:
+        tick: int
+            The tick at which the timer fires
+        callback: Callable
+        args: tuple
+            Arguments of the callback
+        bucket: set[Timer]
+            The slot the timer is in, None if it has fired or is cancelled
+        level: int
+        slot: int
+            The position of the bucket in the wheel,
+            level -1 for timers that are due
+        is_cancelled: bool
+            Indicates whether the timer was cancelled, also set when it
+            is cancelled after being taken from the wheel to fire
+    """
+
+    __slots__ = ("tick", "callback", "args", "bucket", "level", "slot",
+                 "is_cancelled")
+
+    def __init__(self, tick: int, callback, args: tuple):
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.bucket = None
+        self.level = 0
+        self.slot = 0
+        self.is_cancelled = False
+
+    def is_pending(self) -> bool:
+        return self.bucket is not None
+
+    def __repr__(self):
+        return f"Timer ({self.callback}, tick {self.tick})"
+
+
+class TimerWheel:
+    """Class representing a hierarchical timer wheel
+
+    Methods are thread safe, callbacks are called outside of the lock and
+    may schedule and cancel timers.
+
+    Attributes:
+        tick_time: float
+            Length of a tick in seconds, timers fire up to a tick late
+        current_tick: int
+            The next tick to process
+        clock: Callable[[], float]
+            Current time in seconds, defaults to time.time
+    """
+
+    __slots__ = ("tick_time", "current_tick", "clock", "_levels",
+                 "_occupied", "_due", "_count", "_lock")
+
+    SLOT_BITS = 8
+    SLOT_COUNT = 1 << SLOT_BITS
+    SLOT_MASK = SLOT_COUNT - 1
+    # With ticks of 0.1 seconds, 4 levels reach more than 13 years
+    LEVEL_COUNT = 4
+    # Ticks beyond the last level are parked at its end
+    MAX_DELTA = (1 << (SLOT_BITS * LEVEL_COUNT)) - 1
+
+    def __init__(self, tick_time: float = 0.1, clock=time):
+        """Initialize an empty wheel starting at the current time
+
+        Args:
+            tick_time: float, optional
+                Length of a tick in seconds, defaults to 0.1
+            clock: Callable[[], float], optional
+                Current time in seconds, defaults to time.time
+        """
+        self.tick_time = tick_time
+        self.clock = clock
+        self.current_tick = floor(self.get_position(clock()))
+        self._levels = [[set() for _ in range(TimerWheel.SLOT_COUNT)]
+                        for _ in range(TimerWheel.LEVEL_COUNT)]
+        # Bitset of the non-empty slots per level
+        self._occupied = [0] * TimerWheel.LEVEL_COUNT
+        # Timers of ticks that have been processed already
+        self._due = set()
+        self._count = 0
+        self._lock = Lock()
+
+    def get_position(self, seconds: float) -> float:
+        """Get a time in ticks
+
+        Rounded to a millionth of a tick, so times on a tick boundary are
+        exactly on it despite floating point division.
+        """
+        return round(seconds / self.tick_time, 6)
+
+    def schedule(self, delay: float, callback, *args) -> Timer:
+        """Call a function after a delay
+
+        Args:
+            delay: float
+                Delay in seconds
+            callback: Callable
+                The function to call
+            *args:
+                Arguments of the function
+
+        Returns: Timer
+            Handle to cancel the call with
+        """
+        return self.schedule_at(self.clock() + delay, callback, *args)
+
+    def schedule_at(self, deadline: float, callback, *args) -> Timer:
+        """Call a function at a time
+
+        The timer fires in the first tick starting at or after the
+        deadline, so never early.
+
+        Args:
+            deadline: float
+                Time in seconds, as given by the clock
+            callback: Callable
+                The function to call
+            *args:
+                Arguments of the function
+
+        Returns: Timer
+            Handle to cancel the call with
+        """
+        timer = Timer(ceil(self.get_position(deadline)), callback, args)
+        with self._lock:
+            self._add(timer)
+            self._count += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> bool:
+        """Cancel a timer
+
+        Returns: bool
+            True if the timer was pending
+        """
+        with self._lock:
+            timer.is_cancelled = True
+            bucket = timer.bucket
+            if bucket is None:
+                return False
+            bucket.discard(timer)
+            if not bucket and timer.level >= 0:
+                self._occupied[timer.level] &= ~(1 << timer.slot)
+            timer.bucket = None
+            self._count -= 1
+            return True
+
+    def _add(self, timer: Timer):
+        """Put a timer into the slot that reaches its tick """
+        if timer.tick < self.current_tick:
+            self._due.add(timer)
+            timer.bucket = self._due
+            timer.level = -1
+            return
+        delta = min(timer.tick - self.current_tick, TimerWheel.MAX_DELTA)
+        tick = self.current_tick + delta
+        level = 0
+        while delta >> (TimerWheel.SLOT_BITS * (level + 1)):
+            level += 1
+        slot = (tick >> (TimerWheel.SLOT_BITS * level)) & TimerWheel.SLOT_MASK
+        bucket = self._levels[level][slot]
+        bucket.add(timer)
+        self._occupied[level] |= 1 << slot
+        timer.bucket = bucket
+        timer.level = level
+        timer.slot = slot
+
+    def _take_bucket(self, level: int, slot: int) -> set:
+        """Empty a slot
+
+        Returns: set[Timer]
+            The timers of the slot
+        """
+        slots = self._levels[level]
+        bucket = slots[slot]
+        if bucket:
+            slots[slot] = set()
+            self._occupied[level] &= ~(1 << slot)
+        return bucket
+
+    def _get_next_tick(self) -> int:
+        """Get the first tick at which a timer fires or moves down
+
+        The slot of level l comes up at the ticks that are a multiple of
+        SLOT_COUNT ** l with the slot's index in bits 8 * l to 8 * l + 7.
+
+        Returns: int
+            None if the wheel is empty
+        """
+        next_tick = None
+        for level, occupied in enumerate(self._occupied):
+            if not occupied:
+                continue
+            shift = TimerWheel.SLOT_BITS * level
+            # The first slot of this level that can still come up
+            block = -(-self.current_tick >> shift)
+            start = block & TimerWheel.SLOT_MASK
+            later = occupied >> start
+            if later:
+                offset = _get_lowest_bit(later)
+            else:
+                offset = (_get_lowest_bit(occupied) + TimerWheel.SLOT_COUNT
+                          - start)
+            tick = (block + offset) << shift
+            if next_tick is None or tick < next_tick:
+                next_tick = tick
+        return next_tick
+
+    def advance(self, now: float = None) -> int:
+        """Fire every timer up to a time
+
+        Args:
+            now: float, optional
+                The time to advance to, defaults to the time of the clock
+
+        Returns: int
+            The amount of timers fired
+        """
+        if now is None:
+            now = self.clock()
+        target = floor(self.get_position(now))
+        fired = 0
+        while True:
+            with self._lock:
+                if self._due:
+                    expired = self._take_due()
+                else:
+                    tick = self._get_next_tick()
+                    if tick is None or tick > target:
+                        self.current_tick = max(self.current_tick, target + 1)
+                        return fired
+                    self.current_tick = tick
+                    expired = self._process_tick()
+            for timer in expired:
+                timer.callback(*timer.args)
+            fired += len(expired)
+
+    def _take_due(self) -> set:
+        """Get the timers of processed ticks to fire """
+        expired = self._due
+        self._due = set()
+        for timer in expired:
+            timer.bucket = None
+        self._count -= len(expired)
+        return expired
+
+    def _process_tick(self) -> set:
+        """Move timers down and fire level 0 at the current tick
+
+        Returns: set[Timer]
+            The timers to fire
+        """
+        tick = self.current_tick
+        level = 1
+        while (level < TimerWheel.LEVEL_COUNT
+               and not tick & ((1 << (TimerWheel.SLOT_BITS * level)) - 1)):
+            # The levels below have turned around
+            slot = ((tick >> (TimerWheel.SLOT_BITS * level))
+                    & TimerWheel.SLOT_MASK)
+            bucket = self._take_bucket(level, slot)
+            for timer in bucket:
+                self._add(timer)
+            level += 1
+        expired = self._take_bucket(0, tick & TimerWheel.SLOT_MASK)
+        for timer in expired:
+            timer.bucket = None
+        self._count -= len(expired)
+        self.current_tick = tick + 1
+        return expired
+
+    def __len__(self) -> int:
+        return self._count
+
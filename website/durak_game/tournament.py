@@ -0,0 +1,258 @@
+"""Seeded tournaments between bot policies on multiple cores
+
+Games are split into shards of consecutive seeds which are played by a
+process pool. Workers send back one compact record per game, which is
+appended to a result file as soon as its shard is done, so an interrupted
+tournament can be resumed from its result file.
+
+Every game uses the lineup of policies rotated by its seed, so every policy
+plays every seat equally often.
+"""
+from __future__ import annotations
+import os
+from collections import namedtuple
+from multiprocessing import Pool
+
+from .simulator import POLICIES, Simulator
+
+# Result of one game, written as one line of the result file
+#   seed: int
+#   loser: int
+#       Seat of the durak, -1 for a draw or an unfinished game
+#   action_count: int
+#   finished: bool
+GameRecord = namedtuple("GameRecord", ["seed", "loser", "action_count",
+                                       "finished"])
+
+HEADER = "# durak tournament policies={} max_actions={}\n"
+
+
+def get_lineup(policy_names: list[str], seed: int) -> list[str]:
+    """Get the policy of every seat for the game with the given seed """
+    rotation = seed % len(policy_names)
+    return policy_names[rotation:] + policy_names[:rotation]
+
+
+def play_shard(shard: tuple) -> list[tuple]:
+    """Play the games of one shard
+
+    Runs inside the worker processes, only plain tuples are sent back.
+
+    Args:
+        shard: tuple
+            (policy names, first seed, stop seed, max actions)
+
+    Returns: list[tuple]
+        The GameRecord of every game as a plain tuple
+    """
+    policy_names, start, stop, max_actions = shard
+    simulators = []
+    for rotation in range(len(policy_names)):
+        lineup = get_lineup(policy_names, rotation)
+        simulators.append(Simulator([POLICIES[name]() for name in lineup],
+                                    max_actions=max_actions))
+    records = []
+    for seed in range(start, stop):
+        result = simulators[seed % len(policy_names)].play_game(seed)
+        loser = result.loser if result.loser is not None else -1
+        records.append((seed, loser, result.action_count, result.finished))
+    return records
+
+
+def truncate_partial_line(path: str):
+    """Remove an incomplete last line from a file """
+    with open(path, "rb+") as result_file:
+        content = result_file.read()
+        if content and not content.endswith(b"\n"):
+            result_file.truncate(content.rfind(b"\n") + 1)
+
+
+class TournamentStats:
+    """Class aggregating the results of a tournament
+
+    A player wins a game if it is not the durak.
+
+    Attributes:
+        policy_names: list[str]
+            The lineup of the tournament
+        game_count: int
+        unfinished_count: int
+            Games stopped before they were finished
+        action_count: int
+        games: dict(str: int)
+            Key: policy name, Value: games played (once per seat)
+        wins: dict(str: int)
+            Key: policy name, Value: games won (once per seat)
+        seat_losses: list[int]
+            The amount of games lost per seat
+    """
+
+    def __init__(self, policy_names: list[str]):
+        self.policy_names = policy_names
+        self.game_count = 0
+        self.unfinished_count = 0
+        self.action_count = 0
+        self.games = {name: 0 for name in policy_names}
+        self.wins = {name: 0 for name in policy_names}
+        self.seat_losses = [0] * len(policy_names)
+
+    def add(self, record: GameRecord):
+        seed, loser, action_count, finished = record
+        self.game_count += 1
+        self.action_count += action_count
+        if not finished:
+            self.unfinished_count += 1
+            return
+        if loser >= 0:
+            self.seat_losses[loser] += 1
+        for seat, name in enumerate(get_lineup(self.policy_names, seed)):
+            self.games[name] += 1
+            if seat != loser:
+                self.wins[name] += 1
+
+    def get_win_rate(self, policy_name: str) -> float:
+        games = self.games[policy_name]
+        return self.wins[policy_name] / games if games else 0.0
+
+    def get_seat_loss_rate(self, seat: int) -> float:
+        finished = self.game_count - self.unfinished_count
+        return self.seat_losses[seat] / finished if finished else 0.0
+
+    def format(self) -> str:
+        """Get a human readable summary of the tournament """
+        lines = [f"games: {self.game_count} "
+                 f"({self.unfinished_count} unfinished), "
+                 f"actions: {self.action_count}",
+                 "policy        games  win rate"]
+        for name in dict.fromkeys(self.policy_names):
+            lines.append(f"{name:<10}{self.games[name]:>9}"
+                         f"{self.get_win_rate(name):>10.3f}")
+        lines.append("seat     loss rate")
+        for seat in range(len(self.policy_names)):
+            lines.append(f"{seat:<5}{self.get_seat_loss_rate(seat):>14.3f}")
+        return "\n".join(lines)
+
+
+class Tournament:
+    """Class running a tournament on a process pool
+
+    Attributes:
+        policy_names: list[str]
+            The policy of every seat before rotation,
+            the same policy can play multiple seats
+        max_actions: int
+            Games are stopped after this amount of actions
+        processes: int
+            Amount of worker processes, defaults to the amount of cores
+        shard_size: int
+            Amount of games played by a worker in one task
+    """
+
+    def __init__(self, policy_names: list[str], max_actions: int = 10000,
+                 processes: int = None, shard_size: int = 1000):
+        for name in policy_names:
+            if name not in POLICIES:
+                raise ValueError(f"Unknown policy: {name}")
+        self.policy_names = list(policy_names)
+        self.max_actions = max_actions
+        self.processes = processes or os.cpu_count()
+        self.shard_size = shard_size
+
+    def get_header(self) -> str:
+        return HEADER.format(",".join(self.policy_names), self.max_actions)
+
+    def read_results(self, result_path: str) -> tuple:
+        """Read the records of an earlier run of this tournament
+
+        An incomplete last line of an interrupted write is ignored.
+
+        Returns: tuple[TournamentStats, set[int]]
+            The stats of the records and the seeds already played
+
+        Raises: ValueError
+            If the file belongs to another tournament
+        """
+        stats = TournamentStats(self.policy_names)
+        done = set()
+        if not os.path.exists(result_path):
+            return stats, done
+        with open(result_path) as result_file:
+            header = result_file.readline()
+            if header and header != self.get_header():
+                raise ValueError(f"{result_path} belongs to another "
+                                 f"tournament: {header.strip()}")
+            for line in result_file:
+                fields = line.split(",")
+                if len(fields) != 4 or not line.endswith("\n"):
+                    continue
+                record = GameRecord(int(fields[0]), int(fields[1]),
+                                    int(fields[2]), fields[3] == "1\n")
+                if record.seed not in done:
+                    done.add(record.seed)
+                    stats.add(record)
+        return stats, done
+
+    def get_shards(self, seeds: range, done: set[int]) -> list[tuple]:
+        """Split the seeds that were not played yet into shards """
+        shards = []
+        start = None
+        for seed in seeds:
+            if seed in done:
+                if start is not None:
+                    shards += self._split(start, seed)
+                    start = None
+            elif start is None:
+                start = seed
+        if start is not None:
+            shards += self._split(start, seeds.stop)
+        return shards
+
+    def _split(self, start: int, stop: int) -> list[tuple]:
+        return [(self.policy_names, shard_start,
+                 min(shard_start + self.shard_size, stop), self.max_actions)
+                for shard_start in range(start, stop, self.shard_size)]
+
+    def run(self, game_count: int, result_path: str,
+            seed: int = 0) -> TournamentStats:
+        """Play the tournament, resuming from the result file if it exists
+
+        Args:
+            game_count: int
+                The amount of games in the tournament
+            result_path: str
+                File the records are appended to
+            seed: int, optional
+                Seed of the first game, defaults to 0
+
+        Returns: TournamentStats
+            The stats of all games, including those of earlier runs
+        """
+        stats, done = self.read_results(result_path)
+        shards = self.get_shards(range(seed, seed + game_count), done)
+        if not shards:
+            return stats
+
+        is_new = not done and not os.path.exists(result_path)
+        if not is_new:
+            truncate_partial_line(result_path)
+            is_new = os.path.getsize(result_path) == 0
+        with open(result_path, "a") as result_file:
+            if is_new:
+                result_file.write(self.get_header())
+            if self.processes == 1:
+                self._collect(map(play_shard, shards), result_file, stats)
+            else:
+                with Pool(self.processes) as pool:
+                    self._collect(pool.imap_unordered(play_shard, shards),
+                                  result_file, stats)
+        return stats
+
+    def _collect(self, shard_records, result_file, stats: TournamentStats):
+        """Append the records of finished shards to the result file """
+        for records in shard_records:
+            result_file.write("".join(
+                f"{seed},{loser},{action_count},{int(finished)}\n"
+                for seed, loser, action_count, finished in records))
+            result_file.flush()
+            for record in records:
+                stats.add(GameRecord(*record))
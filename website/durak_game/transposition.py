@@ -0,0 +1,134 @@
+"""Bounded transposition table keyed by Zobrist hashes
+
+Stores an evaluation per game state (see DurakGame.state_hash), so search
+code can reuse evaluations of states it reaches again, within a search,
+across moves and across games.
+
+The table has a fixed amount of buckets of two entries. The first entry of
+a bucket keeps the evaluation with the highest weight (e.g. the amount of
+playouts or the search depth behind it), the second entry is always
+replaced. Memory use is bounded by the capacity, and valuable entries are
+not pushed out by a flood of cheap ones.
+"""
+from __future__ import annotations
+
+
+class TranspositionTable:
+    """Class representing a transposition table
+
+    Attributes:
+        capacity: int
+            Maximum amount of entries, rounded up to a multiple of 2
+        hits: int
+        misses: int
+        stores: int
+            The amount of states added to the table
+        replacements: int
+            The amount of states pushed out of the table
+    """
+
+    __slots__ = ("capacity", "_bucket_count", "_keys", "_weights", "_values",
+                 "hits", "misses", "stores", "replacements")
+
+    def __init__(self, capacity: int = 1 << 16):
+        """Initialize an empty table
+
+        Args:
+            capacity: int, optional
+                Maximum amount of entries, defaults to 65536
+        """
+        if capacity < 2:
+            raise ValueError(f"Capacity too small: {capacity}")
+        self._bucket_count = (capacity + 1) // 2
+        self.capacity = 2 * self._bucket_count
+        self._keys = [None] * self.capacity
+        self._weights = [0] * self.capacity
+        self._values = [None] * self.capacity
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def _get_slot(self, key: int) -> int:
+        """Get the slot of the first entry of the bucket of a key """
+        return 2 * (key % self._bucket_count)
+
+    def get(self, key: int, default=None):
+        """Get the evaluation of a state
+
+        Args:
+            key: int
+                The hash of the state
+
+        Returns:
+            The stored value, default if the state is not in the table
+        """
+        slot = self._get_slot(key)
+        keys = self._keys
+        if keys[slot] == key:
+            self.hits += 1
+            return self._values[slot]
+        if keys[slot + 1] == key:
+            self.hits += 1
+            return self._values[slot + 1]
+        self.misses += 1
+        return default
+
+    def store(self, key: int, value, weight: int = 0):
+        """Store the evaluation of a state
+
+        An entry of the same state is overwritten. The value takes the
+        preferred entry of the bucket if its weight is at least the weight
+        there, moving the old preferred entry to the other entry.
+        Otherwise it takes the other entry.
+
+        Args:
+            key: int
+                The hash of the state
+            value:
+                The evaluation to store
+            weight: int, optional
+                The value of the evaluation, defaults to 0
+        """
+        slot = self._get_slot(key)
+        keys = self._keys
+        weights = self._weights
+        values = self._values
+        if keys[slot] == key:
+            values[slot] = value
+            weights[slot] = weight
+            return
+        if keys[slot + 1] == key:
+            # Stored again below, possibly as preferred entry
+            keys[slot + 1] = None
+        else:
+            self.stores += 1
+
+        if keys[slot] is None or weight >= weights[slot]:
+            if keys[slot] is not None:
+                # The preferred entry moves to the other entry
+                if keys[slot + 1] is not None:
+                    self.replacements += 1
+                keys[slot + 1] = keys[slot]
+                values[slot + 1] = values[slot]
+                weights[slot + 1] = weights[slot]
+        else:
+            if keys[slot + 1] is not None:
+                self.replacements += 1
+            slot += 1
+        keys[slot] = key
+        values[slot] = value
+        weights[slot] = weight
+
+    def clear(self):
+        for slot in range(self.capacity):
+            self._keys[slot] = None
+            self._values[slot] = None
+            self._weights[slot] = 0
+
+    def __contains__(self, key: int) -> bool:
+        slot = self._get_slot(key)
+        return key in (self._keys[slot], self._keys[slot + 1])
+
+    def __len__(self) -> int:
+        return self.capacity - self._keys.count(None)
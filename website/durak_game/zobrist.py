@@ -0,0 +1,100 @@
+"""Zobrist hashing of game states
+
+The hash of a game is the XOR of a random 64-bit key per feature of the
+state: the location of every card (the hand of a seat, the deck, the table
+as a bottom card, or the table on top of a specific bottom card), the
+trump suit, the seat of the current player and the flags of the round.
+A change of one feature only needs the XOR of its old and new key, so
+DurakGame updates its hash inside every mutating method.
+
+The order of the deck is not part of the hash.
+"""
+from __future__ import annotations
+from random import Random
+
+from .card import Card
+
+# Fixed seed: hashes are the same in every process
+_rng = Random(0x5eed)
+
+
+def _get_key() -> int:
+    return _rng.getrandbits(64)
+
+
+# Card locations, seats are the seat indices of the SeatRing
+MAX_SEATS = 8
+DECK = MAX_SEATS
+TABLE = MAX_SEATS + 1
+LOCATION_COUNT = MAX_SEATS + 2
+
+# _CARD_KEYS[location][card.index]
+_CARD_KEYS = [[_get_key() for _ in range(Card.CARD_COUNT)]
+              for _ in range(LOCATION_COUNT)]
+
+# PAIR_KEYS[bottom_card.index][top_card.index]: top card on a bottom card
+PAIR_KEYS = [[_get_key() for _ in range(Card.CARD_COUNT)]
+             for _ in range(Card.CARD_COUNT)]
+
+TRUMP_KEYS = {suit: _get_key() for suit in Card.SUITS}
+CURRENT_KEYS = [_get_key() for _ in range(MAX_SEATS)]
+THROWING_STARTED_KEY = _get_key()
+NEXT_ALLOWS_BREAK_KEY = _get_key()
+PREV_ALLOWS_BREAK_KEY = _get_key()
+
+# Keys of bitsets are looked up per byte:
+# _BYTE_KEYS[location][byte][value] is the key of the cards in
+# bits 8 * byte to 8 * byte + 7 of a bitset with these bits set to value
+_BYTE_COUNT = (Card.CARD_COUNT + 7) // 8
+
+
+def _get_byte_keys(card_keys: list[int]) -> list[list[int]]:
+    byte_keys = []
+    for byte in range(_BYTE_COUNT):
+        keys = [0] * 256
+        for value in range(1, 256):
+            low = value & -value
+            index = 8 * byte + low.bit_length() - 1
+            card_key = card_keys[index] if index < Card.CARD_COUNT else 0
+            keys[value] = keys[value ^ low] ^ card_key
+        byte_keys.append(keys)
+    return byte_keys
+
+
+_BYTE_KEYS = [_get_byte_keys(card_keys) for card_keys in _CARD_KEYS]
+del _rng
+
+
+def get_card_key(location: int, card: Card) -> int:
+    return _CARD_KEYS[location][card.index]
+
+
+def get_mask_key(location: int, mask: int) -> int:
+    """Get the key of all cards of the bitset at a location
+
+    Args:
+        location: int
+            A seat, DECK or TABLE
+        mask: int
+            Bitset of the cards (see cardset)
+
+    Returns: int
+        The XOR of the keys of the cards
+    """
+    key = 0
+    for keys in _BYTE_KEYS[location]:
+        if not mask:
+            break
+        key ^= keys[mask & 0xff]
+        mask >>= 8
+    return key
+
+
+def get_table_key(table_cards: dict[Card, Card]) -> int:
+    """Get the key of the cards on the table """
+    key = 0
+    for bottom_card, top_card in table_cards.items():
+        key ^= _CARD_KEYS[TABLE][bottom_card.index]
+        if top_card is not None:
+            key ^= PAIR_KEYS[bottom_card.index][top_card.index]
+    return key
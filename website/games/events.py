@@ -1,128 +1,224 @@
+from itertools import groupby
+
 from flask import session, request
 from flask_socketio import emit, join_room, leave_room
 from website import socketio, gameManager
+from website.durak_game import actions
+from website.durak_game.broadcast import RoomPackets
 from website.durak_game.card import Card
+from website.durak_game.event_stream import get_snapshot
 
 
-@socketio.on("join")
-def join(data):
-    room = session.get("room")
-    join_room(room)
+# Events of a game do not change the game in the handler: they are jobs in
+# the mailbox of the game, run in order by its worker (see GameActor).
+# Jobs send their socket events through send, which are sent together
+# after every batch of jobs.
+# Changes of the game are sent through publish, numbered by the stream of
+# the game (see EventStream), which clients check to detect missed events.
+
+
+def game_event(name):
+    """ Register a job job(game, player, data) for a socket event """
+    def decorator(job):
+        socketio.on_event(name, lambda data: submit_event(job, data))
+        return job
+    return decorator
+
 
+def submit_event(job, data):
+    """ Queue a job for the game of the session """
+    room = session.get("room")
     try:
-        game = gameManager.current_games[room]
+        is_submitted = gameManager.submit(room, run_event, job,
+                                          session.get("username"), data)
     except KeyError as e:
         print(f"Game not found: {e}")
         return
 
-    player = game.get_player(session.get("username"))
-    player.sid = request.sid
+    if not is_submitted:
+        event = {"event": "message",
+                 "body": "Too many moves at once, please wait a moment",
+                 "type": "danger"}
+        emit('status', event)
+
+
+def run_event(game, job, username, data):
+    job(game, game.get_player(username), data)
+
+
+def send(game, name, event, room=None, private=None):
+    """ Send an event to the room of the game or to a player
+
+    private maps sids of the room to fields for that member only.
+    """
+    gameManager.send(game, name, event, game.id if room is None else room,
+                     private)
+
+
+def publish(game, name, event):
+    """ Send a change of the game to its room, with the next number """
+    gameManager.get_stream(game).add(name, event)
+    send(game, name, event)
+
+
+def send_snapshot(game, player):
+    """ Send the whole game to a client that missed events """
+    if not game.is_in_progress or player.sid is None:
+        return
+    stream = gameManager.get_stream(game)
+    stream.set_hand(player)
+    send(game, 'status', get_snapshot(game, player, stream.seq), player.sid)
+
+
+def send_events(events):
+    """ Send the events of a batch of jobs
+
+    Consecutive events for the same room are sent as one batch event.
+    Events are encoded once for the room, private fields once for their
+    member (see RoomPackets).
+    """
+    server = socketio.server
+    for room, group in groupby(events, key=lambda event: event[2]):
+        packets = RoomPackets([(name, event, private)
+                               for name, event, _, private in group])
+        for sid, eio_sid in get_participants(room):
+            server.eio.send(eio_sid, packets.get_packet(sid))
+
+
+def get_participants(room):
+    """ Get (sid, engine.io sid) of every socket in a room or of a sid """
+    try:
+        return list(socketio.server.manager.get_participants('/', room))
+    except KeyError:
+        return []
+
+
+gameManager.sender = send_events
+
+
+@socketio.on("join")
+def join(data):
+    join_room(session.get("room"))
+    submit_event(on_join, (request.sid, data.get("seq")))
+
+
+# Clients that reconnect give the number of the last change they applied,
+# and get the changes they missed
+def on_join(game, player, data):
+    player.sid, seq = data
+    if seq is not None:
+        missed = gameManager.get_stream(game).get_missed(seq,
+                                                          player.username)
+        if missed is None:
+            send_snapshot(game, player)
+        else:
+            for name, event in missed:
+                send(game, name, event, player.sid)
+
     event = {"event": "joined",
-             "username": session.get("username")}
-    emit('status', event, room=room)
+             "username": player.username}
+    publish(game, 'status', event)
 
 
 @socketio.on("leave")
 def leave(data):
-    room = session.get("room")
-    leave_room(room)
+    leave_room(session.get("room"))
+    submit_event(on_leave, data)
+
 
-    game, player = get_game_and_player()
+def on_leave(game, player, data):
     is_next_round = game.remove_player(player)
+    gameManager.get_stream(game).forget(player.username)
 
     event = {"event": "left",
-             "username": session.get("username")}
-    emit('status', event, room=room)
+             "username": player.username}
+    publish(game, 'status', event)
 
     if is_next_round:
         emit_finish_round(game)
 
 
-@socketio.on("chat")
-def chat(data):
-    game, player = get_game_and_player()
+@game_event("chat")
+def chat(game, player, data):
     event = {"event": "chat",
              "content": data["content"],
              "player": player.username}
-    emit('status', event, room=game.id)
-
+    send(game, 'status', event)
 
-@socketio.on("startgame")
-def start_game(data):
-    game, _ = get_game_and_player()
 
+@game_event("startgame")
+def start_game(game, player, data):
     if game.is_in_progress:
         event = {"event": "message",
                  "body": "Game is already in progress",
                  "type": "danger"}
-        emit('status', event, room=game.id)
+        send(game, 'status', event)
         return
 
     if (game.get_lobby_count() + game.get_player_count()) <= 1:
         event = {"event": "message",
                  "body": "Not enough players to start the game",
                  "type": "danger"}
-        emit('status', event, room=game.id) 
+        send(game, 'status', event)
         return
 
     game.start_game()
+    # Clients reload the page, which shows the new hands
+    gameManager.get_stream(game).clear_hands()
     event = {"event": "startgame"}
-    emit('status', event, room=game.id)
+    publish(game, 'status', event)
 
 
-@socketio.on("throwcards")
-def throw_cards(data):
-    game, player = get_game_and_player()
+@game_event("throwcards")
+def throw_cards(game, player, data):
     cards = [Card.from_str(card_str) for card_str in data["cards"]]
     is_thrown = game.throw_cards(player, cards)
 
     if is_thrown:
+        gameManager.get_stream(game).remove_cards(player, cards)
         event = {"event": "throwcards",
                 "player": player.username,
                 "cards": data["cards"]}
-        emit('move', event, room=game.id)
+        publish(game, 'move', event)
 
 
-@socketio.on("takecards")
-def take_cards(data):
-    game, player = get_game_and_player()
+@game_event("takecards")
+def take_cards(game, player, data):
     is_taken = game.take_cards(player)
 
     if is_taken:
         event = {"event": "takecards"}
-        emit('move', event, room=game.id)
+        publish(game, 'move', event)
         emit_finish_round(game)
 
 
-@socketio.on("breakcards")
-def break_cards(data):
-    game, player = get_game_and_player()
+@game_event("breakcards")
+def break_cards(game, player, data):
     is_broken = game.break_cards(player)
 
     if is_broken:
         event = {"event": "breakcards"}
-        emit('move', event, room=game.id)
+        publish(game, 'move', event)
         emit_finish_round(game)
 
 
-@socketio.on("breakcard")
-def break_card(data):
-    game, player = get_game_and_player()
+@game_event("breakcard")
+def break_card(game, player, data):
     bottomcard = Card.from_str(data["bottomcard"])
     topcard = Card.from_str(data["topcard"])
     is_broken = game.break_card(player, bottomcard, topcard)
 
     if is_broken:
+        gameManager.get_stream(game).remove_cards(player, [topcard])
         event = {"event": "breakcard",
                 "bottomcard": data["bottomcard"],
                 "topcard": data["topcard"],
                 "player": player.username}
-        emit('move', event, room=game.id)
+        publish(game, 'move', event)
 
 
-@socketio.on("movetopcard")
-def move_top_card(data):
-    game, player = get_game_and_player()
+@game_event("movetopcard")
+def move_top_card(game, player, data):
     new_bottomcard = Card.from_str(data["new_bottomcard"])
     topcard = Card.from_str(data["topcard"])
     is_moved = game.move_top_card(player, topcard, new_bottomcard)
@@ -131,47 +227,67 @@ def move_top_card(data):
         event = {"event": "movetopcard",
                 "new_bottomcard": data["new_bottomcard"],
                 "topcard": data["topcard"]}
-        emit('move', event, room=game.id)
+        publish(game, 'move', event)
 
 
-@socketio.on("passcards")
-def pass_cards(data):
-    game, player = get_game_and_player()
+@game_event("passcards")
+def pass_cards(game, player, data):
     cards = [Card.from_str(card_str) for card_str in data["cards"]]
     is_passed = game.pass_on(player, cards)
 
     if is_passed:
-        event = {"event": "passcards", 
-                "player": session.get("username"),
+        gameManager.get_stream(game).remove_cards(player, cards)
+        event = {"event": "passcards",
+                "player": player.username,
                 "newplayer": game.current_player.username,
                 "cards": data["cards"]}
-        emit('move', event, room=game.id)
+        publish(game, 'move', event)
 
 
-@socketio.on("passtrump")
-def pass_trump(data):
-    game, player = get_game_and_player()
+@game_event("passtrump")
+def pass_trump(game, player, data):
     is_passed = game.pass_on_using_trump(player)
 
     if is_passed:
-        event = {"event": "passtrump", 
+        event = {"event": "passtrump",
                 "newplayer": game.current_player.username}
-        emit('move', event, room=game.id)
+        publish(game, 'move', event)
 
 
-@socketio.on("allowbreak")
-def allow_break(data):
-    game, player = get_game_and_player()
+@game_event("allowbreak")
+def allow_break(game, player, data):
     allowed_break = game.allow_break_cards(player)
 
     if allowed_break:
         event = {"event": "allowbreak",
                  "player": player.username}
-        emit('move', event, room=game.id)
+        publish(game, 'move', event)
+
+
+@socketio.on("ack")
+def ack(data):
+    submit_event(on_ack, data)
+
+
+# Clients acknowledge the last change they applied now and then
+def on_ack(game, player, data):
+    if gameManager.get_stream(game).ack(player.username, data["seq"]):
+        send_snapshot(game, player)
+
+
+@socketio.on("sync")
+def sync(data):
+    submit_event(on_sync, data)
+
+
+# Clients that see a gap in the numbers of the changes ask for the game
+def on_sync(game, player, data):
+    send_snapshot(game, player)
 
 
 # Give every player the necessary information after a round is finished
 def emit_finish_round(game):
+    stream = gameManager.get_stream(game)
     event = {
         "event": "finishround",
         "newplayer": game.current_player.username,
@@ -180,17 +296,31 @@ def emit_finish_round(game):
                         for player in game.players}
     }
 
-    # Players that are playing get info about the new cards
-    for player in game.players:
-        cards = [str(card) for card in player.cards]
-        event.update({"cards": cards})
-        emit('status', event, room=player.sid)
-    for player in game.lobby:
-        emit('status', event, room=player.sid)
+    # Players that are playing get the cards they got this round
+    private = {player.username:
+               {"cards": [str(card) for card in stream.get_new_cards(player)]}
+               for player in game.players}
+    stream.add('status', event, private)
 
+    # The event is encoded once for the room, the cards once per player
+    send(game, 'status', event,
+         private={player.sid: private[player.username]
+                  for player in game.players if player.sid is not None})
 
-def get_game_and_player():
-    room = session.get("room")
-    game = gameManager.current_games[room]
-    player = game.get_player(session.get("username"))
-    return game, player
+
+# Give every player the action performed for an idle player at a deadline
+# Runs in a job of the game, like the socket events
+def emit_timeout_action(game, player, action):
+    kind = action[0]
+    if kind == actions.ALLOW_BREAK:
+        event = {"event": "allowbreak",
+                 "player": player.username}
+        publish(game, 'move', event)
+        return
+    # Taking and breaking cards finish the round
+    event = {"event": kind}
+    publish(game, 'move', event)
+    emit_finish_round(game)
+
+
+gameManager.turn_listener = emit_timeout_action
@@ -3,6 +3,7 @@ from flask import (render_template, url_for, redirect, current_app, abort,
 from flask_login import current_user, login_required
 from website import db, gameManager, socketio
 from website.games.forms import GameForm
+from website.durak_game.event_stream import get_allowed_break_players
 from website.durak_game.player import Player
 from . import games
 
@@ -13,6 +14,10 @@ def new_game():
     form = GameForm()
     if form.validate_on_submit():
         game = gameManager.create_game(form.name.data)
+        if game is None:
+            flash("Too many games are being played, try again later.",
+                  "danger")
+            return redirect(url_for('main.home'))
         return redirect(url_for('games.join', game_id=game.id))
 
     return render_template('game/create_game.html', title='New Game',
@@ -23,20 +28,19 @@ def new_game():
 @login_required
 def join(game_id):
     try:
-        game = gameManager.current_games[game_id]
-    except KeyError:
-        abort(404)
+        with gameManager.lock_game(game_id) as game:
+            if current_user in game.lobby:
+                return redirect(url_for("games.lobby", game_id=game_id))
 
-    if current_user in game.lobby:
-        return redirect(url_for("games.lobby", game_id=game_id))
+            if game.is_full():
+                flash("The game is full.", "danger")
+                return redirect(url_for('main.home'))
 
-    if game.is_full():
-        flash("The game is full.", "danger")
-        return redirect(url_for('main.home'))
-
-    session["room"] = game_id
-    session["username"] = current_user.username
-    game.add_player(current_user.username)
+            session["room"] = game_id
+            session["username"] = current_user.username
+            game.add_player(current_user.username)
+    except KeyError:
+        abort(404)
 
     if game.is_in_progress:
         # If the game is already in progress, spectating is possible
@@ -53,39 +57,46 @@ def lobby(game_id):
     if not username or not room:
         return redirect(url_for("games.join", game_id=game_id))
 
+    # The page shows the game at the number of the stream, which the
+    # client checks the following events against
     try:
-        game = gameManager.current_games[game_id]
+        with gameManager.lock_game(game_id) as game:
+            return render_template("game/game_lobby.html", game=game,
+                        username=current_user.username,
+                        seq=gameManager.get_stream(game).seq)
     except KeyError:
         abort(404)
 
-    return render_template("game/game_lobby.html", game=game, 
-                username=current_user.username)
-
 
 @games.route("/game/<int:game_id>")
 @login_required
 def game(game_id):
     try:
-        game = gameManager.current_games[game_id]
+        with gameManager.lock_game(game_id) as game:
+            return render_game(game)
     except KeyError:
         abort(404)
 
+
+def render_game(game):
+    """ Render the page of a game, call while holding the lock of the game
+    """
     if not game.is_in_progress:
-        return redirect(url_for("games.join", game_id=game_id))
+        return redirect(url_for("games.join", game_id=game.id))
 
     player = game.get_player(current_user.username)
     spectating = player not in game.players
     other_players = player.get_players_in_position(game, spectating=spectating)
-    allowed_break_players = []
-    if game.next_allows_break:
-        allowed_break_players.append(game.next_player(game.current_player))
-    if game.prev_allows_break:
-        allowed_break_players.append(game.prev_player(game.current_player))
+    # The page shows the whole hand
+    stream = gameManager.get_stream(game)
+    if not spectating:
+        stream.set_hand(player)
 
     return render_template('game/game.html', game=game,
                 player=player,
                 current_player=game.current_player.username,
                 other_players=other_players,
                 spectating=spectating,
-                allowed_break_players=allowed_break_players,
-                chat_options=current_app.config["CHAT_OPTIONS"])
+                allowed_break_players=get_allowed_break_players(game),
+                chat_options=current_app.config["CHAT_OPTIONS"],
+                seq=stream.seq)
@@ -8,11 +8,10 @@ from . import main
 def home():
     form = JoinForm()
     if form.validate_on_submit():
-        try:
-            game = gameManager.current_games[int(form.game_id.data)]
+        game = gameManager.find_game(int(form.game_id.data))
+        if game is not None:
             return redirect(url_for('games.join', game_id=game.id))
-        except KeyError:
-            flash("No game found with this code", "danger")
+        flash("No game found with this code", "danger")
 
     return render_template("main/home.html", form=form)
 
@@ -3,6 +3,11 @@ document.addEventListener('DOMContentLoaded', () =>
     var socket = io();
     var selectedCards = [];
     var selectedTopCard = null;
+    // Events are ignored while waiting for a snapshot after a gap
+    var isSyncing = false;
+    var ackTimeout = null;
+    // Milliseconds between acknowledgements of the applied changes
+    const ACK_DELAY = 1000;
 
     const ownCards = document.getElementById('owncards');
     const tableCards = document.getElementById('tablecards');
@@ -18,10 +23,85 @@ document.addEventListener('DOMContentLoaded', () =>
 
     socket.on('connect', () => 
     {
-        socket.emit('join', {'username': username});
+        // Changes missed while disconnected are sent again, or the game
+        // if they are no longer kept
+        isSyncing = false;
+        socket.emit('join', {'username': username, 'seq': lastSeq});
     });
 
-    socket.on('status', data => 
+    socket.on('status', data => receive(onStatus, data));
+    socket.on('move', data => receive(onMove, data));
+
+    // Several events of a game sent at once, in order
+    socket.on('batch', events => 
+    {
+        for (const event of events)
+        {
+            if (event.name === 'status')
+                receive(onStatus, event.data);
+            else if (event.name === 'move')
+                receive(onMove, event.data);
+        }
+    });
+
+    /**
+     * Apply an event if it is the next change of the game
+     * 
+     * @param {function} handler 
+     *      The function applying the event
+     * @param {object} data 
+     *      The event, changes of the game have the number 'seq'
+     * 
+     * Events without a number, like chat messages, are applied right away.
+     * Changes already shown are skipped. If changes were missed, the game
+     * is requested from the server and changes are skipped until it
+     * arrives as a snapshot.
+     */
+    function receive(handler, data)
+    {
+        if (data.event == 'snapshot')
+        {
+            onSnapshot(data);
+        }
+        else if (data.seq === undefined)
+        {
+            handler(data);
+        }
+        else if (data.seq <= lastSeq || isSyncing)
+        {
+            return;
+        }
+        else if (data.seq > lastSeq + 1)
+        {
+            isSyncing = true;
+            socket.emit('sync', {'seq': lastSeq});
+            return;
+        }
+        else
+        {
+            lastSeq = data.seq;
+            handler(data);
+        }
+        scheduleAck();
+    }
+
+    /**
+     * Acknowledge the last applied change within ACK_DELAY 
+     */
+    function scheduleAck()
+    {
+        if (ackTimeout !== null)
+        {
+            return;
+        }
+        ackTimeout = setTimeout(() => 
+        {
+            ackTimeout = null;
+            socket.emit('ack', {'seq': lastSeq});
+        }, ACK_DELAY);
+    }
+
+    function onStatus(data)
     {
         switch(data.event)
         {
@@ -41,9 +121,9 @@ document.addEventListener('DOMContentLoaded', () =>
                 onChat(data)
             break;
         }
-    });
+    }
 
-    socket.on('move', data => 
+    function onMove(data)
     {
         switch(data.event)
         {
@@ -72,7 +152,7 @@ document.addEventListener('DOMContentLoaded', () =>
                 onAllowBreak(data);
             break;
         }
-    });
+    }
     
 
     // BUTTON EVENTS
@@ -774,11 +854,12 @@ document.addEventListener('DOMContentLoaded', () =>
      *          'event': 'finishround',
      *          'newplayer': <username of the new current player>,
      *          'deckcount': <new number of cards in the deck>,
-     *          'cardcounts': <new number of cards in each players hand>
+     *          'cardcounts': <new number of cards in each players hand>,
+     *          'cards': <ids of the cards the user got, only for players>
      *      }
      * 
      * All cards are cleared from the table.
-     * If the player is not a spectator, update the cards in the user's hand.
+     * If the player is not a spectator, add the new cards to the user's hand.
      * Update the other players: 
      *     If they are still in the game, their card count is updated and if 
      *     they allowed break, they don't allow break anymore.
@@ -844,6 +925,89 @@ document.addEventListener('DOMContentLoaded', () =>
     }
 
 
+    /**
+     * Show the game as sent by the server after missing changes
+     * 
+     * @param {object} data 
+     *      Object containing the whole game
+     *      {
+     *          'event': 'snapshot',
+     *          'seq': <number of the last change of the game>,
+     *          'currentplayer': <username of the current player>,
+     *          'deckcount': <number of cards in the deck>,
+     *          'cardcounts': <number of cards in each players hand>,
+     *          'table': <list of [bottom card id, top card id or null]>,
+     *          'allowedbreak': <usernames of players allowing a break>,
+     *          'cards': <ids of the cards of the user, only for players>
+     *      }
+     * 
+     * Players that are not on the page yet are only shown by reloading it.
+     */
+    function onSnapshot(data)
+    {
+        for (const name in data.cardcounts)
+        {
+            if (name != username && !document.getElementById('player' + name))
+            {
+                location.reload();
+                return;
+            }
+        }
+
+        lastSeq = data.seq;
+        isSyncing = false;
+
+        tableCards.innerHTML = '';
+        for (const [bottomCard, topCard] of data.table)
+        {
+            const pair = document.createElement('div');
+            pair.className = "table-card-pair";
+            const bottom = makeCard("card" + bottomCard);
+            bottom.className = "card bottom-card";
+            pair.append(bottom);
+            if (topCard)
+            {
+                const top = makeCard("card" + topCard);
+                top.className = "card top-card";
+                pair.append(top);
+            }
+            tableCards.append(pair);
+        }
+        selectedTopCard = null;
+
+        if (data.cards)
+        {
+            ownCards.innerHTML = '';
+            selectedCards = [];
+            for (const card of data.cards)
+            {
+                ownCards.append(makeCard("card" + card));
+            }
+        }
+
+        var otherPlayers = document.getElementById('otherplayers').
+            getElementsByClassName('other-player');
+        for (var i = 0; i < otherPlayers.length; i++)
+        {
+            var name = otherPlayers[i].id.replace('player', '');
+            if (name in data.cardcounts)
+            {
+                document.getElementById('cardcount' + name).innerHTML = 
+                    data.cardcounts[name];
+            }
+            else
+            {
+                otherPlayers[i].classList.add('finished-player');
+            }
+            otherPlayers[i].classList.toggle('allowed-break-player',
+                data.allowedbreak.includes(name));
+        }
+
+        document.getElementById('deckcount').innerHTML = data.deckcount;
+
+        updateCurrentPlayer(data.currentplayer);
+    }
+
     /**
      * @param {string} newPlayer 
      *      Username of the new current player
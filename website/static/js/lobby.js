@@ -8,10 +8,48 @@ document.addEventListener('DOMContentLoaded', () =>
 
     socket.on('connect', () => 
     {
-        socket.emit('join', {"username": username});
+        // Changes missed while disconnected are sent again
+        socket.emit('join', {"username": username, "seq": last_seq});
     });
 
-    socket.on('status', data => 
+    socket.on('status', receive);
+
+    // Several events of a game sent at once, in order
+    socket.on('batch', events => 
+    {
+        for (const event of events)
+        {
+            if (event.name === 'status')
+                receive(event.data);
+        }
+    });
+
+    /**
+     * Apply an event if it is the next change of the game
+     * 
+     * @param {object} data 
+     *      The event, changes of the game have the number 'seq'
+     * 
+     * If changes were missed, the lobby is reloaded.
+     */
+    function receive(data)
+    {
+        if (data.seq === undefined)
+        {
+            on_status(data);
+        }
+        else if (data.seq > last_seq + 1)
+        {
+            location.reload();
+        }
+        else if (data.seq == last_seq + 1)
+        {
+            last_seq = data.seq;
+            on_status(data);
+        }
+    }
+
+    function on_status(data)
     {
         switch(data.event)
         {
@@ -28,7 +66,7 @@ document.addEventListener('DOMContentLoaded', () =>
                 on_message(data)
             break;
         }
-    });
+    }
     
 
     // BUTTON EVENTS